@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Admission control for pipeline runs in the web server.
+
+At most `max_concurrent` pipelines (each with a browser page and LLM calls) run at once.
+Up to `max_queue` more requests wait for a slot, for at most `queue_timeout_s`; anything
+beyond that is rejected straight away with a Retry-After estimate, so a burst of requests
+turns into 429s instead of exhausting memory and API quota. Waiting requests hold server
+threads, so the default queue is sized to leave some of the worker's threads free for
+/health, /metrics and job polling even when every slot is busy. The estimate comes from an
+exponentially weighted moving average (EWMA) of recent pipeline latencies and the number
+of requests ahead of the caller.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import REGISTRY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "4"))
+# Request threads per server worker, read by gunicorn.conf.py as well (so never pass --threads)
+# and how many of them synchronous pipelines must leave free
+SERVER_THREADS = int(os.getenv("GUNICORN_THREADS", "8"))
+RESERVED_THREADS = int(os.getenv("ADMISSION_RESERVED_THREADS", "2"))
+# Running plus waiting /analyze requests can then never take more than SERVER_THREADS - RESERVED_THREADS
+MAX_QUEUE_FOR_THREADS = max(0, SERVER_THREADS - RESERVED_THREADS - DEFAULT_MAX_CONCURRENT)
+DEFAULT_MAX_QUEUE = min(int(os.getenv("ADMISSION_MAX_QUEUE", str(MAX_QUEUE_FOR_THREADS))), MAX_QUEUE_FOR_THREADS)
+DEFAULT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "60"))
+# Pipeline latency assumed until the first runs have been measured
+DEFAULT_INITIAL_LATENCY_SECONDS = float(os.getenv("ADMISSION_INITIAL_LATENCY_SECONDS", "30"))
+# Weight of the newest sample in the latency EWMA
+LATENCY_EWMA_ALPHA = 0.2
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 600
+
+ADMISSION_IN_FLIGHT = REGISTRY.gauge("admission_in_flight", "Pipeline runs currently admitted.")
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge("admission_queue_depth", "Requests waiting for a pipeline slot.")
+ADMISSION_REJECTIONS = REGISTRY.counter("admission_rejections_total", "Requests rejected by admission control, by reason (queue_full, timeout).")
+ADMISSION_WAIT = REGISTRY.histogram("admission_wait_seconds", "Time admitted requests waited for a pipeline slot.")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; `retry_after` is the suggested wait in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server is busy ({reason.replace('_', ' ')}). Retry in {retry_after}s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int = DEFAULT_MAX_QUEUE,
+                 queue_timeout_s: float = DEFAULT_QUEUE_TIMEOUT_SECONDS,
+                 initial_latency_s: float = DEFAULT_INITIAL_LATENCY_SECONDS):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self._latency_ewma = initial_latency_s
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def _retry_after_locked(self, backlog: int = 0) -> int:
+        # Everyone ahead (running, queued or in the caller's backlog) has to finish, max_concurrent at a time
+        ahead = self._in_flight + self._waiting + backlog
+        estimate = self._latency_ewma * (ahead / self.max_concurrent)
+        return int(min(MAX_RETRY_AFTER_SECONDS, max(MIN_RETRY_AFTER_SECONDS, math.ceil(estimate))))
+
+    def retry_after(self, backlog: int = 0) -> int:
+        with self._condition:
+            return self._retry_after_locked(backlog)
+
+    def is_saturated(self, backlog: int = 0) -> bool:
+        """True when the slots and the wait queue are all taken, counting `backlog` more requests as waiting.
+
+        The backlog is work accepted elsewhere that will ask for a slot later, e.g. queued background jobs.
+        """
+        with self._condition:
+            return self._in_flight + self._waiting + backlog >= self.max_concurrent + self.max_queue
+
+    def _reject_locked(self, reason: str):
+        self._stats[f"rejected_{reason}"] += 1
+        ADMISSION_REJECTIONS.inc(reason=reason)
+        retry_after = self._retry_after_locked()
+        logging.warning(f"Admission rejected a request ({reason}); retry after {retry_after}s.")
+        raise AdmissionRejected(reason, retry_after)
+
+    def _acquire(self) -> float:
+        """Takes a slot, waiting in the queue if needed; returns the seconds waited."""
+        with self._condition:
+            if self._in_flight < self.max_concurrent and not self._waiting:
+                self._in_flight += 1
+                ADMISSION_IN_FLIGHT.set(self._in_flight)
+                return 0.0
+            if self._waiting >= self.max_queue:
+                self._reject_locked("queue_full")
+            self._waiting += 1
+            self._stats["queued"] += 1
+            ADMISSION_QUEUE_DEPTH.set(self._waiting)
+            start = time.monotonic()
+            try:
+                admitted = self._condition.wait_for(lambda: self._in_flight < self.max_concurrent, timeout=self.queue_timeout_s)
+            finally:
+                self._waiting -= 1
+                ADMISSION_QUEUE_DEPTH.set(self._waiting)
+            if not admitted:
+                self._reject_locked("timeout")
+            self._in_flight += 1
+            ADMISSION_IN_FLIGHT.set(self._in_flight)
+            return time.monotonic() - start
+
+    def _release(self, latency_s: float):
+        with self._condition:
+            self._in_flight -= 1
+            ADMISSION_IN_FLIGHT.set(self._in_flight)
+            self._latency_ewma += LATENCY_EWMA_ALPHA * (latency_s - self._latency_ewma)
+            self._condition.notify()
+
+    @contextmanager
+    def admit(self):
+        """Holds a pipeline slot for the duration of the block; raises AdmissionRejected if none is available."""
+        waited = self._acquire()
+        ADMISSION_WAIT.observe(waited)
+        with self._condition:
+            self._stats["admitted"] += 1
+        start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self._release(time.monotonic() - start)
+
+    def stats(self) -> dict:
+        with self._condition:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "latency_ewma_s": round(self._latency_ewma, 3),
+                "retry_after_s": self._retry_after_locked(),
+            })
+        return snapshot
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Returns the process-wide admission controller, built from the environment on first use."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
+
+
+# Example usage: a burst of 10 one-second runs against 2 slots and a queue of 3
+if __name__ == '__main__':
+    from concurrent.futures import ThreadPoolExecutor
+
+    controller = AdmissionController(max_concurrent=2, max_queue=3, queue_timeout_s=5, initial_latency_s=1)
+
+    def request(i):
+        try:
+            with controller.admit() as waited:
+                time.sleep(1)
+            return f"#{i} ran after waiting {waited:.1f}s"
+        except AdmissionRejected as e:
+            return f"#{i} rejected: {e}"
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        for line in executor.map(request, range(10)):
+            print(line)
+    print(controller.stats())
@@ -6,16 +6,20 @@ Flask web application for analyzing documentation from any website.
 import os
 import logging
 import json
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from urllib.parse import urlparse
-from scraper import fetch_article_content
-from readability import analyze_readability
-from structure import analyze_structure
-from completeness import analyze_completeness
-from style import analyze_style
-from reporter import generate_markdown_report, generate_json_report
-from revision_agent import main_revision
-import tempfile
+from browser_pool import get_browser_pool
+from llm_cache import cache_options, get_llm_cache
+from page_cache import get_page_cache, canonicalize_url
+from rate_limiter import get_rate_limiter
+from pipeline import ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE
+from document_api import analyze_document, revise
+from revision_agent import stream_revised_article
+from jobs import JobManager, JobStoreFull
+from coalescer import SingleFlight
+from admission import get_admission_controller, AdmissionRejected
+from warmup import start_warm_up, readiness, WARMUP_ENABLED
+from metrics import render_metrics, track_stage
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -27,117 +31,294 @@ TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
 app = Flask(__name__, template_folder=TEMPLATE_DIR)
 app.secret_key = os.urandom(24)  # For session management
 
-# Define output directory for temporary files
-TEMP_OUTPUT_DIR = os.path.join(tempfile.gettempdir(), "doc_analyzer_output")
-os.makedirs(TEMP_OUTPUT_DIR, exist_ok=True)
-
 @app.route('/')
 def index():
     """Render the main page with the form."""
     return render_template('index.html')
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
-    """Handle the analysis request."""
+def _run_analysis_pipeline(article_url: str, analysis_mode: str, stream_revision: bool = False, artifacts: dict | None = None):
+    """Fetches, analyzes and revises one article, returning (response payload, HTTP status).
+
+    With stream_revision the revision step is skipped; the article text and analysis are left in
+    `artifacts` so the revision can be streamed separately.
+    """
+    logging.info(f"Starting analysis for URL: {article_url}")
+    
+    # Steps 1-2: Fetch and analyze the article (in memory, nothing is written to disk)
     try:
-        data = request.get_json()
-        if not data or 'url' not in data:
-            return jsonify({'error': 'URL is required'}), 400
-        
-        article_url = data['url'].strip()
-        
-        # Validate URL
-        parsed_url = urlparse(article_url)
-        if not parsed_url.scheme in ["http", "https"]:
-            return jsonify({'error': 'Invalid URL. Please provide a valid HTTP or HTTPS URL.'}), 400
-        
-        logging.info(f"Starting analysis for URL: {article_url}")
-        
-        # Step 1: Fetch Article Content
-        logging.info(f"Fetching content for URL: {article_url}")
-        article_content = fetch_article_content(article_url)
-        
-        if not article_content:
-            return jsonify({'error': 'Failed to fetch article content. Please check the URL and try again.'}), 500
-        
-        logging.info("Article content fetched successfully.")
+        result = analyze_document(article_url, mode=analysis_mode)
+    except Exception as e:
+        logging.error(f"Error during analysis: {e}")
+        return {'error': f'Analysis failed: {str(e)}'}, 500
+    
+    if result is None:
+        return {'error': 'Failed to fetch article content. Please check the URL and try again.'}, 500
+    
+    # Step 3: Generate Reports
+    try:
+        markdown_report = result.to_markdown()
+        json_data = result.report
+        article_content = result.text
         
-        # Step 2: Perform Analyses
-        analysis_results = {}
-        logging.info("Starting analysis...")
+        if artifacts is not None:
+            artifacts['article_content'] = article_content
+            artifacts['analysis'] = result.analysis
+
+        # Step 4: Generate Revised Article (optional, can be slow)
+        revised_content = None
+        if not stream_revision:
+            try:
+                revised_content = revise(article_content, result)
+            except Exception as rev_e:
+                logging.warning(f"Revision generation failed: {rev_e}")
+                # Continue without revised content
         
-        try:
-            analysis_results["Readability"] = analyze_readability(article_content)
-            analysis_results["Structure"] = analyze_structure(article_content)
-            analysis_results["Completeness"] = analyze_completeness(article_content)
-            analysis_results["Style"] = analyze_style(article_content)
-            logging.info("All analyses performed.")
-        except Exception as e:
-            logging.error(f"Error during analysis: {e}")
-            return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+        return {
+            'success': True,
+            'url': article_url,
+            'markdown_report': markdown_report,
+            'json_report': json_data,
+            'revised_content': revised_content,
+            'fetch_path': result.fetch_path,
+            'original_content_preview': article_content[:500] + "..." if len(article_content) > 500 else article_content
+        }, 200
         
-        # Step 3: Generate Reports
-        try:
-            markdown_report = generate_markdown_report(article_url, analysis_results)
-            json_report = generate_json_report(article_url, analysis_results)
-            
-            # Parse JSON report for easier frontend consumption
-            json_data = json.loads(json_report) if json_report.strip().startswith("{") else None
-            
-            # Step 4: Generate Revised Article (optional, can be slow)
-            revised_content = None
-            if json_data:
-                try:
-                    # Create temporary file for JSON report
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, dir=TEMP_OUTPUT_DIR) as tmp_file:
-                        tmp_file.write(json_report)
-                        tmp_json_path = tmp_file.name
-                    
-                    # Create temporary file for revised output
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, dir=TEMP_OUTPUT_DIR) as tmp_revised:
-                        tmp_revised_path = tmp_revised.name
-                    
-                    revised_content = main_revision(
-                        original_article_url=article_url,
-                        json_report_path=tmp_json_path,
-                        output_revision_path=tmp_revised_path
-                    )
-                    
-                    # Clean up temp files
-                    try:
-                        os.unlink(tmp_json_path)
-                        if os.path.exists(tmp_revised_path):
-                            os.unlink(tmp_revised_path)
-                    except:
-                        pass
-                        
-                except Exception as rev_e:
-                    logging.warning(f"Revision generation failed: {rev_e}")
-                    # Continue without revised content
-            
-            return jsonify({
-                'success': True,
-                'url': article_url,
-                'markdown_report': markdown_report,
-                'json_report': json_data,
-                'revised_content': revised_content,
-                'original_content_preview': article_content[:500] + "..." if len(article_content) > 500 else article_content
-            })
-            
-        except Exception as e:
-            logging.error(f"Error generating reports: {e}")
-            return jsonify({'error': f'Report generation failed: {str(e)}'}), 500
+    except Exception as e:
+        logging.error(f"Error generating reports: {e}")
+        return {'error': f'Report generation failed: {str(e)}'}, 500
+
+def _parse_analysis_request(data) -> tuple[dict | None, str | None]:
+    """Validates an /analyze or /jobs request body, returning (params, error message)."""
+    if not isinstance(data, dict) or 'url' not in data:
+        return None, 'URL is required'
+    
+    article_url = str(data['url']).strip()
+    
+    # Validate URL
+    parsed_url = urlparse(article_url)
+    if not parsed_url.scheme in ["http", "https"]:
+        return None, 'Invalid URL. Please provide a valid HTTP or HTTPS URL.'
+    
+    # Optional analysis mode ("separate" or "combined")
+    analysis_mode = str(data.get('mode') or DEFAULT_ANALYSIS_MODE).lower()
+    if analysis_mode not in ANALYSIS_MODES:
+        return None, f'Invalid mode. Expected one of: {", ".join(ANALYSIS_MODES)}'
+    
+    return {
+        'url': article_url,
+        'mode': analysis_mode,
+        # Optional LLM/page cache controls: no_cache skips the caches entirely, refresh_cache re-fetches and overwrites
+        'no_cache': bool(data.get('no_cache')),
+        'refresh_cache': bool(data.get('refresh_cache')),
+        # Skip the revision in the job itself; the client streams it from /jobs/<id>/revision/stream
+        'stream_revision': bool(data.get('stream_revision')),
+    }, None
+
+def _run_uncoalesced(params: dict) -> tuple[dict, int, dict]:
+    """Runs the pipeline for validated request params under the requested cache mode, once admitted.
+
+    When no pipeline slot frees up, returns a 429 payload whose 'retry_after' is the suggested wait in seconds.
+    """
+    artifacts = {}
+    try:
+        with admission.admit(), cache_options(bypass=params['no_cache'], refresh=params['refresh_cache']):
+            payload, status_code = _run_analysis_pipeline(params['url'], params['mode'],
+                                                          stream_revision=params.get('stream_revision', False), artifacts=artifacts)
+    except AdmissionRejected as e:
+        return {'error': str(e), 'retry_after': e.retry_after}, 429, artifacts
+    return payload, status_code, artifacts
+
+# Bounds how many pipelines (browser page + LLM calls) run at once, across /analyze and /jobs
+admission = get_admission_controller()
+
+# Concurrent submissions of the same article share one pipeline run, and successful
+# results are served for a short while after it finishes
+analysis_flight = SingleFlight(cacheable=lambda result: result[1] == 200)
+
+def _execute_analysis(params: dict, artifacts: dict | None = None) -> tuple[dict, int]:
+    """Runs the pipeline for validated request params, coalesced with identical in-flight requests."""
+    key = (canonicalize_url(params['url']) or params['url'], params['mode'], bool(params.get('stream_revision')),
+           params['no_cache'], params['refresh_cache'])
+    # Cache-control requests ask for a fresh run, so they never get a stored result
+    use_cache = not (params['no_cache'] or params['refresh_cache'])
+    (payload, status_code, shared_artifacts), outcome = analysis_flight.run(key, lambda: _run_uncoalesced(params),
+                                                                            use_cache=use_cache)
+    if artifacts is not None:
+        artifacts.update(shared_artifacts)
+    # Each caller gets its own copy: a job's result is updated later by the revision stream
+    payload = dict(payload)
+    if outcome != "leader":
+        payload['coalesced'] = outcome
+    return payload, status_code
+
+# Background job manager for the asynchronous /jobs API
+job_manager = JobManager(_execute_analysis)
+
+def start_worker_warm_up() -> bool:
+    """Starts this worker's warm-up in the background."""
+    if not WARMUP_ENABLED:
+        return False
+    return start_warm_up()
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """Handle the analysis request synchronously (kept for API clients; the UI uses /jobs)."""
+    try:
+        params, error = _parse_analysis_request(request.get_json(silent=True))
+        if error:
+            return jsonify({'error': error}), 400
+        params['stream_revision'] = False  # Nothing to stream from without a job
+
+        payload, status_code = _execute_analysis(params)
+        if status_code == 429:
+            return jsonify(payload), 429, {'Retry-After': str(payload['retry_after'])}
+        return jsonify(payload), status_code
             
     except Exception as e:
         logging.error(f"Unexpected error in analyze endpoint: {e}")
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue an analysis and return its job id immediately."""
+    params, error = _parse_analysis_request(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    # Refuse up front rather than queue a job that admission control would reject. Jobs still waiting
+    # for a job thread count as queued too, so they cannot pile up behind the few job threads
+    backlog = job_manager.queued_count()
+    if admission.is_saturated(backlog):
+        retry_after = admission.retry_after(backlog)
+        return jsonify({'error': f'Server is busy. Retry in {retry_after}s.', 'retry_after': retry_after}), 429, {'Retry-After': str(retry_after)}
+    
+    try:
+        job = job_manager.submit(params)
+    except JobStoreFull as e:
+        return jsonify({'error': f'{e} Please retry shortly.'}), 503
+    
+    response = job.to_status_dict()
+    response['status_url'] = f"/jobs/{job.id}"
+    response['result_url'] = f"/jobs/{job.id}/result"
+    response['revision_stream_url'] = f"/jobs/{job.id}/revision/stream"
+    return jsonify(response), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report a job's status (queued, running, succeeded or failed)."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired.'}), 404
+    return jsonify(job.to_status_dict()), 200
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Return a finished job's result; 202 while it is still queued or running."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired.'}), 404
+    if not job.is_finished:
+        return jsonify(job.to_status_dict()), 202
+    return jsonify(job.result), job.status_code
+
+def _sse(data: dict, event: str | None = None) -> str:
+    """Formats one Server-Sent Events message."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@app.route('/jobs/<job_id>/revision/stream')
+def stream_job_revision(job_id):
+    """Stream the revised article for a finished job as Server-Sent Events."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired.'}), 404
+    if job.status != 'succeeded':
+        return jsonify({'error': f'Job is {job.status}; the revision can be streamed once it has succeeded.'}), 409
+
+    def generate():
+        # A revision produced earlier (or by a non-streaming job) is replayed in one message
+        if job.result.get('revised_content'):
+            yield _sse({'text': job.result['revised_content']})
+            yield _sse({}, event='done')
+            return
+        if 'article_content' not in job.artifacts:
+            yield _sse({'error': 'No analysis available to revise.'}, event='error')
+            return
+
+        revised_parts = []
+        try:
+            with cache_options(bypass=job.params['no_cache'], refresh=job.params['refresh_cache']), track_stage('revision_stream'):
+                for chunk in stream_revised_article(job.artifacts['article_content'], job.artifacts['analysis']):
+                    revised_parts.append(chunk)
+                    yield _sse({'text': chunk})
+        except Exception as e:
+            logging.error(f"Streaming revision failed for job {job_id}: {e}")
+            yield _sse({'error': f'Revision failed: {e}'}, event='error')
+            return
+        job.result['revised_content'] = "".join(revised_parts)
+        yield _sse({}, event='done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/health')
+@app.route('/health/live')
 def health():
-    """Health check endpoint."""
+    """Liveness check: the worker process is up and answering requests."""
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/health/ready')
+def health_ready():
+    """Readiness check: 200 once the worker is warm (LLM client, caches and browsers up), 503 while cold, warming or failed."""
+    # Starts the warm-up on servers run without the gunicorn hook, and retries a failed one after its backoff
+    start_worker_warm_up()
+    state, ready = readiness()
+    state['ready'] = ready
+    return jsonify(state), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: stage latency histograms, in-flight gauges, LLM and browser counters."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/stats/browser-pool')
+def browser_pool_stats():
+    """Reports browser pool counters (leases, hits, launches, recycles) for this worker."""
+    return jsonify(get_browser_pool().stats()), 200
+
+@app.route('/stats/llm-cache')
+def llm_cache_stats():
+    """Reports LLM response cache counters (hits, misses, evictions, size)."""
+    cache = get_llm_cache()
+    return jsonify(cache.stats() if cache is not None else {'enabled': False}), 200
+
+@app.route('/stats/page-cache')
+def page_cache_stats():
+    """Reports scraped-page cache counters (hits, stale, revalidations, evictions, size)."""
+    cache = get_page_cache()
+    return jsonify(cache.stats() if cache is not None else {'enabled': False}), 200
+
+@app.route('/stats/admission')
+def admission_stats():
+    """Reports admission control state (pipelines in flight, queue depth, rejections, Retry-After estimate)."""
+    return jsonify(admission.stats()), 200
+
+@app.route('/stats/coalescing')
+def coalescing_stats():
+    """Reports request coalescing counters (leaders, joined and cached requests, keys in flight)."""
+    return jsonify(analysis_flight.stats()), 200
+
+@app.route('/stats/llm-rate-limiter')
+def llm_rate_limiter_stats():
+    """Reports LLM rate limiter state (current concurrency limit, throttling, retries, time spent waiting)."""
+    return jsonify(get_rate_limiter().stats()), 200
+
+@app.route('/stats/jobs')
+def jobs_stats():
+    """Reports how many jobs are queued, running and finished in this worker's store."""
+    return jsonify(job_manager.stats()), 200
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
+    start_worker_warm_up()
     app.run(host='0.0.0.0', port=port, debug=False)
 
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Batch entry point: analyze many documentation URLs in one process.
+
+URLs come from a text file (one per line, '#' comments allowed), stdin ('-'),
+or a sitemap.xml (local path or URL, sitemap indexes are followed). Fetching and
+analysis run on separate bounded thread pools, LLM requests share a process-wide
+concurrency limit, and every URL gets the same output files `main.py` writes.
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+from main import process_url, DEFAULT_OUTPUT_DIR
+from scraper import fetch_article
+from browser_pool import get_browser_pool
+from llm_analyzer import set_llm_concurrency
+from rate_limiter import get_rate_limiter
+from metrics import dump_metrics
+from llm_cache import cache_options, get_llm_cache
+from page_cache import get_page_cache
+from pipeline import DEFAULT_ANALYSIS_WORKERS, ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+MAX_SITEMAP_DEPTH = 3
+STAGES = ("fetch", "analyze", "report", "revise")
+
+
+def _is_http_url(value: str) -> bool:
+    return urlparse(value).scheme in ("http", "https")
+
+
+def read_url_list(lines) -> list[str]:
+    """Parses one URL per line, skipping blanks, '#' comments and non-HTTP(S) entries."""
+    urls = []
+    for line in lines:
+        candidate = line.strip()
+        if not candidate or candidate.startswith("#"):
+            continue
+        if _is_http_url(candidate):
+            urls.append(candidate)
+        else:
+            logging.warning(f"Skipping invalid URL in input: {candidate}")
+    return urls
+
+
+def read_sitemap_urls(location: str, _depth: int = 0, xml_content: bytes | None = None) -> list[str]:
+    """Returns the page URLs in a sitemap (path or URL), following nested sitemap indexes.
+
+    Pass `xml_content` when the sitemap at `location` has already been downloaded.
+    """
+    if xml_content is None and _is_http_url(location):
+        response = requests.get(location, timeout=30)
+        response.raise_for_status()
+        xml_content = response.content
+    elif xml_content is None:
+        with open(location, "rb") as f:
+            xml_content = f.read()
+
+    root = ET.fromstring(xml_content)
+    locs = [el.text.strip() for el in root.iter(f"{SITEMAP_NS}loc") if el.text] or \
+           [el.text.strip() for el in root.iter("loc") if el.text]
+
+    if root.tag.endswith("sitemapindex"):
+        if _depth >= MAX_SITEMAP_DEPTH:
+            logging.warning(f"Sitemap index nesting deeper than {MAX_SITEMAP_DEPTH} at {location}; not following.")
+            return []
+        urls = []
+        for child in locs:
+            try:
+                urls.extend(read_sitemap_urls(child, _depth + 1))
+            except (requests.RequestException, OSError, ET.ParseError) as e:
+                logging.error(f"Failed to read nested sitemap {child}: {e}")
+        return urls
+    return read_url_list(locs)
+
+
+def dedupe(urls: list[str]) -> list[str]:
+    """Removes duplicate URLs while keeping the input order."""
+    return list(dict.fromkeys(urls))
+
+
+class StageTimer:
+    """Thread-safe collector of per-stage durations across all articles."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {stage: [] for stage in STAGES}
+
+    def add(self, timings: dict):
+        with self._lock:
+            for stage, seconds in timings.items():
+                self._samples.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+        result = {}
+        for stage, values in samples.items():
+            if not values:
+                continue
+            result[stage] = {
+                "count": len(values),
+                "total_s": round(sum(values), 3),
+                "mean_s": round(sum(values) / len(values), 3),
+                "p50_s": round(values[len(values) // 2], 3),
+                "p95_s": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+                "max_s": round(values[-1], 3),
+            }
+        return result
+
+
+def _fetch(url: str, timer: StageTimer, fetcher=None) -> dict | None:
+    start = time.perf_counter()
+    try:
+        return (fetcher or fetch_article)(url)
+    finally:
+        timer.add({"fetch": time.perf_counter() - start})
+
+
+def _analyze(url: str, article: dict, output_dir: str, workers: int, mode: str, timer: StageTimer,
+             incremental: bool = False) -> bool:
+    timings = {}
+    try:
+        return process_url(url, output_dir, workers=workers, mode=mode, article_content=article["text"], timings=timings,
+                           incremental=incremental, outline=article["outline"])
+    finally:
+        timer.add(timings)
+
+
+def run_batch(urls: list[str], output_dir: str, fetch_concurrency: int = 2, article_concurrency: int = 4,
+              workers: int | None = None, mode: str | None = None, incremental: bool = False, fetcher=None) -> dict:
+    """Fetches and analyzes every URL with bounded concurrency and returns a run summary.
+
+    `fetcher` replaces `scraper.fetch_article` (same signature and result), e.g. to throttle per host.
+    """
+    timer = StageTimer()
+    failures = {}
+    succeeded = []
+    fetch_paths = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=fetch_concurrency, thread_name_prefix="fetch") as fetch_pool, \
+         ThreadPoolExecutor(max_workers=article_concurrency, thread_name_prefix="article") as article_pool:
+        # Each task runs in a copy of the caller's context so the LLM cache mode carries over
+        fetch_futures = {fetch_pool.submit(contextvars.copy_context().run, _fetch, url, timer, fetcher): url for url in urls}
+        article_futures = {}
+        for future in as_completed(fetch_futures):
+            url = fetch_futures[future]
+            try:
+                article = future.result()
+            except Exception as e:
+                article = None
+                logging.error(f"Unexpected error fetching {url}: {e}")
+            if not article or not article["text"]:
+                failures[url] = "fetch failed"
+                continue
+            fetch_paths[url] = article.get("fetch_path")
+            article_futures[article_pool.submit(contextvars.copy_context().run, _analyze, url, article, output_dir, workers, mode, timer, incremental)] = url
+
+        for future in as_completed(article_futures):
+            url = article_futures[future]
+            try:
+                if future.result():
+                    succeeded.append(url)
+                else:
+                    failures[url] = "analysis failed"
+            except Exception as e:
+                logging.error(f"Unexpected error analyzing {url}: {e}")
+                failures[url] = f"analysis error: {e}"
+
+    elapsed = time.perf_counter() - start
+    return {
+        "total_urls": len(urls),
+        "succeeded": len(succeeded),
+        "failed": len(failures),
+        "failures": failures,
+        "fetch_paths": fetch_paths,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_min": round(len(succeeded) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "stages": timer.summary(),
+    }
+
+
+def print_summary(summary: dict):
+    """Prints a human-readable summary of a batch run."""
+    print("\n=== Batch Summary ===")
+    print(f"URLs: {summary['total_urls']}  Succeeded: {summary['succeeded']}  Failed: {summary['failed']}")
+    print(f"Elapsed: {summary['elapsed_s']:.1f}s  Throughput: {summary['throughput_per_min']:.2f} articles/min")
+    path_counts = {}
+    for path in summary.get("fetch_paths", {}).values():
+        path_counts[path] = path_counts.get(path, 0) + 1
+    if path_counts:
+        print("Fetched via: " + ", ".join(f"{path} {count}" for path, count in sorted(path_counts.items(), key=lambda item: str(item[0]))))
+    if summary["stages"]:
+        print("\nStage timings (seconds):")
+        print(f"  {'stage':<10}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}")
+        for stage, stats in summary["stages"].items():
+            print(f"  {stage:<10}{stats['count']:>7}{stats['mean_s']:>9.2f}{stats['p50_s']:>9.2f}{stats['p95_s']:>9.2f}{stats['max_s']:>9.2f}")
+    if summary["failures"]:
+        print("\nFailures:")
+        for url, reason in summary["failures"].items():
+            print(f"  - {url}: {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many documentation articles in one run.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-i", "--input", help="File with one URL per line, or '-' to read from stdin.")
+    source.add_argument("-s", "--sitemap", help="Path or URL of a sitemap.xml (sitemap indexes are followed).")
+    parser.add_argument("-o", "--output", help="Directory to save the reports (default: adjacent 'output' folder)", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--fetch-concurrency", type=int, default=2, help="Number of pages fetched at once (default: 2)")
+    parser.add_argument("--article-concurrency", type=int, default=4, help="Number of articles analyzed/revised at once (default: 4)")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="Ceiling for the adaptive limit on LLM requests in flight across the whole run; 0 = unlimited (default: 8)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_ANALYSIS_WORKERS, help="Concurrent analyses per article")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default=DEFAULT_ANALYSIS_MODE, help="Analysis mode (see main.py)")
+    parser.add_argument("--incremental", action="store_true", help="Re-analyze only sections changed since the previous run (see main.py)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response and page caches")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached LLM responses and pages but store the fresh ones")
+    parser.add_argument("--summary-json", help="Also write the run summary as JSON to this path")
+    parser.add_argument("--metrics-out", help="Write Prometheus-format metrics to this file ('-' for stdout) when done")
+    args = parser.parse_args()
+
+    try:
+        if args.sitemap:
+            urls = read_sitemap_urls(args.sitemap)
+        elif args.input == "-":
+            urls = read_url_list(sys.stdin)
+        else:
+            with open(args.input, "r", encoding="utf-8") as f:
+                urls = read_url_list(f)
+    except (requests.RequestException, OSError, ET.ParseError) as e:
+        logging.error(f"Failed to read URLs: {e}")
+        sys.exit(1)
+
+    urls = dedupe(urls)
+    if not urls:
+        logging.error("No valid URLs to process.")
+        sys.exit(1)
+
+    try:
+        os.makedirs(args.output, exist_ok=True)
+    except OSError as e:
+        logging.error(f"Error creating output directory {args.output}: {e}")
+        sys.exit(1)
+
+    logging.info(f"Starting batch of {len(urls)} URLs (fetch={args.fetch_concurrency}, articles={args.article_concurrency}, llm={args.llm_concurrency}).")
+    set_llm_concurrency(args.llm_concurrency)
+    with cache_options(bypass=args.no_cache, refresh=args.refresh_cache):
+        summary = run_batch(urls, args.output, fetch_concurrency=max(1, args.fetch_concurrency),
+                            article_concurrency=max(1, args.article_concurrency), workers=args.workers, mode=args.mode,
+                            incremental=args.incremental)
+
+    summary["browser_pool"] = get_browser_pool().stats()
+    summary["llm_rate_limiter"] = get_rate_limiter().stats()
+    cache = get_llm_cache()
+    if cache is not None:
+        summary["llm_cache"] = cache.stats()
+    page_cache = get_page_cache()
+    if page_cache is not None:
+        summary["page_cache"] = page_cache.stats()
+
+    print_summary(summary)
+    if args.summary_json:
+        try:
+            with open(args.summary_json, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            logging.info(f"Batch summary saved to: {args.summary_json}")
+        except IOError as e:
+            logging.error(f"Error saving batch summary {args.summary_json}: {e}")
+    if args.metrics_out:
+        dump_metrics(args.metrics_out)
+    sys.exit(0 if summary["failed"] == 0 else 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Offline benchmark suite for the analysis pipeline.
+
+Runs the pipeline stages against recorded article fixtures (by default the articles
+saved in the `output/` folder) with the fetch layer stubbed to return the fixture
+text and the LLM replaced by the in-process fake backend. Reports per-stage latency
+percentiles, end-to-end throughput at several concurrency levels and peak memory,
+and saves everything as JSON so runs from different commits can be compared.
+
+Usage:
+    python benchmark.py                           # default fixtures, saves to benchmark_results/
+    python benchmark.py --llm-latency-ms 0 -n 20  # measure local CPU cost only
+    python benchmark.py --compare benchmark_results/<baseline>.json
+"""
+import argparse
+import contextvars
+import datetime
+import glob
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import document_api
+import main as pipeline_main
+from combined import analyze_combined
+from llm_analyzer import set_llm_backend
+from llm_backends import FakeBackend
+from llm_cache import cache_options
+from pipeline import ANALYZERS, run_analyses
+from rate_limiter import LLMRateLimiter, set_rate_limiter
+from reporter import generate_markdown_report, generate_json_report
+from revision_agent import revise_entire_article
+from scraper import normalize_whitespace
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURE_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "output"))
+DEFAULT_RESULTS_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "benchmark_results"))
+FIXTURE_URL_PREFIX = "https://fixtures.local/articles/"
+PERCENTILES = (50, 90, 95, 99)
+# Stages whose p50 may grow by this fraction before --compare flags a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+def load_fixtures(fixture_dir: str) -> list[dict]:
+    """Loads `<name>_revised.txt` article texts (and the matching `_analysis.json`, if any) as fixtures."""
+    fixtures = []
+    for text_path in sorted(glob.glob(os.path.join(fixture_dir, "*_revised.txt"))):
+        name = os.path.basename(text_path)[:-len("_revised.txt")]
+        with open(text_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        analysis = None
+        analysis_path = os.path.join(fixture_dir, f"{name}_analysis.json")
+        if os.path.exists(analysis_path):
+            with open(analysis_path, "r", encoding="utf-8") as f:
+                analysis = json.load(f).get("analysis")
+        fixtures.append({"name": name, "url": FIXTURE_URL_PREFIX + name, "text": text, "analysis": analysis})
+    return fixtures
+
+
+def scraped_variant(text: str) -> str:
+    """Re-introduces the irregular whitespace of raw `inner_text` output so normalization has work to do."""
+    lines = text.split("\n")
+    return "\n\n\n".join(f"  \t{line}   " if i % 2 else f"{line}\t \t" for i, line in enumerate(lines)) + "\n \n\n"
+
+
+def percentile_summary(samples: list[float]) -> dict:
+    """Mean/min/max and nearest-rank percentiles of a list of durations, in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    summary = {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+    for p in PERCENTILES:
+        rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+        summary[f"p{p}_ms"] = round(ordered[rank] * 1000, 3)
+    return summary
+
+
+def _time_calls(fn, inputs: list, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _peak_memory_mb(fn, inputs: list) -> float:
+    """Peak Python heap allocated while running fn once over every input (tracemalloc, so timed separately)."""
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            fn(item)
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+    finally:
+        tracemalloc.stop()
+
+
+def run_stage_benchmarks(fixtures: list[dict], iterations: int) -> dict:
+    """Times each pipeline stage in isolation over all fixtures."""
+    analysis_results = {f["name"]: run_analyses(f["text"], max_workers=1) for f in fixtures}
+    stages = {
+        "normalize_whitespace": (normalize_whitespace, [scraped_variant(f["text"]) for f in fixtures]),
+    }
+    for name, analyzer in ANALYZERS.items():
+        stages[f"analyze_{name.lower()}"] = (analyzer, [f["text"] for f in fixtures])
+    stages["analyze_combined"] = (analyze_combined, [f["text"] for f in fixtures])
+    stages["run_analyses"] = (lambda text: run_analyses(text), [f["text"] for f in fixtures])
+    stages["generate_markdown_report"] = (lambda f: generate_markdown_report(f["url"], analysis_results[f["name"]]), fixtures)
+    stages["generate_json_report"] = (lambda f: generate_json_report(f["url"], analysis_results[f["name"]]), fixtures)
+    revision_inputs = [(f["text"], f["analysis"] or json.loads(generate_json_report(f["url"], analysis_results[f["name"]]))["analysis"])
+                       for f in fixtures]
+    stages["revise_entire_article"] = (lambda item: revise_entire_article(*item), revision_inputs)
+
+    results = {}
+    for stage, (fn, inputs) in stages.items():
+        logging.info(f"Benchmarking stage {stage} ({iterations} x {len(inputs)} calls)...")
+        fn(inputs[0])  # Warm-up (imports, regex compilation, first-call setup)
+        summary = percentile_summary(_time_calls(fn, inputs, iterations))
+        summary["peak_memory_mb"] = _peak_memory_mb(fn, inputs)
+        results[stage] = summary
+    return results
+
+
+def _stub_fetch(fixtures: list[dict], latency_s: float):
+    """Returns a fetch_article replacement serving fixture text (without an outline) after a simulated delay."""
+    by_url = {f["url"]: f["text"] for f in fixtures}
+
+    def fetch(url: str) -> dict | None:
+        time.sleep(latency_s)
+        return {"text": by_url[url], "outline": None, "fetch_path": "stub"} if url in by_url else None
+
+    return fetch
+
+
+def run_throughput_benchmarks(fixtures: list[dict], levels: list[int], articles: int, fetch_latency_s: float) -> list[dict]:
+    """Runs main.process_url end to end (stubbed fetch, fake LLM) at each concurrency level."""
+    fetch = _stub_fetch(fixtures, fetch_latency_s)
+    original_fetch = document_api.fetch_article
+    document_api.fetch_article = fetch
+    urls = [fixtures[i % len(fixtures)]["url"] for i in range(articles)]
+    results = []
+    try:
+        for level in levels:
+            logging.info(f"Benchmarking throughput: {articles} articles at concurrency {level}...")
+            stage_samples = {}
+            latencies = []
+
+            def process(url, output_dir):
+                # Repeated fixtures would otherwise overwrite each other's reports mid-run
+                output_dir = tempfile.mkdtemp(dir=output_dir)
+                timings = {}
+                start = time.perf_counter()
+                ok = pipeline_main.process_url(url, output_dir, timings=timings)
+                latencies.append(time.perf_counter() - start)
+                for stage, seconds in timings.items():
+                    stage_samples.setdefault(stage, []).append(seconds)
+                return ok
+
+            with tempfile.TemporaryDirectory(prefix="doc_analyzer_bench_") as output_dir:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=level, thread_name_prefix="bench") as executor:
+                    futures = [executor.submit(contextvars.copy_context().run, process, url, output_dir) for url in urls]
+                    succeeded = sum(1 for future in futures if future.result())
+                elapsed = time.perf_counter() - start
+
+            results.append({
+                "concurrency": level,
+                "articles": articles,
+                "succeeded": succeeded,
+                "elapsed_s": round(elapsed, 3),
+                "articles_per_min": round(succeeded / elapsed * 60, 2) if elapsed > 0 else 0.0,
+                "article_latency": percentile_summary(latencies),
+                "stages": {stage: percentile_summary(samples) for stage, samples in stage_samples.items()},
+            })
+    finally:
+        document_api.fetch_article = original_fetch
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> list[str]:
+    """Prints p50 and throughput changes against a baseline run and returns the regressed metrics."""
+    regressions = []
+    print(f"\n=== Comparison with {baseline.get('meta', {}).get('git_commit') or 'baseline'} ===")
+    print(f"  {'stage':<26}{'base p50':>12}{'now p50':>12}{'change':>9}")
+    for stage, stats in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or not base.get("p50_ms") or "p50_ms" not in stats:
+            continue
+        change = stats["p50_ms"] / base["p50_ms"] - 1
+        flag = "  <-- regression" if change > threshold else ""
+        if flag:
+            regressions.append(stage)
+        print(f"  {stage:<26}{base['p50_ms']:>12.2f}{stats['p50_ms']:>12.2f}{change:>+9.1%}{flag}")
+    base_throughput = {t["concurrency"]: t for t in baseline.get("throughput", [])}
+    for entry in current["throughput"]:
+        base = base_throughput.get(entry["concurrency"])
+        if not base or not base.get("articles_per_min"):
+            continue
+        change = entry["articles_per_min"] / base["articles_per_min"] - 1
+        flag = "  <-- regression" if change < -threshold else ""
+        if flag:
+            regressions.append(f"throughput@{entry['concurrency']}")
+        print(f"  {'throughput@' + str(entry['concurrency']):<26}{base['articles_per_min']:>12.2f}"
+              f"{entry['articles_per_min']:>12.2f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def print_results(results: dict):
+    """Prints a human-readable summary of a benchmark run."""
+    print("\n=== Stage latency (ms) ===")
+    print(f"  {'stage':<26}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'peak MB':>10}")
+    for stage, stats in results["stages"].items():
+        print(f"  {stage:<26}{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['peak_memory_mb']:>10.2f}")
+    print("\n=== End-to-end throughput ===")
+    print(f"  {'concurrency':<13}{'articles/min':>14}{'p50 s':>10}{'p95 s':>10}")
+    for entry in results["throughput"]:
+        latency = entry["article_latency"]
+        print(f"  {entry['concurrency']:<13}{entry['articles_per_min']:>14.2f}"
+              f"{latency.get('p50_ms', 0) / 1000:>10.2f}{latency.get('p95_ms', 0) / 1000:>10.2f}")
+    print(f"\nPeak RSS: {results['memory']['max_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline offline against recorded fixtures.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR, help="Folder with <name>_revised.txt articles (default: output/)")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="Timed passes over the fixtures per stage (default: 5)")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated concurrency levels for throughput (default: 1,2,4,8)")
+    parser.add_argument("--articles", type=int, default=16, help="Articles processed per concurrency level (default: 16)")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="Simulated LLM latency per request (default: 50)")
+    parser.add_argument("--fetch-latency-ms", type=float, default=100, help="Simulated page fetch latency (default: 100)")
+    parser.add_argument("-o", "--output", help="Where to save the JSON results (default: benchmark_results/<timestamp>_<commit>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative slowdown reported as a regression by --compare (default: 0.10)")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        logging.error(f"No *_revised.txt fixtures found in {args.fixtures}.")
+        sys.exit(1)
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    # Deterministic fake LLM, no response cache and no rate limiting: measure the pipeline itself
+    set_llm_backend(FakeBackend(latency_ms=args.llm_latency_ms, latency_jitter_ms=0, error_rate=0, throttle_rate=0))
+    set_rate_limiter(LLMRateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrency=0))
+    logging.getLogger().setLevel(logging.WARNING)
+    with cache_options(bypass=True):
+        stages = run_stage_benchmarks(fixtures, max(1, args.iterations))
+        throughput = run_throughput_benchmarks(fixtures, levels, max(1, args.articles), args.fetch_latency_ms / 1000)
+    logging.getLogger().setLevel(logging.INFO)
+
+    results = {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": [f["name"] for f in fixtures],
+            "iterations": args.iterations,
+            "llm_latency_ms": args.llm_latency_ms,
+            "fetch_latency_ms": args.fetch_latency_ms,
+        },
+        "stages": stages,
+        "throughput": throughput,
+        # ru_maxrss is reported in kilobytes on Linux
+        "memory": {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)},
+    }
+    print_results(results)
+
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}_{results['meta']['git_commit'] or 'nogit'}.json")
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        logging.info(f"Benchmark results saved to: {output_path}")
+    except (IOError, OSError) as e:
+        logging.error(f"Error saving benchmark results {output_path}: {e}")
+
+    if args.compare:
+        try:
+            with open(args.compare, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (IOError, ValueError) as e:
+            logging.error(f"Could not read baseline {args.compare}: {e}")
+            sys.exit(1)
+        if compare_results(results, baseline, args.threshold):
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Long-lived Playwright browser pool shared by the scraper, the CLI and the Flask app.
+
+Playwright's sync API is bound to the thread that started it, so the pool runs a fixed
+set of long-lived owner threads, each with one browser (and one long-lived context).
+Callers hand `run` a function of a fresh page; it runs on a free owner thread and its
+result comes back to the caller. Browsers therefore never outlive or leak from short-lived
+request threads, and each owner thread closes its own browser. A browser is recycled after
+serving a configurable number of pages or once the process tree's resident memory passes
+a threshold.
+"""
+import atexit
+import logging
+import os
+import queue
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from playwright.sync_api import sync_playwright
+from metrics import REGISTRY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Owner threads, i.e. browsers open at once at most (and pages being scraped at once)
+DEFAULT_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+# Recycle a browser after this many pages (0 disables the page limit)
+DEFAULT_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "50"))
+# Recycle a browser once the worker + Chromium RSS passes this many MB (0 disables the check)
+DEFAULT_MAX_RSS_MB = float(os.getenv("BROWSER_POOL_MAX_RSS_MB", "1024"))
+
+
+def _rss_from_statm(pid: str) -> int:
+    """Returns the resident set size of a process in bytes (Linux only)."""
+    with open(f"/proc/{pid}/statm", "r") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def get_process_tree_rss_mb() -> float | None:
+    """Returns the RSS of this process plus all of its descendants (e.g. Chromium) in MB."""
+    if sys.platform.startswith("linux") and os.path.isdir("/proc"):
+        try:
+            children = {}
+            for entry in os.listdir("/proc"):
+                if not entry.isdigit():
+                    continue
+                try:
+                    with open(f"/proc/{entry}/stat", "r") as f:
+                        # The command name may contain spaces, so split after the closing paren
+                        ppid = f.read().rsplit(")", 1)[1].split()[1]
+                    children.setdefault(ppid, []).append(entry)
+                except (OSError, IndexError):
+                    continue
+
+            total = 0
+            pending = [str(os.getpid())]
+            while pending:
+                pid = pending.pop()
+                try:
+                    total += _rss_from_statm(pid)
+                except OSError:
+                    pass
+                pending.extend(children.get(pid, []))
+            return total / (1024 * 1024)
+        except Exception as e:
+            logging.debug(f"Could not read process tree RSS from /proc: {e}")
+            return None
+    # Elsewhere only the peak RSS of this process is available (KB on Linux, bytes on macOS)
+    try:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+    except Exception:
+        return None
+
+
+class _BrowserSlot:
+    """A single Playwright driver + Chromium browser + context owned by one thread."""
+
+    def __init__(self, headless: bool, user_agent: str):
+        self.playwright = sync_playwright().start()
+        try:
+            self.browser = self.playwright.chromium.launch(headless=headless)
+            self.context = self.browser.new_context(user_agent=user_agent)
+        except Exception:
+            self.playwright.stop()
+            raise
+        self.pages_served = 0
+        self.launched_at = time.monotonic()
+
+    def is_alive(self) -> bool:
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+    def close(self):
+        for closer in (self.context.close, self.browser.close, self.playwright.stop):
+            try:
+                closer()
+            except Exception as e:
+                logging.debug(f"Ignoring error while closing browser slot: {e}")
+
+
+class BrowserPool:
+    """Fixed set of owner threads, each with a long-lived headless Chromium, that run page tasks."""
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_pages_per_browser: int = DEFAULT_MAX_PAGES,
+                 max_rss_mb: float = DEFAULT_MAX_RSS_MB, headless: bool = True, user_agent: str = DEFAULT_USER_AGENT):
+        self.size = max(1, size)
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.user_agent = user_agent
+        self._tasks = queue.Queue()
+        self._threads = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._slots = set()
+        self._stats = {"leases": 0, "hits": 0, "launches": 0, "recycles": 0, "launch_failures": 0}
+
+    def _increment(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _launch(self) -> _BrowserSlot:
+        logging.info("Launching headless Chromium for the browser pool...")
+        try:
+            slot = _BrowserSlot(self.headless, self.user_agent)
+        except Exception:
+            self._increment("launch_failures")
+            raise
+        with self._lock:
+            self._slots.add(slot)
+            self._stats["launches"] += 1
+        return slot
+
+    def _retire(self, slot: _BrowserSlot, reason: str):
+        logging.info(f"Closing pooled browser after {slot.pages_served} pages ({reason}).")
+        slot.close()
+        with self._lock:
+            self._slots.discard(slot)
+            if reason != "pool shutdown":
+                self._stats["recycles"] += 1
+
+    def _recycle_reason(self, slot: _BrowserSlot) -> str | None:
+        """Returns why the slot should be recycled, or None if it can keep serving pages."""
+        if not slot.is_alive():
+            return "browser disconnected"
+        if self.max_pages_per_browser and slot.pages_served >= self.max_pages_per_browser:
+            return f"page limit {self.max_pages_per_browser} reached"
+        if self.max_rss_mb:
+            rss_mb = get_process_tree_rss_mb()
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                return f"RSS {rss_mb:.0f} MB above {self.max_rss_mb:.0f} MB"
+        return None
+
+    def _owner_loop(self):
+        # Every Playwright object below is created, used and closed on this thread only
+        slot = None
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            fn, future = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                reason = self._recycle_reason(slot) if slot is not None else None
+                if reason is not None:
+                    self._retire(slot, reason)
+                    slot = None
+                if slot is None:
+                    slot = self._launch()
+                else:
+                    self._increment("hits")
+                self._increment("leases")
+                page = slot.context.new_page()
+                try:
+                    result = fn(page)
+                finally:
+                    slot.pages_served += 1
+                    try:
+                        page.close()
+                    except Exception as e:
+                        logging.debug(f"Ignoring error while closing leased page: {e}")
+                future.set_result(result)
+            except BaseException as e:
+                if slot is not None and not slot.is_alive():
+                    self._retire(slot, "browser disconnected")
+                    slot = None
+                future.set_exception(e)
+        if slot is not None:
+            self._retire(slot, "pool shutdown")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool has been shut down.")
+            while len(self._threads) < self.size:
+                thread = threading.Thread(target=self._owner_loop, name=f"browser-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn) -> Future:
+        """Queues fn(page) to run with a fresh page on a free owner thread and returns its future."""
+        self._ensure_started()
+        future = Future()
+        self._tasks.put((fn, future))
+        return future
+
+    def run(self, fn, timeout: float | None = None):
+        """Runs fn(page) with a fresh page on a free owner thread and returns its result (or raises its error)."""
+        return self.submit(fn).result(timeout)
+
+    def warm_up(self, timeout: float = 60.0):
+        """Launches the browser of every owner thread (one task per thread, held at a barrier)."""
+        barrier = threading.Barrier(self.size)
+
+        def wait_for_others(page):
+            try:
+                barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                logging.warning("Not every browser thread was free for the warm-up.")
+
+        for future in [self.submit(wait_for_others) for _ in range(self.size)]:
+            future.result(timeout)
+
+    def stats(self) -> dict:
+        """Returns a snapshot of pool counters so callers can check browsers are being reused."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["active_browsers"] = len(self._slots)
+        snapshot["size"] = self.size
+        snapshot["queued_tasks"] = self._tasks.qsize()
+        snapshot["max_pages_per_browser"] = self.max_pages_per_browser
+        snapshot["max_rss_mb"] = self.max_rss_mb
+        return snapshot
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stops the owner threads once their queued tasks are done; each closes its own browser."""
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._tasks.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Returns the process-wide browser pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def _collect_browser_metrics() -> list:
+    """Exposes the pool counters on /metrics without creating a pool just to report on it."""
+    if _pool is None:
+        return []
+    stats = _pool.stats()
+    return [
+        ("browser_launches_total", "counter", "Headless browsers launched by the pool.", [({}, stats["launches"])]),
+        ("browser_launch_failures_total", "counter", "Browser launches that failed.", [({}, stats["launch_failures"])]),
+        ("browser_recycles_total", "counter", "Pooled browsers recycled (page limit, RSS limit or disconnect).", [({}, stats["recycles"])]),
+        ("browser_page_leases_total", "counter", "Pages leased from the pool.", [({}, stats["leases"])]),
+        ("browser_active", "gauge", "Browsers currently open in the pool.", [({}, stats["active_browsers"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_browser_metrics)
+
+
+# Example usage (for testing purposes)
+if __name__ == '__main__':
+    def read_greeting(page):
+        page.set_content("<html><body><p>Hello from the pool</p></body></html>")
+        return page.text_content("p")
+
+    pool = get_browser_pool()
+    for _ in range(3):
+        print(pool.run(read_greeting))
+    print(pool.stats())
+    pool.shutdown()
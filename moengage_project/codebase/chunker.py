@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Heading-aware chunking of long articles and merging of per-chunk analysis results.
+
+Normalized article text is split into heading-delimited sections, which are packed
+into chunks under a token budget. Each analyzer can then run per chunk in parallel,
+and `merge_analysis_results` folds the per-chunk results back into the single-result
+schema the reporter expects.
+"""
+import logging
+import math
+import os
+import re
+
+from reporter import SCORE_MAP, INV_SCORE_MAP
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Articles estimated above this many tokens are analyzed in chunks (0 disables chunking)
+DEFAULT_CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "4000"))
+# Rough characters-per-token ratio for English prose
+CHARS_PER_TOKEN = 4
+
+MAX_HEADING_CHARS = 80
+MAX_HEADING_WORDS = 12
+MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+COUNT_KEYS = ["h1", "h2", "h3", "paragraphs", "lists"]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer dependency)."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def is_heading_line(line: str, previous_line: str | None) -> bool:
+    """Heuristically decides whether a line of flattened article text is a heading.
+
+    Markdown '#' headings always count. Otherwise a heading is a short line with no
+    terminal punctuation that starts a block (first line or after a blank line).
+    """
+    stripped = line.strip()
+    if not stripped:
+        return False
+    if MARKDOWN_HEADING_RE.match(stripped):
+        return True
+    if previous_line is not None and previous_line.strip():
+        return False
+    if len(stripped) > MAX_HEADING_CHARS or len(stripped.split()) > MAX_HEADING_WORDS:
+        return False
+    if stripped[-1] in ".,;:!?)" or stripped.startswith(("*", "-", "+", "|")) or re.match(r"^\d+[.)]\s", stripped):
+        return False
+    return stripped[0].isupper() or stripped[0].isdigit()
+
+
+def split_sections(text: str) -> list[dict]:
+    """Splits text into heading-delimited sections: [{"heading": str | None, "text": str}, ...]."""
+    sections = []
+    current_heading = None
+    current_lines = []
+    has_body = False
+    previous = None
+    for line in (text or "").split("\n"):
+        if is_heading_line(line, previous):
+            # A heading closes the previous section once that section has body text
+            if has_body:
+                sections.append({"heading": current_heading, "text": "\n".join(current_lines).strip()})
+                current_lines = []
+                has_body = False
+            current_heading = line.strip().lstrip("#").strip()
+        elif line.strip():
+            has_body = True
+        current_lines.append(line)
+        previous = line
+    if any(l.strip() for l in current_lines):
+        sections.append({"heading": current_heading, "text": "\n".join(current_lines).strip()})
+    return sections
+
+
+def _split_oversized(text: str, token_budget: int) -> list[str]:
+    """Splits one oversized section on paragraph, then line, then hard character boundaries."""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    pieces = []
+    for separator in ("\n\n", "\n"):
+        parts = text.split(separator)
+        if len(parts) > 1:
+            current = ""
+            for part in parts:
+                candidate = f"{current}{separator}{part}" if current else part
+                if len(candidate) <= max_chars:
+                    current = candidate
+                    continue
+                if current:
+                    pieces.append(current)
+                current = part
+            if current:
+                pieces.append(current)
+            # Recurse on anything still too big using the finer separator / hard split
+            result = []
+            for piece in pieces:
+                result.extend(_split_oversized(piece, token_budget) if len(piece) > max_chars else [piece])
+            return result
+    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def chunk_article(text: str, token_budget: int | None = None) -> list[str]:
+    """Packs heading-delimited sections into chunks of at most token_budget (estimated) tokens."""
+    budget = DEFAULT_CHUNK_TOKEN_BUDGET if token_budget is None else token_budget
+    if not text or budget <= 0 or estimate_tokens(text) <= budget:
+        return [text] if text else []
+
+    chunks = []
+    current = ""
+    for section in split_sections(text):
+        section_text = section["text"]
+        if estimate_tokens(section_text) > budget:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split_oversized(section_text, budget))
+            continue
+        candidate = f"{current}\n\n{section_text}" if current else section_text
+        if estimate_tokens(candidate) <= budget:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = section_text
+    if current:
+        chunks.append(current)
+    logging.info(f"Split article (~{estimate_tokens(text)} tokens) into {len(chunks)} chunks under a {budget}-token budget.")
+    return chunks
+
+
+def _dedupe_strings(values) -> list:
+    """Deduplicates strings case- and whitespace-insensitively, keeping first-seen order."""
+    seen = set()
+    result = []
+    for value in values:
+        key = " ".join(str(value).lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            result.append(value)
+    return result
+
+
+def _merge_text(values) -> str:
+    texts = _dedupe_strings(v for v in values if isinstance(v, str) and v.strip() and v != "N/A")
+    return " ".join(texts) if texts else "N/A"
+
+
+def _merge_score(results: list[dict]) -> str:
+    """Averages per-chunk scores like the reporter; Error only if every chunk errored."""
+    scores = [SCORE_MAP[r["score"]] for r in results if r.get("score") in SCORE_MAP and r.get("score") != "Error"]
+    if not scores:
+        return "Error"
+    return INV_SCORE_MAP.get(round(sum(scores) / len(scores)), "Fair")
+
+
+def merge_analysis_results(results: list[dict | None]) -> dict | None:
+    """Merges per-chunk results of one analyzer into a single result with the same schema.
+
+    Scores are averaged, issues and suggestions are concatenated and deduplicated,
+    structure counts are summed and free-text sub-assessments are joined.
+    """
+    results = [r for r in results if isinstance(r, dict)]
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+
+    valid = [r for r in results if r.get("score") != "Error"] or results
+    merged = {
+        "score": _merge_score(results),
+        "assessment": _merge_text(r.get("assessment") for r in valid),
+        "issues": _dedupe_strings(i for r in results for i in (r.get("issues") or []) if isinstance(r.get("issues"), list)),
+        "suggestions": _dedupe_strings(s for r in results for s in (r.get("suggestions") or []) if isinstance(r.get("suggestions"), list)),
+    }
+
+    if any(isinstance(r.get("counts"), dict) for r in results):
+        merged["counts"] = {}
+        for key in COUNT_KEYS:
+            total = 0
+            for r in valid:
+                try:
+                    total += int((r.get("counts") or {}).get(key, 0))
+                except (TypeError, ValueError):
+                    continue
+            merged["counts"][key] = total
+
+    for nested_key in ("analysis", "flow_navigation"):
+        nested = [r.get(nested_key) for r in valid if isinstance(r.get(nested_key), dict)]
+        if nested:
+            keys = list(dict.fromkeys(k for d in nested for k in d))
+            merged[nested_key] = {k: _merge_text(d.get(k) for d in nested) for k in keys}
+
+    # Keep any extra keys (e.g. local metrics) from the first result that has them
+    for r in results:
+        for key, value in r.items():
+            merged.setdefault(key, value)
+    return merged
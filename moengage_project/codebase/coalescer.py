@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Single-flight coalescing of identical analysis requests.
+
+When the same article is submitted by many people at once, only the first request (the
+leader) runs the pipeline; requests with the same key that arrive while it runs wait for
+it and receive its result. Successful results are then kept for a short TTL, so requests
+arriving just after the leader finished are answered from memory as well.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_RESULT_TTL_SECONDS = float(os.getenv("COALESCE_RESULT_TTL_SECONDS", "120"))
+DEFAULT_MAX_RESULTS = int(os.getenv("COALESCE_MAX_RESULTS", "100"))
+
+COALESCED_REQUESTS = REGISTRY.counter("coalesced_requests_total", "Coalesced requests by outcome (leader, joined, cached).")
+FLIGHTS_IN_PROGRESS = REGISTRY.gauge("coalesced_flights_in_progress", "Distinct keys currently being computed by a leader.")
+
+
+class _Flight:
+    """One in-progress computation that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and briefly caches successful results."""
+
+    def __init__(self, result_ttl_seconds: float = DEFAULT_RESULT_TTL_SECONDS, max_results: int = DEFAULT_MAX_RESULTS,
+                 cacheable=None):
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_results = max_results
+        # Decides whether a finished value may be served to later requests (e.g. only successes)
+        self._cacheable = cacheable or (lambda value: True)
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._results = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._stats = {"leader": 0, "joined": 0, "cached": 0}
+
+    def _cached_locked(self, key):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return entry
+
+    def _record(self, outcome: str):
+        self._stats[outcome] += 1
+        COALESCED_REQUESTS.inc(outcome=outcome)
+
+    def run(self, key, fn, use_cache: bool = True) -> tuple[object, str]:
+        """Returns (fn's result, outcome) where outcome is "leader", "joined" or "cached".
+
+        Concurrent calls with the same key share one call of fn; if it raises, every waiting
+        caller gets the exception. With use_cache False, no finished result is served or stored
+        for this call (an in-flight one is still joined).
+        """
+        with self._lock:
+            entry = self._cached_locked(key) if use_cache and self.result_ttl_seconds > 0 else None
+            if entry is not None:
+                self._record("cached")
+                return entry[1], "cached"
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                FLIGHTS_IN_PROGRESS.inc()
+                self._record("leader")
+            else:
+                flight.followers += 1
+                self._record("joined")
+
+        if not leader:
+            logging.info(f"Joining the in-flight request for {key}.")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, "joined"
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                FLIGHTS_IN_PROGRESS.dec()
+                if flight.error is None and use_cache and self.result_ttl_seconds > 0 and self._cacheable(flight.value):
+                    self._results[key] = (time.monotonic() + self.result_ttl_seconds, flight.value)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+            flight.done.set()
+            if flight.followers:
+                logging.info(f"Shared the result for {key} with {flight.followers} coalesced request(s).")
+        return flight.value, "leader"
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({"in_flight": len(self._flights), "cached_results": len(self._results),
+                             "result_ttl_seconds": self.result_ttl_seconds})
+        return snapshot
+
+
+# Example usage: eight concurrent calls for the same key run the slow function once
+if __name__ == '__main__':
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+
+    def slow_analysis():
+        calls.append(1)
+        time.sleep(0.5)
+        return {"overall_score": "Good"}
+
+    flight = SingleFlight(result_ttl_seconds=5)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outcomes = list(executor.map(lambda _: flight.run("https://help.moengage.com/a/1", slow_analysis)[1], range(8)))
+    print(f"Outcomes: {outcomes}; function ran {len(calls)} time(s)")
+    print(f"Just after: {flight.run('https://help.moengage.com/a/1', slow_analysis)[1]}; stats: {flight.stats()}")
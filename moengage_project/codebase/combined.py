@@ -0,0 +1,102 @@
+from llm_analyzer import analyze_text_with_llm, json_reply_validator
+import logging
+import json
+
+from readability import READABILITY_PROMPT, validate_readability_data
+from structure import STRUCTURE_FLOW_PROMPT, validate_structure_data
+from completeness import COMPLETENESS_EXAMPLES_PROMPT, validate_completeness_data
+from style import STYLE_GUIDELINES_PROMPT, validate_style_data
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Report key -> (JSON key in the combined response, per-analyzer prompt, per-analyzer validator)
+COMBINED_SECTIONS = {
+    "Readability": ("readability", READABILITY_PROMPT, validate_readability_data),
+    "Structure": ("structure", STRUCTURE_FLOW_PROMPT, validate_structure_data),
+    "Completeness": ("completeness", COMPLETENESS_EXAMPLES_PROMPT, validate_completeness_data),
+    "Style": ("style_guidelines", STYLE_GUIDELINES_PROMPT, validate_style_data),
+}
+
+def _section_instructions(prompt: str) -> str:
+    """Strips the trailing 'Analyze the following text:' line so the prompt can be embedded as a section."""
+    return prompt.strip().rsplit("Analyze the following text:", 1)[0].strip()
+
+def build_combined_prompt() -> str:
+    """Builds one prompt that asks for all four analyses, reusing each module's own instructions verbatim."""
+    keys = [json_key for json_key, _, _ in COMBINED_SECTIONS.values()]
+    prompt = (
+        "You will perform four independent analyses of the same documentation article in a single pass.\n"
+        "Each section below describes one analysis and the exact JSON object it must produce.\n\n"
+        "**Combined Output Requirements:**\n"
+        "Return *only* one JSON object (no surrounding text or markdown formatting) with exactly these top-level keys: "
+        + ", ".join(f'"{k}"' for k in keys)
+        + ". The value of each key must be the JSON object described in the matching section.\n"
+    )
+    for json_key, section_prompt, _ in COMBINED_SECTIONS.values():
+        prompt += f"\n=== Section \"{json_key}\" ===\n{_section_instructions(section_prompt)}\n"
+    prompt += "\nAnalyze the following text:\n"
+    return prompt
+
+COMBINED_ANALYSIS_PROMPT = build_combined_prompt()
+
+def validate_combined_data(combined_data) -> dict:
+    """Checks that a parsed combined response holds a valid result for every section, raising ValueError otherwise."""
+    if not isinstance(combined_data, dict):
+        raise ValueError("Combined LLM response is not a JSON object.")
+    for json_key, _, validator in COMBINED_SECTIONS.values():
+        validator(combined_data.get(json_key))
+    return combined_data
+
+def analyze_combined(article_content: str) -> dict:
+    """Runs all four analyses in one LLM call.
+
+    Returns a dict keyed like `analysis_results` ("Readability", "Structure", ...). Sections that
+    were missing or failed their module's validation are set to None so the caller can fall back
+    to the individual analyzer for just those sections.
+    """
+    logging.info("Starting combined analysis (all four sections in one request)...")
+    results = {name: None for name in COMBINED_SECTIONS}
+    analysis_text = analyze_text_with_llm(COMBINED_ANALYSIS_PROMPT, article_content,
+                                          # A reply with invalid sections is used for the valid ones but not cached
+                                          cache_if=json_reply_validator(validate_combined_data))
+
+    if not analysis_text or analysis_text.startswith("Error:"):
+        logging.error(f"Combined analysis failed or returned error: {analysis_text}")
+        return results
+
+    try:
+        # Clean the response
+        cleaned_text = analysis_text.strip().strip("`json\n").strip("\n```")
+        combined_data = json.loads(cleaned_text)
+        if not isinstance(combined_data, dict):
+            raise ValueError("Combined LLM response is not a JSON object.")
+    except (json.JSONDecodeError, ValueError) as e:
+        logging.error(f"Failed to parse JSON response from LLM for combined analysis: {e}\nRaw response: {analysis_text}")
+        return results
+
+    for name, (json_key, _, validator) in COMBINED_SECTIONS.items():
+        try:
+            results[name] = validator(combined_data.get(json_key))
+        except ValueError as e:
+            logging.warning(f"Combined analysis section '{json_key}' failed validation: {e}")
+
+    valid = [name for name, data in results.items() if data is not None]
+    logging.info(f"Combined analysis parsed; valid sections: {valid or 'none'}.")
+    return results
+
+# Example usage (for testing purposes)
+if __name__ == '__main__':
+    from llm_analyzer import API_KEY # Check if API key is set
+    if API_KEY != "YOUR_API_KEY":
+        sample_content = """
+        # Feature X Setup
+        To use Feature X, simply enable it in your settings.
+        ## How it Works
+        Feature X automatically analyzes user data.
+        """
+        combined_analysis = analyze_combined(sample_content)
+        print("\n--- Combined Analysis (one request, four sections) ---  \n")
+        print(json.dumps(combined_analysis, indent=2))
+    else:
+        print("\nPlease set the GOOGLE_API_KEY environment variable to run the example.")
@@ -1,4 +1,4 @@
-from llm_analyzer import analyze_text_with_llm
+from llm_analyzer import analyze_text_with_llm, json_reply_validator
 import logging
 import json
 
@@ -40,10 +40,22 @@ Provide your analysis *only* as a JSON object (no surrounding text or markdown f
 Analyze the following text:
 """
 
+def validate_completeness_data(analysis_data) -> dict:
+    """Checks a parsed completeness result against the expected schema, raising ValueError if it does not match."""
+    if not isinstance(analysis_data, dict):
+        raise ValueError("LLM response is not a JSON object.")
+    required_keys = ["score", "assessment", "issues", "suggestions"]
+    if not all(k in analysis_data for k in required_keys):
+        raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
+    if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
+        raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+    return analysis_data
+
 def analyze_completeness(article_content: str) -> dict | None:
     """Analyzes completeness and examples using the LLM and returns a structured dict."""
     logging.info("Starting completeness and examples analysis (with assessment)...")
-    analysis_text = analyze_text_with_llm(COMPLETENESS_EXAMPLES_PROMPT, article_content)
+    analysis_text = analyze_text_with_llm(COMPLETENESS_EXAMPLES_PROMPT, article_content,
+                                          cache_if=json_reply_validator(validate_completeness_data))
 
     default_error_structure = {
         "score": "Error",
@@ -62,12 +74,7 @@ def analyze_completeness(article_content: str) -> dict | None:
         cleaned_text = analysis_text.strip().strip("`json\n").strip("\n```")
         analysis_data = json.loads(cleaned_text)
 
-        # Basic validation of the new structure
-        required_keys = ["score", "assessment", "issues", "suggestions"]
-        if not all(k in analysis_data for k in required_keys):
-            raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
-        if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
-            raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+        validate_completeness_data(analysis_data)
 
         logging.info("Completeness analysis completed and parsed successfully.")
         return analysis_data
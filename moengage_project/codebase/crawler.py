@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Help-center crawler: discovers every article under a starting point and analyzes them all.
+
+The start can be a category or section page (article links are collected and section,
+category and pagination links followed, on the same host), a sitemap.xml, or a
+Zendesk-style help-center listing JSON (`/api/v2/help_center/.../articles.json`, whose
+`next_page` links are followed and whose article bodies are used directly). URLs are
+canonicalized (fragments such as `#h_...` and tracking parameters removed) and deduplicated.
+Every request goes through a per-host throttle (bounded concurrency plus a politeness delay,
+raised to the robots.txt Crawl-delay), and the articles are fed to `batch.run_batch`.
+
+Usage:
+    python crawler.py https://help.moengage.com/hc/en-us/categories/360000870771 --discover-only
+    python crawler.py https://help.example.com/api/v2/help_center/en-us/articles.json --max-articles 50
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from bs4 import BeautifulSoup
+
+from batch import run_batch, print_summary, read_sitemap_urls
+from main import DEFAULT_OUTPUT_DIR
+from scraper import fetch_article, get_http_session
+from page_cache import canonicalize_url
+from outline import extract_outline
+from text_normalizer import normalize_with_offsets
+from llm_analyzer import set_llm_concurrency
+from llm_cache import cache_options
+from metrics import dump_metrics
+from pipeline import DEFAULT_ANALYSIS_WORKERS, ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Requests in flight per host, and the minimum gap between request starts to the same host
+DEFAULT_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+DEFAULT_POLITENESS_DELAY = float(os.getenv("CRAWL_DELAY_SECONDS", "1.0"))
+# Listing pages (category/section/pagination pages or JSON pages) visited during discovery
+DEFAULT_MAX_LISTING_PAGES = int(os.getenv("CRAWL_MAX_LISTING_PAGES", "200"))
+# Zendesk-style paths; override for other help-center platforms
+DEFAULT_ARTICLE_PATTERN = r"/articles/\d+"
+DEFAULT_LISTING_PATTERN = r"/(?:sections|categories)/\d+"
+
+
+class HostThrottle:
+    """Bounds concurrent requests per host and spaces their starts by a politeness delay."""
+
+    def __init__(self, max_per_host: int = DEFAULT_PER_HOST_CONCURRENCY, delay_s: float = DEFAULT_POLITENESS_DELAY):
+        self.max_per_host = max(1, max_per_host)
+        self.delay_s = max(0.0, delay_s)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+        self._delays = {}
+
+    def set_host_delay(self, host: str, delay_s: float):
+        """Raises the delay for one host (e.g. to its robots.txt Crawl-delay)."""
+        with self._lock:
+            self._delays[host] = max(self.delay_s, delay_s)
+
+    @contextmanager
+    def slot(self, url: str):
+        """Holds one of the host's concurrency slots, waiting for its turn first."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+        semaphore.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start + self._delays.get(host, self.delay_s)
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            semaphore.release()
+
+
+class RobotsCache:
+    """Per-host robots.txt rules, fetched once through the throttle. Missing or broken files allow everything."""
+
+    def __init__(self, throttle: HostThrottle, user_agent: str = "*"):
+        self.throttle = throttle
+        self.user_agent = user_agent
+        self._lock = threading.Lock()
+        self._parsers = {}
+
+    def _parser_for(self, url: str) -> RobotFileParser | None:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        with self._lock:
+            if origin in self._parsers:
+                return self._parsers[origin]
+        parser = None
+        try:
+            with self.throttle.slot(origin):
+                response = get_http_session().get(f"{origin}/robots.txt", timeout=10)
+            if response.status_code == 200:
+                parser = RobotFileParser()
+                parser.parse(response.text.splitlines())
+                crawl_delay = parser.crawl_delay(self.user_agent)
+                if crawl_delay:
+                    self.throttle.set_host_delay(parsed.netloc.lower(), float(crawl_delay))
+        except requests.RequestException as e:
+            logging.warning(f"Could not read robots.txt for {origin}: {e}")
+        with self._lock:
+            self._parsers[origin] = parser
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        parser = self._parser_for(url)
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+
+class HelpCenterCrawler:
+    """Discovers article URLs from a start page, sitemap or listing JSON, and fetches them politely."""
+
+    def __init__(self, throttle: HostThrottle | None = None, respect_robots: bool = True,
+                 article_pattern: str = DEFAULT_ARTICLE_PATTERN, listing_pattern: str = DEFAULT_LISTING_PATTERN,
+                 max_listing_pages: int = DEFAULT_MAX_LISTING_PAGES):
+        self.throttle = throttle or HostThrottle()
+        self.robots = RobotsCache(self.throttle) if respect_robots else None
+        self.article_re = re.compile(article_pattern)
+        self.listing_re = re.compile(listing_pattern)
+        self.max_listing_pages = max_listing_pages
+        # Articles whose text came with the listing JSON, keyed by canonical URL
+        self.prefetched = {}
+
+    def _allowed(self, url: str) -> bool:
+        if self.robots is not None and not self.robots.allowed(url):
+            logging.info(f"Skipping {url} (disallowed by robots.txt).")
+            return False
+        return True
+
+    def _get(self, url: str) -> requests.Response | None:
+        if not self._allowed(url):
+            return None
+        try:
+            with self.throttle.slot(url):
+                response = get_http_session().get(url, timeout=30)
+            response.raise_for_status()
+            return response
+        except requests.RequestException as e:
+            logging.error(f"Failed to fetch listing page {url}: {e}")
+            return None
+
+    def _articles_from_json(self, start_url: str, data: dict) -> list[str]:
+        """Collects articles from a Zendesk-style listing, following `next_page` links."""
+        urls = []
+        pages = 0
+        while data is not None:
+            pages += 1
+            for item in data.get("articles") or data.get("results") or []:
+                if not isinstance(item, dict) or item.get("draft"):
+                    continue
+                url = canonicalize_url(item.get("html_url") or item.get("url") or "", start_url)
+                if not url:
+                    continue
+                urls.append(url)
+                body = item.get("body")
+                raw_text = BeautifulSoup(body, "html.parser").get_text() if body else ""
+                text, offsets = normalize_with_offsets(raw_text)
+                if text:
+                    # The listing already has the article body, so the page need not be fetched
+                    self.prefetched[url] = {"text": text, "raw_text": raw_text, "offsets": offsets,
+                                            "outline": extract_outline(body), "fetch_path": "listing"}
+            next_page = data.get("next_page")
+            if not next_page or pages >= self.max_listing_pages:
+                break
+            response = self._get(next_page)
+            try:
+                data = response.json() if response is not None else None
+            except ValueError as e:
+                logging.error(f"Listing page {next_page} is not valid JSON: {e}")
+                data = None
+        return urls
+
+    def _articles_from_html(self, start_url: str, html: str) -> list[str]:
+        """Breadth-first walk of category/section/pagination pages on the start page's host."""
+        host = urlparse(start_url).netloc
+        urls = []
+        seen_listings = {start_url}
+        queue = deque([(start_url, html)])
+        visited = 0
+        while queue:
+            page_url, page_html = queue.popleft()
+            visited += 1
+            for link in BeautifulSoup(page_html, "html.parser").find_all("a", href=True):
+                url = canonicalize_url(link["href"], page_url)
+                if not url or urlparse(url).netloc != host:
+                    continue
+                path = urlparse(url).path
+                if self.article_re.search(path):
+                    urls.append(url)
+                elif (self.listing_re.search(path) or (urlparse(url).path == urlparse(page_url).path and "page=" in url)) \
+                        and url not in seen_listings and len(seen_listings) < self.max_listing_pages:
+                    seen_listings.add(url)
+                    response = self._get(url)
+                    if response is not None:
+                        queue.append((url, response.text))
+        logging.info(f"Visited {visited} listing page(s) under {start_url}.")
+        return urls
+
+    def discover(self, start: str) -> list[str]:
+        """Returns the canonical, deduplicated article URLs reachable from start (URL or local sitemap path)."""
+        if not urlparse(start).scheme:
+            urls = read_sitemap_urls(start)
+        else:
+            start = canonicalize_url(start) or start
+            response = self._get(start)
+            if response is None:
+                return []
+            content_type = response.headers.get("Content-Type", "").lower()
+            body = response.text.lstrip()
+            if "json" in content_type or body.startswith("{"):
+                urls = self._articles_from_json(start, response.json())
+            elif "xml" in content_type or body.startswith("<?xml") or body.startswith("<urlset") or body.startswith("<sitemapindex"):
+                urls = read_sitemap_urls(start, xml_content=response.content)
+            else:
+                urls = self._articles_from_html(start, response.text)
+
+        canonical = [canonicalize_url(url) for url in urls]
+        # Sitemaps list sections and categories too; keep only articles when the pattern finds any
+        articles = [url for url in canonical if url and self.article_re.search(urlparse(url).path)]
+        return [url for url in dict.fromkeys(articles or [url for url in canonical if url]) if self._allowed(url)]
+
+    def fetch(self, url: str) -> dict | None:
+        """`scraper.fetch_article` behind robots.txt; listing bodies are reused.
+
+        Only the requests to the site take a per-host throttle slot: page-cache hits are served
+        without waiting, and a browser fallback holds the slot for its navigation, not the whole render.
+        """
+        article = self.prefetched.pop(url, None)
+        if article is not None:
+            return article
+        if not self._allowed(url):
+            return None
+        return fetch_article(url, request_slot=self.throttle.slot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discover and analyze every article in a help center (or one category/section of it).")
+    parser.add_argument("start", help="Category/section page URL, sitemap.xml (URL or path), or help-center listing JSON URL")
+    parser.add_argument("-o", "--output", help="Directory to save the reports (default: adjacent 'output' folder)", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--discover-only", action="store_true", help="Print the discovered article URLs and exit")
+    parser.add_argument("--max-articles", type=int, default=0, help="Analyze at most this many articles (default: all)")
+    parser.add_argument("--max-listing-pages", type=int, default=DEFAULT_MAX_LISTING_PAGES, help="Listing pages visited during discovery")
+    parser.add_argument("--per-host-concurrency", type=int, default=DEFAULT_PER_HOST_CONCURRENCY, help="Requests in flight per host (default: 2)")
+    parser.add_argument("--delay", type=float, default=DEFAULT_POLITENESS_DELAY, help="Seconds between request starts to one host (default: 1.0)")
+    parser.add_argument("--ignore-robots", action="store_true", help="Do not read or obey robots.txt")
+    parser.add_argument("--article-pattern", default=DEFAULT_ARTICLE_PATTERN, help="Regex matching article URL paths")
+    parser.add_argument("--listing-pattern", default=DEFAULT_LISTING_PATTERN, help="Regex matching category/section URL paths to follow")
+    parser.add_argument("--article-concurrency", type=int, default=4, help="Number of articles analyzed/revised at once (default: 4)")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="Ceiling for the adaptive limit on LLM requests in flight (default: 8)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_ANALYSIS_WORKERS, help="Concurrent analyses per article")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default=DEFAULT_ANALYSIS_MODE, help="Analysis mode (see main.py)")
+    parser.add_argument("--incremental", action="store_true", help="Re-analyze only sections changed since the previous run")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response and page caches")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached LLM responses and pages but store the fresh ones")
+    parser.add_argument("--summary-json", help="Also write the run summary (with the discovered URLs) as JSON to this path")
+    parser.add_argument("--metrics-out", help="Write Prometheus-format metrics to this file ('-' for stdout) when done")
+    args = parser.parse_args()
+
+    crawler = HelpCenterCrawler(HostThrottle(args.per_host_concurrency, args.delay), respect_robots=not args.ignore_robots,
+                                article_pattern=args.article_pattern, listing_pattern=args.listing_pattern,
+                                max_listing_pages=args.max_listing_pages)
+    try:
+        urls = crawler.discover(args.start)
+    except (requests.RequestException, OSError, ET.ParseError, ValueError) as e:
+        logging.error(f"Failed to discover articles from {args.start}: {e}")
+        sys.exit(1)
+    if args.max_articles:
+        urls = urls[:args.max_articles]
+    logging.info(f"Discovered {len(urls)} article(s) from {args.start} ({len(crawler.prefetched)} with text from the listing).")
+    if args.discover_only:
+        for url in urls:
+            print(url)
+        return
+    if not urls:
+        logging.error("No articles found.")
+        sys.exit(1)
+
+    try:
+        os.makedirs(args.output, exist_ok=True)
+    except OSError as e:
+        logging.error(f"Error creating output directory {args.output}: {e}")
+        sys.exit(1)
+
+    set_llm_concurrency(args.llm_concurrency)
+    # Fetching is bounded per host by the throttle, so the fetch pool only needs one thread per slot
+    with cache_options(bypass=args.no_cache, refresh=args.refresh_cache):
+        summary = run_batch(urls, args.output, fetch_concurrency=max(1, args.per_host_concurrency),
+                            article_concurrency=max(1, args.article_concurrency), workers=args.workers, mode=args.mode,
+                            incremental=args.incremental, fetcher=crawler.fetch)
+    summary["start"] = args.start
+    summary["discovered_urls"] = urls
+
+    print_summary(summary)
+    if args.summary_json:
+        try:
+            with open(args.summary_json, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            logging.info(f"Crawl summary saved to: {args.summary_json}")
+        except IOError as e:
+            logging.error(f"Error saving crawl summary {args.summary_json}: {e}")
+    if args.metrics_out:
+        dump_metrics(args.metrics_out)
+    sys.exit(0 if summary["failed"] == 0 else 2)
+
+
+if __name__ == "__main__":
+    main()
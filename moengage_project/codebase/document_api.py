@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Library API for the analyzer: analyze a document and revise it, entirely in memory.
+
+    result = analyze_document("https://help.moengage.com/hc/en-us/articles/...")
+    result = analyze_document(text=article_text)
+    revised = revise(result.text, result)
+
+`analyze_document` returns an `AnalysisResult` holding the article text, outline, raw analyzer
+results and the report, and `revise` returns the revised text. Nothing touches the disk unless
+a sink is passed: `DiskSink(output_dir)` writes the same `_analysis.md`, `_analysis.json` and
+`_revised.txt` files `main.py` always has.
+"""
+import json
+import logging
+import os
+import time
+from urllib.parse import urlparse
+
+from scraper import fetch_article
+from pipeline import run_analyses
+from incremental import run_incremental_analyses
+from reporter import build_report_data, generate_markdown_report
+from revision_agent import revise_entire_article
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_BASE_NAME = "analysis_report"
+
+
+def record_stage(timings: dict | None, stage: str, started: float):
+    """Adds the seconds elapsed since `started` to timings[stage] when a timings dict is given."""
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - started)
+
+
+class AnalysisResult:
+    """One analyzed document: its text and outline, the analyzer results and the report built from them."""
+
+    def __init__(self, url: str | None, text: str, outline: dict | None, results: dict,
+                 sections: list[dict] | None = None, fetch_path: str | None = None, raw_text: str | None = None,
+                 offsets=None):
+        self.url = url
+        self.text = text
+        self.outline = outline
+        # Raw analyzer results keyed by analysis name ("Readability", "Structure", ...)
+        self.results = results
+        # Per-section "fresh"/"reused" status from incremental analysis
+        self.sections = sections
+        self.fetch_path = fetch_path
+        # The text as scraped and the OffsetMap from positions in `text` to it (fetched articles only),
+        # e.g. to point a quoted issue at its place in the page: offsets.locate(text, quote)
+        self.raw_text = raw_text
+        self.offsets = offsets
+        self.report = build_report_data(url or "", results, sections=sections)
+
+    @property
+    def analysis(self) -> dict:
+        """The report's "analysis" section (readability, structure, completeness, style_guidelines)."""
+        return self.report["analysis"]
+
+    @property
+    def overall_score(self) -> str:
+        return self.report["overall_score"]
+
+    def to_json(self) -> str:
+        return json.dumps(self.report, indent=2)
+
+    def to_markdown(self) -> str:
+        return generate_markdown_report(self.url or "", self.results, sections=self.sections)
+
+
+class DiskSink:
+    """Writes reports and revisions into output_dir, named after the last segment of the URL path."""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+
+    @staticmethod
+    def base_name(url: str | None) -> str:
+        path_parts = [part for part in urlparse(url or "").path.split("/") if part]
+        base_filename = path_parts[-1] if path_parts else DEFAULT_BASE_NAME
+        return "".join(c if c.isalnum() or c in (".", "-", "_") else "_" for c in base_filename)
+
+    def path_for(self, url: str | None, suffix: str) -> str:
+        return os.path.join(self.output_dir, f"{self.base_name(url)}{suffix}")
+
+    def _write(self, path: str, content: str, label: str) -> bool:
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            logging.info(f"{label} saved successfully to: {path}")
+            return True
+        except (IOError, OSError) as e:
+            logging.error(f"Error saving {label} file {path}: {e}")
+            return False
+
+    def write_analysis(self, result: AnalysisResult) -> bool:
+        """Writes the Markdown and JSON reports; returns True if the JSON report was saved."""
+        self._write(self.path_for(result.url, "_analysis.md"), result.to_markdown(), "Markdown analysis report")
+        try:
+            json_report = result.to_json()
+        except TypeError as e:
+            logging.error(f"Error serializing report data to JSON for {result.url}: {e}")
+            return False
+        return self._write(self.path_for(result.url, "_analysis.json"), json_report, "JSON analysis report")
+
+    def write_revision(self, url: str | None, revised_text: str) -> bool:
+        return self._write(self.path_for(url, "_revised.txt"), revised_text, "Revised article")
+
+
+def analyze_document(url: str | None = None, *, text: str | None = None, outline: dict | None = None,
+                     workers: int | None = None, mode: str | None = None, chunk_token_budget: int | None = None,
+                     section_state_path: str | None = None, sink: DiskSink | None = None,
+                     timings: dict | None = None) -> AnalysisResult | None:
+    """Analyzes an article given by URL (fetched) or by its text, returning None if it could not be fetched.
+
+    Pass both `url` and `text` to analyze text already fetched from url (with its `outline`, if known).
+    With `section_state_path`, only sections changed since the state stored there are re-analyzed.
+    When a `sink` is given the reports are also written to it; `timings` receives the seconds spent
+    in the fetch/analyze/report stages.
+    """
+    if url is None and text is None:
+        raise ValueError("analyze_document needs a url or the article text.")
+    fetch_path = raw_text = offsets = None
+    if text is None:
+        logging.info(f"Fetching content for URL: {url}")
+        stage_start = time.perf_counter()
+        article = fetch_article(url)
+        record_stage(timings, "fetch", stage_start)
+        if not article or not article["text"]:
+            logging.error(f"Failed to fetch article content from {url}.")
+            return None
+        text, outline, fetch_path = article["text"], article["outline"], article["fetch_path"]
+        raw_text, offsets = article.get("raw_text"), article.get("offsets")
+        logging.info(f"Fetched {url} via the {fetch_path} path.")
+
+    logging.info("Starting analysis...")
+    stage_start = time.perf_counter()
+    sections = None
+    if section_state_path:
+        results, sections = run_incremental_analyses(text, section_state_path, max_workers=workers, mode=mode,
+                                                     chunk_token_budget=chunk_token_budget, outline=outline)
+    else:
+        results = run_analyses(text, max_workers=workers, mode=mode, chunk_token_budget=chunk_token_budget, outline=outline)
+    record_stage(timings, "analyze", stage_start)
+
+    stage_start = time.perf_counter()
+    result = AnalysisResult(url, text, outline, results, sections=sections, fetch_path=fetch_path,
+                            raw_text=raw_text, offsets=offsets)
+    if sink is not None:
+        sink.write_analysis(result)
+    record_stage(timings, "report", stage_start)
+    return result
+
+
+def revise(text: str, analysis: AnalysisResult | dict, sink: DiskSink | None = None, url: str | None = None) -> str | None:
+    """Revises article text from an analysis (an AnalysisResult or a report's "analysis" dict).
+
+    Returns the revised text, or None if the revision failed. With a `sink` the revision is also
+    written to it, named after `url` (or the AnalysisResult's URL).
+    """
+    if isinstance(analysis, AnalysisResult):
+        url = url or analysis.url
+        analysis = analysis.analysis
+    revised_text = revise_entire_article(text, analysis)
+    if revised_text and sink is not None:
+        sink.write_revision(url, revised_text)
+    return revised_text
+
+
+# Example usage: analyze a short text in memory and revise it
+if __name__ == '__main__':
+    sample_text = (
+        "Getting started\n\nTo send your first campaign, log in to the dashboard and click Create Campaign. "
+        "Choose a channel, pick a segment, and write your message. Then schedule it and click Publish."
+    )
+    result = analyze_document(text=sample_text)
+    print(f"Overall score: {result.overall_score}")
+    print(result.to_markdown()[:500])
+    revised = revise(result.text, result)
+    print(revised[:500] if revised else "Revision failed.")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Local HTTP stand-in for the LLM, for offline benchmarks and load tests.
+
+Serves POST /generate in the format `llm_backends.HTTPBackend` expects, answering with
+the same schema-valid canned JSON as the in-process fake backend after a simulated
+latency, and failing a configurable share of requests with 429 (with Retry-After) or 500.
+
+Usage:
+    python fake_llm_server.py --port 8765 --latency-ms 300 --error-rate 0.05
+    LLM_BACKEND=http LLM_HTTP_BACKEND_URL=http://127.0.0.1:8765 python main.py <url>
+"""
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_backends import (FakeBackend, LLMBackendError, canned_response, FAKE_LLM_LATENCY_MS,
+                          FAKE_LLM_LATENCY_JITTER_MS, FAKE_LLM_ERROR_RATE, FAKE_LLM_THROTTLE_RATE, FAKE_LLM_SEED)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+STREAM_CHUNK_CHARS = 200
+
+
+def make_handler(backend: FakeBackend):
+    """Builds a request handler class bound to one fake backend (shared latency/error settings)."""
+
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "healthy"})
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                prompt = request["prompt"]
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {"error": f"Invalid request: {e}"})
+                return
+
+            try:
+                backend.simulate_call()
+            except LLMBackendError as e:
+                headers = {"Retry-After": f"{e.retry_after:g}"} if e.retry_after is not None else None
+                self._send_json(e.code, {"error": str(e)}, headers)
+                return
+
+            text = canned_response(prompt)
+            if not request.get("stream"):
+                self._send_json(200, {"text": text, "total_tokens": (len(prompt) + len(text)) // 4})
+                return
+
+            # Newline-delimited JSON chunks over a chunked response
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(text), STREAM_CHUNK_CHARS):
+                line = (json.dumps({"text": text[i:i + STREAM_CHUNK_CHARS]}) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            logging.debug("fake-llm: " + format % args)
+
+    return FakeLLMHandler
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8765, backend: FakeBackend | None = None) -> ThreadingHTTPServer:
+    """Creates (but does not start) the stand-in server; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), make_handler(backend or FakeBackend()))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake LLM server for offline benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=FAKE_LLM_LATENCY_MS, help="Mean simulated latency per request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=FAKE_LLM_LATENCY_JITTER_MS, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=FAKE_LLM_ERROR_RATE, help="Share of requests failing with 500")
+    parser.add_argument("--throttle-rate", type=float, default=FAKE_LLM_THROTTLE_RATE, help="Share of requests failing with 429")
+    parser.add_argument("--seed", type=int, default=FAKE_LLM_SEED, help="Seed for latency and failure sampling")
+    args = parser.parse_args()
+
+    backend = FakeBackend(latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms,
+                          error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=args.seed)
+    server = create_server(args.host, args.port, backend)
+    logging.info(f"Fake LLM server listening on http://{args.host}:{server.server_port} "
+                 f"(latency {args.latency_ms:g}ms, errors {args.error_rate:.0%}, throttling {args.throttle_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
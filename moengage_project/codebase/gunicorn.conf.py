@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn settings for the web app; every start command runs `gunicorn -c gunicorn.conf.py app:app`
+from this directory. Set GUNICORN_THREADS (not --threads) to change the thread count: admission.py
+reads the same variable.
+
+Jobs live in the worker's memory (see jobs.py), so the default is one worker with threads.
+Each worker warms up right after it is forked (LLM client, caches, HTTP session, and one browser
+in each of the browser pool's BROWSER_POOL_SIZE owner threads) and reports ready on /health/ready once done; point the load balancer's
+readiness probe there and its liveness probe at /health/live.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+worker_class = "gthread"
+# admission.py sizes its wait queue from the same variable so some threads stay free for health checks
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# Analyses with a revision can take minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+# Import the app once in the master. Browsers, the LLM client and SQLite connections are all
+# created lazily, so nothing that must not cross a fork exists before post_fork runs.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() not in ("0", "false", "no")
+
+
+def post_fork(server, worker):
+    # Imported here so a non-preloaded worker loads the app in its own process
+    from app import start_worker_warm_up
+
+    if start_worker_warm_up():
+        server.log.info(f"Worker {worker.pid} warming up in the background.")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Incremental re-analysis of articles that were analyzed before.
+
+The article is split into heading-delimited sections and each section's text is
+fingerprinted. The fingerprints and per-section analysis results are stored in a
+`<name>_sections.json` file next to the `_analysis.json` report. On the next run only
+sections whose fingerprint is new are sent to the analyzers; stored results are
+reused for the rest, and every section is marked "fresh" or "reused".
+"""
+import hashlib
+import json
+import logging
+import os
+
+from chunker import split_sections, chunk_article
+from llm_cache import normalize_for_key
+from pipeline import ANALYZERS, analyze_chunks, merge_chunk_results, attach_readability_metrics, attach_outline_counts
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+SECTION_STATE_VERSION = 1
+SECTION_STATE_SUFFIX = "_sections.json"
+
+
+def section_fingerprint(section: dict) -> str:
+    """Hashes a section's whitespace-normalized text (which includes its heading line)."""
+    return hashlib.sha256(normalize_for_key(section["text"]).encode("utf-8")).hexdigest()
+
+
+def load_section_state(path: str) -> dict | None:
+    """Reads a stored section state file, returning None if it is missing, unreadable or outdated."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (IOError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable section state {path}: {e}")
+        return None
+    if not isinstance(state, dict) or state.get("version") != SECTION_STATE_VERSION:
+        logging.warning(f"Ignoring section state {path} written by an incompatible version.")
+        return None
+    return state
+
+
+def save_section_state(path: str, state: dict) -> bool:
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        logging.info(f"Section fingerprints saved to: {path}")
+        return True
+    except IOError as e:
+        logging.error(f"Error saving section state {path}: {e}")
+        return False
+
+
+def _is_reusable(results) -> bool:
+    """Stored results are reused only if every analyzer produced a non-error result."""
+    return isinstance(results, dict) and all(
+        isinstance(results.get(name), dict) and results[name].get("score") != "Error" for name in ANALYZERS
+    )
+
+
+def _stored_results_by_fingerprint(state: dict | None) -> dict:
+    stored = {}
+    for entry in (state or {}).get("sections", []):
+        if isinstance(entry, dict) and entry.get("fingerprint") and _is_reusable(entry.get("results")):
+            stored.setdefault(entry["fingerprint"], entry["results"])
+    return stored
+
+
+def run_incremental_analyses(article_content: str, state_path: str, max_workers: int | None = None,
+                             mode: str | None = None, chunk_token_budget: int | None = None,
+                             outline: dict | None = None) -> tuple[dict, list[dict]]:
+    """Analyzes only the sections that changed since the state at state_path was written.
+
+    Returns (analysis_results, sections) where sections lists each section's heading,
+    fingerprint and status ("fresh" or "reused"). The state file is rewritten with the
+    current sections and their results. With the page `outline`, structure counts are exact.
+    """
+    sections = split_sections(article_content)
+    stored = _stored_results_by_fingerprint(load_section_state(state_path))
+
+    # Changed sections (split further if one exceeds the chunk budget) are analyzed together
+    fingerprints = [section_fingerprint(section) for section in sections]
+    changed = list(dict.fromkeys(fp for fp in fingerprints if fp not in stored))
+    changed_text = {fp: section["text"] for fp, section in zip(fingerprints, sections)}
+    pieces = [(fp, piece) for fp in changed for piece in chunk_article(changed_text[fp], chunk_token_budget)]
+    logging.info(f"Incremental analysis: {len(sections) - sum(fp in stored for fp in fingerprints)} of "
+                 f"{len(sections)} sections changed ({len(pieces)} chunk(s) to analyze).")
+
+    fresh = {}
+    if pieces:
+        piece_results = analyze_chunks([piece for _, piece in pieces], max_workers=max_workers, mode=mode)
+        for fp in changed:
+            fresh[fp] = merge_chunk_results([r for (piece_fp, _), r in zip(pieces, piece_results) if piece_fp == fp])
+
+    section_results = []
+    section_status = []
+    for fp, section in zip(fingerprints, sections):
+        status = "fresh" if fp in fresh else "reused"
+        section_results.append(fresh.get(fp) or stored[fp])
+        section_status.append({"heading": section["heading"], "fingerprint": fp, "status": status})
+
+    save_section_state(state_path, {
+        "version": SECTION_STATE_VERSION,
+        "sections": [
+            dict(status, results=results) for status, results in zip(section_status, section_results)
+        ],
+    })
+
+    analysis_results = merge_chunk_results(section_results) if section_results else {name: None for name in ANALYZERS}
+    attach_outline_counts(analysis_results, outline)
+    attach_readability_metrics(analysis_results, article_content)
+    return analysis_results, section_status
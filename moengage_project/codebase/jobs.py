@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+In-memory background job manager for long-running analysis requests.
+
+Jobs are submitted with a parameters dict, executed on a bounded thread pool by a
+runner(params, artifacts) function that returns (payload, http_status), and kept
+in a bounded store until they expire. The store lives in the worker process, so the server must run
+a single gunicorn worker (with threads) for polling to reach the same store.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+DEFAULT_MAX_JOBS = int(os.getenv("JOB_MAX_JOBS", "100"))
+DEFAULT_JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+JOB_STATES = ("queued", "running", "succeeded", "failed")
+
+
+class JobStoreFull(Exception):
+    """Raised when every slot in the job store is held by a queued or running job."""
+
+
+class Job:
+    """State of a single submitted analysis."""
+
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.status_code = None
+        self.error = None
+        # Server-side data the runner leaves for follow-up requests (never sent to clients)
+        self.artifacts = {}
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_status_dict(self) -> dict:
+        """Returns the job's status without its (potentially large) result payload."""
+        status = {
+            "job_id": self.id,
+            "status": self.status,
+            "url": self.params.get("url"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+class JobManager:
+    """Runs jobs on a thread pool and keeps a bounded, expiring record of them."""
+
+    def __init__(self, runner, max_workers: int = DEFAULT_JOB_WORKERS, max_jobs: int = DEFAULT_MAX_JOBS,
+                 ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS):
+        self._runner = runner
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    def _expire_locked(self):
+        """Drops finished jobs past their TTL, then the oldest finished jobs while the store is full."""
+        now = time.time()
+        for job_id in [jid for jid, job in self._jobs.items()
+                       if job.is_finished and now - job.finished_at > self.ttl_seconds]:
+            del self._jobs[job_id]
+        if len(self._jobs) >= self.max_jobs:
+            for job_id in [jid for jid, job in self._jobs.items() if job.is_finished]:
+                del self._jobs[job_id]
+                if len(self._jobs) < self.max_jobs:
+                    break
+
+    def submit(self, params: dict) -> Job:
+        """Queues a job and returns it immediately; raises JobStoreFull if no slot can be freed."""
+        job = Job(params)
+        with self._lock:
+            self._expire_locked()
+            if len(self._jobs) >= self.max_jobs:
+                raise JobStoreFull(f"Job store is full ({self.max_jobs} active jobs).")
+            self._jobs[job.id] = job
+        # Run in a copy of the submitter's context so per-request settings carry over
+        self._executor.submit(contextvars.copy_context().run, self._run, job)
+        logging.info(f"Queued job {job.id} for {params.get('url')}")
+        return job
+
+    def _run(self, job: Job):
+        with self._lock:
+            job.status = "running"
+            job.started_at = time.time()
+        error = None
+        try:
+            result, status_code = self._runner(job.params, job.artifacts)
+            if status_code >= 400:
+                error = (result or {}).get("error", "Job failed.")
+        except Exception as e:
+            logging.error(f"Job {job.id} raised an unexpected error: {e}")
+            status_code = 500
+            error = f"An unexpected error occurred: {e}"
+            result = {"error": error}
+        # Publish the outcome in one step: a job seen as finished always has its finished_at
+        with self._lock:
+            job.result, job.status_code, job.error = result, status_code, error
+            job.finished_at = time.time()
+            job.status = "succeeded" if status_code < 400 else "failed"
+        logging.info(f"Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+    def queued_count(self) -> int:
+        """Jobs submitted but not started yet (waiting for a free job thread)."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            self._expire_locked()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        counts["stored"] = sum(counts.values())
+        counts["max_jobs"] = self.max_jobs
+        return counts
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+On-disk (SQLite) cache for LLM responses.
+
+Entries are keyed by model name, a hash of the prompt template and a hash of the
+whitespace-normalized article text, so re-analyzing an unchanged article costs no
+API calls. Entries expire after a TTL and the least recently used ones are evicted
+once the cache passes its entry-count or size limit.
+"""
+import contextvars
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import REGISTRY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "doc_analyzer", "llm_cache.sqlite3"))
+DEFAULT_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "200"))
+
+# "use": read and write; "refresh": skip reads but store the fresh response; "bypass": neither
+CACHE_MODES = ("use", "refresh", "bypass")
+_cache_mode = contextvars.ContextVar("llm_cache_mode", default="use")
+
+
+@contextmanager
+def cache_options(bypass: bool = False, refresh: bool = False):
+    """Sets the cache mode for LLM calls made in this context (and contexts copied from it)."""
+    mode = "bypass" if bypass else ("refresh" if refresh else "use")
+    token = _cache_mode.set(mode)
+    try:
+        yield mode
+    finally:
+        _cache_mode.reset(token)
+
+
+def current_cache_mode() -> str:
+    return _cache_mode.get()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_for_key(text: str) -> str:
+    """Collapses whitespace so cosmetic re-scrapes of the same article share a cache key."""
+    return " ".join((text or "").split())
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU + TTL cache of raw LLM response text."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_mb: float = DEFAULT_MAX_MB):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        # Each lookup counts as exactly one of hits, misses (no entry) or expired (entry past its TTL);
+        # entries dropped outside lookups count as evictions (size limits) or ttl_evictions
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0, "ttl_evictions": 0}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, text_content: str) -> tuple[str, str, str]:
+        """Returns (key, prompt_hash, content_hash) for a model/prompt/article combination."""
+        prompt_hash = _sha256(prompt)
+        content_hash = _sha256(normalize_for_key(text_content))
+        return _sha256(f"{model_name}\0{prompt_hash}\0{content_hash}"), prompt_hash, content_hash
+
+    def get(self, model_name: str, prompt: str, text_content: str) -> str | None:
+        """Returns the cached response, or None on a miss, expiry, or when reads are disabled."""
+        if current_cache_mode() != "use":
+            return None
+        key, _, _ = self.make_key(model_name, prompt, text_content)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats["expired"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._stats["hits"] += 1
+        logging.info(f"LLM cache hit for {model_name} (key {key[:12]}...).")
+        return response
+
+    def put(self, model_name: str, prompt: str, text_content: str, response: str):
+        """Stores a response unless writes are disabled, then evicts down to the size limits."""
+        if current_cache_mode() == "bypass":
+            return
+        key, prompt_hash, content_hash = self.make_key(model_name, prompt, text_content)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, prompt_hash, content_hash, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, prompt_hash, content_hash, response, len(response.encode("utf-8")), now, now),
+            )
+            self._stats["writes"] += 1
+            self._evict_locked()
+            self._conn.commit()
+
+    def delete(self, model_name: str, prompt: str, text_content: str):
+        """Removes one entry, e.g. a reply that turned out to be unusable."""
+        key, _, _ = self.make_key(model_name, prompt, text_content)
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict_locked(self):
+        """Drops expired entries, then least recently used ones until both limits are met."""
+        if self.ttl_seconds:
+            cur = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._stats["ttl_evictions"] += cur.rowcount
+        count, total_size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total_size <= self.max_bytes):
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total_size <= self.max_bytes):
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total_size -= size
+            evicted += 1
+        self._stats["evictions"] += evicted
+        logging.info(f"LLM cache evicted {evicted} least recently used entries.")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            count, total_size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        snapshot.update({"entries": count, "size_bytes": total_size, "path": self.path})
+        return snapshot
+
+
+_cache = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache | None:
+    """Returns the process-wide cache, or None when disabled or the database cannot be opened."""
+    global _cache, _cache_failed
+    if not CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = LLMResponseCache()
+                    logging.info(f"LLM response cache enabled at {_cache.path}")
+                except (sqlite3.Error, OSError) as e:
+                    logging.error(f"Could not open LLM response cache at {DEFAULT_CACHE_PATH}: {e}. Caching disabled.")
+                    _cache_failed = True
+                    return None
+    return _cache
+
+
+def _collect_cache_metrics() -> list:
+    """Exposes the LLM response cache counters on /metrics once the cache is open."""
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    return [
+        ("llm_cache_lookups_total", "counter", "LLM response cache lookups by result (hit, miss, expired).",
+         [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]), ({"result": "expired"}, stats["expired"])]),
+        ("llm_cache_evictions_total", "counter", "LLM response cache entries evicted, by reason (lru: size limits, ttl: expired).",
+         [({"reason": "lru"}, stats["evictions"]), ({"reason": "ttl"}, stats["ttl_evictions"])]),
+        ("llm_cache_entries", "gauge", "Entries in the LLM response cache.", [({}, stats["entries"])]),
+        ("llm_cache_size_bytes", "gauge", "Total size of cached LLM responses.", [({}, stats["size_bytes"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_cache_metrics)
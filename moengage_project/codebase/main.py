@@ -3,17 +3,19 @@
 import argparse
 import os
 import logging
+import time
 from urllib.parse import urlparse
-from revision_agent import main_revision
 
 # Import necessary functions from other modules
-from scraper import fetch_article_content
-from readability import analyze_readability
-from structure import analyze_structure
-from completeness import analyze_completeness
-from style import analyze_style
-# Import both report generation functions
-from reporter import generate_markdown_report, generate_json_report 
+from document_api import analyze_document, revise, record_stage, DiskSink
+from browser_pool import get_browser_pool
+from chunker import DEFAULT_CHUNK_TOKEN_BUDGET
+from incremental import SECTION_STATE_SUFFIX
+from llm_cache import cache_options, get_llm_cache
+from page_cache import get_page_cache
+from rate_limiter import get_rate_limiter
+from metrics import dump_metrics
+from pipeline import DEFAULT_ANALYSIS_WORKERS, ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -23,10 +25,65 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Default output directory is one level up from script dir, in an 'output' folder
 DEFAULT_OUTPUT_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "output")) 
 
+def process_url(article_url: str, output_dir: str, workers: int | None = None, mode: str | None = None,
+                article_content: str | None = None, timings: dict | None = None,
+                chunk_token_budget: int | None = None, incremental: bool = False, outline: dict | None = None) -> bool:
+    """Fetches (unless article_content is given), analyzes and revises one article, writing its reports into output_dir.
+
+    When `timings` is a dict, the seconds spent in the fetch/analyze/report/revise stages are recorded in it.
+    With `incremental`, only sections changed since the last run (per the stored `_sections.json`) are re-analyzed.
+    `outline` is the page outline from the scraper (fetched along with the article when it is not given).
+    Returns True only if the reports and the revised article were all written.
+    """
+    sink = DiskSink(output_dir)
+    section_state_path = sink.path_for(article_url, SECTION_STATE_SUFFIX) if incremental else None
+
+    # --- Steps 1-4: Fetch, analyze and save the Markdown and JSON reports ---
+    result = analyze_document(article_url, text=article_content, outline=outline, workers=workers, mode=mode,
+                              chunk_token_budget=chunk_token_budget, section_state_path=section_state_path, timings=timings)
+    if result is None:
+        logging.error("Failed to fetch article content. Exiting.")
+        return False
+
+    stage_start = time.perf_counter()
+    report_saved = sink.write_analysis(result)
+    record_stage(timings, "report", stage_start)
+    # Only revise once the JSON report is saved, so every revision on disk has its report next to it
+    if not report_saved:
+        logging.error(f"Failed to save the analysis report for {article_url}; skipping revision.")
+        return False
+
+    # --- Step 5: Automatically Revise Article based on the analysis ---
+    logging.info(f"Starting automatic revision for {article_url}...")
+    stage_start = time.perf_counter()
+    try:
+        revised_text = revise(result.text, result)
+        revision_saved = bool(revised_text) and sink.write_revision(article_url, revised_text)
+    except Exception as rev_e:
+        logging.error(f"Error during automatic revision for {article_url}: {rev_e}")
+        revision_saved = False
+    record_stage(timings, "revise", stage_start)
+    if not revision_saved:
+        logging.error(f"Revision failed for {article_url}.")
+        return False
+    logging.info(f"Revision process completed for {article_url}.")
+    return True
+
 def main():
     parser = argparse.ArgumentParser(description="Analyze documentation articles from any website.")
     parser.add_argument("url", help="The URL of the documentation article to analyze.")
     parser.add_argument("-o", "--output", help=f"Directory to save the reports (default: adjacent 'output' folder)", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_ANALYSIS_WORKERS,
+                        help=f"Number of analyses to run concurrently; 1 runs them serially (default: {DEFAULT_ANALYSIS_WORKERS})")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default=DEFAULT_ANALYSIS_MODE,
+                        help="'combined' asks for all four analyses in one LLM request; failed sections fall back to individual calls")
+    parser.add_argument("--chunk-tokens", type=int, default=None,
+                        help=f"Split articles longer than this many (estimated) tokens at headings and analyze the chunks in parallel; 0 disables (default: {DEFAULT_CHUNK_TOKEN_BUDGET})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-analyze only the sections that changed since the last run in this output folder and reuse stored results for the rest")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response and page caches (neither read nor write them)")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached LLM responses and pages but store the fresh ones")
+    parser.add_argument("--metrics-out", help="Write Prometheus-format metrics to this file ('-' for stdout) when done")
     # Add an option to control output format if desired (e.g., --format json/md/both)
     # parser.add_argument("--format", choices=["json", "md", "both"], default="both", help="Output format for the report")
 
@@ -49,94 +106,20 @@ def main():
         logging.error(f"Error creating output directory {output_dir}: {e}")
         return
 
-    # --- Step 1: Fetch Article Content ---
-    logging.info(f"Fetching content for URL: {article_url}")
-    article_content = fetch_article_content(article_url)
-
-    if not article_content:
-        logging.error("Failed to fetch article content. Exiting.")
-        return
-    
-    logging.info("Article content fetched successfully.")
-
-    # --- Step 2: Perform Analyses ---
-    analysis_results = {}
-    logging.info("Starting analysis...")
-    analysis_results["Readability"] = analyze_readability(article_content)
-    analysis_results["Structure"] = analyze_structure(article_content)
-    analysis_results["Completeness"] = analyze_completeness(article_content)
-    analysis_results["Style"] = analyze_style(article_content)
-    logging.info("All analyses performed.")
-
-    # --- Step 3 & 4: Generate and Save Reports ---
-    
-    # Create a base filename from the URL path
-    parsed_url = urlparse(article_url) 
-    path_parts = [part for part in parsed_url.path.split("/") if part] 
-    base_filename = path_parts[-1] if path_parts else "analysis_report"
-    # Sanitize filename
-    safe_filename = "".join(c if c.isalnum() or c in (".", "-", "_") else "_" for c in base_filename)
-
-    # Generate and Save Markdown Report (Optional: control with --format arg)
-    # if output_format in ["md", "both"]:
-    logging.info(f"Generating Markdown report for {article_url}...")
-    markdown_report = generate_markdown_report(article_url, analysis_results)
-    if markdown_report:
-        logging.info(f"Markdown report generated successfully for {article_url}.")
-        report_filename_md = f"{safe_filename}_analysis.md"
-        report_filepath_md = os.path.join(output_dir, report_filename_md)
-        try:
-            with open(report_filepath_md, "w", encoding="utf-8") as f:
-                f.write(markdown_report)
-            logging.info(f"Markdown analysis report saved successfully to: {report_filepath_md}")
-        except IOError as e:
-            logging.error(f"Error saving Markdown report file {report_filepath_md}: {e}")
-    else:
-        logging.error(f"Failed to generate Markdown report for {article_url}.")
-
-    # Generate and Save JSON Report (Optional: control with --format arg)
-    # if output_format in ["json", "both"]:
-    logging.info(f"Generating JSON report for {article_url}...")
-    json_report = generate_json_report(article_url, analysis_results)
-    if json_report:
-        # Check if the returned string is actually JSON or an error fallback
-        # A simple check might be if it starts with '{'
-        if json_report.strip().startswith("{"):
-             logging.info(f"JSON report generated successfully for {article_url}.")
-             report_filename_json = f"{safe_filename}_analysis.json"
-             report_filepath_json = os.path.join(output_dir, report_filename_json)
-             try:
-                 with open(report_filepath_json, "w", encoding="utf-8") as f:
-                     f.write(json_report)
-                 logging.info(f"JSON analysis report saved successfully to: {report_filepath_json}")
-             except IOError as e:
-                 logging.error(f"Error saving JSON report file {report_filepath_json}: {e}")
-             else:
-                 # --- Step 5: Automatically Revise Article based on JSON Report ---
-                 # This block executes only if the JSON was saved successfully
-                 logging.info(f"Starting automatic revision for {article_url} based on {report_filepath_json}...")
-                 revised_article_output_path_txt = os.path.join(output_dir, f"{safe_filename}_revised.txt") # Save as Text
-                 revised_article_output_path_md = os.path.join(output_dir, f"{safe_filename}_revised.md") # Save as Markdown
-                 try:
-                     # Call the main revision function from revision_agent
-                     revised_content = main_revision(original_article_url=article_url, json_report_path=report_filepath_json, output_revision_path=revised_article_output_path_txt) # Saves TXT
-                     if revised_content:
-                         # Save the same content as Markdown
-                         try:
-                             with open(revised_article_output_path_md, "w", encoding="utf-8") as md_f:
-                                 md_f.write(revised_content)
-                             logging.info(f"Also saved revised article as Markdown: {revised_article_output_path_md}")
-                         except IOError as md_e:
-                             logging.error(f"Error saving revised article as Markdown {revised_article_output_path_md}: {md_e}")
-                     logging.info(f"Revision process completed for {article_url}.")
-                 except Exception as rev_e:
-                     logging.error(f"Error during automatic revision for {article_url}: {rev_e}")
-
-        else:
-            # Handle case where generate_json_report returned an error string instead of JSON
-            logging.error(f"Failed to generate valid JSON report content for {article_url}. Content: {json_report[:100]}...") 
-    else:
-         logging.error(f"Failed to generate JSON report for {article_url} (function returned None).")
+    with cache_options(bypass=args.no_cache, refresh=args.refresh_cache):
+        process_url(article_url, output_dir, workers=args.workers, mode=args.mode, chunk_token_budget=args.chunk_tokens,
+                    incremental=args.incremental)
+
+    logging.info(f"Browser pool stats: {get_browser_pool().stats()}")
+    logging.info(f"LLM rate limiter stats: {get_rate_limiter().stats()}")
+    cache = get_llm_cache()
+    if cache is not None:
+        logging.info(f"LLM cache stats: {cache.stats()}")
+    page_cache = get_page_cache()
+    if page_cache is not None:
+        logging.info(f"Page cache stats: {page_cache.stats()}")
+    if args.metrics_out:
+        dump_metrics(args.metrics_out)
 
 if __name__ == "__main__":
     # Check for API key before running main logic
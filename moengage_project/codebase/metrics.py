@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Minimal in-process metrics registry rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept per label set in this process. The Flask app
+serves them at /metrics, and the CLIs can dump them at exit with --metrics-out.
+Collectors registered with `register_collector` add values read from existing stats
+(browser pool, LLM cache, rate limiter) at render time.
+"""
+import functools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+METRIC_PREFIX = "doc_analyzer_"
+# Seconds; spans fast local stages (reports) through slow LLM calls and page loads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = METRIC_PREFIX + name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = list(self._values.items())
+        for label_key, value in items:
+            lines.append(f"{self.name}{_format_labels(label_key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = [(key, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}) for key, s in self._values.items()]
+        for label_key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(label_key, (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(label_key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(label_key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and collectors and renders them as Prometheus text."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets))
+
+    def register_collector(self, collector):
+        """Adds a callable returning [(name, type, help, [(labels dict, value), ...]), ...] read at render time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logging.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, type_name, documentation, samples in families:
+                full_name = METRIC_PREFIX + name
+                lines.append(f"# HELP {full_name} {documentation}")
+                lines.append(f"# TYPE {full_name} {type_name}")
+                for labels, value in samples:
+                    lines.append(f"{full_name}{_format_labels(_label_key(labels))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram("stage_duration_seconds", "Time spent in each pipeline stage (scrape, analyzers, reports, revision).")
+STAGE_IN_FLIGHT = REGISTRY.gauge("stage_in_flight", "Pipeline stage executions currently running.")
+STAGE_FAILURES = REGISTRY.counter("stage_failures_total", "Pipeline stage executions that raised an exception.")
+
+LLM_REQUEST_DURATION = REGISTRY.histogram("llm_request_duration_seconds", "Latency of individual LLM backend requests (each attempt).")
+LLM_IN_FLIGHT = REGISTRY.gauge("llm_requests_in_flight", "LLM backend requests currently in flight.")
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "LLM backend request attempts by outcome (success, blocked, error).")
+LLM_RETRIES = REGISTRY.counter("llm_retries_total", "LLM request attempts that were retried, by reason (throttled, error).")
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "LLM calls that gave up (retries exhausted or not retryable).")
+LLM_PROMPT_TOKENS = REGISTRY.counter("llm_prompt_tokens_total", "Estimated prompt tokens sent to the LLM backend.")
+LLM_RESPONSE_TOKENS = REGISTRY.counter("llm_response_tokens_total", "Estimated response tokens received from the LLM backend.")
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Records the duration, in-flight count and failures of one pipeline stage execution."""
+    start = time.perf_counter()
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    try:
+        yield
+    except Exception:
+        STAGE_FAILURES.inc(stage=stage)
+        raise
+    finally:
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=stage)
+
+
+def timed_stage(stage: str):
+    """Decorator form of track_stage for functions that make up one stage."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track_stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def dump_metrics(path: str):
+    """Writes the current metrics to a file, or to stdout when path is '-'."""
+    text = render_metrics()
+    if path == "-":
+        print(text, end="")
+        return
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        logging.info(f"Metrics saved to: {path}")
+    except IOError as e:
+        logging.error(f"Error saving metrics file {path}: {e}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lightweight document outline extracted from the article body's HTML.
+
+The scraper flattens the page to text for the analyzers, which loses the markup the
+structure analysis is about. The outline keeps it: the heading tree, and per heading
+section the paragraphs (with word counts), lists, code blocks, tables and links. Structure
+counts are read from it exactly, and `format_outline` renders a compact text version
+for the structure prompt in place of the full article.
+"""
+import logging
+
+from bs4 import BeautifulSoup
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+BLOCK_TAGS = HEADING_TAGS + ("p", "ul", "ol", "pre", "table", "a", "img")
+# Keys every structure result must have in "counts" (see structure.validate_structure_data)
+STRUCTURE_COUNT_KEYS = ("h1", "h2", "h3", "paragraphs", "lists")
+MAX_PROMPT_LINKS = 30
+
+
+def _new_section(heading: str | None, level: int) -> dict:
+    return {"heading": heading, "level": level, "paragraph_words": [], "lists": 0, "list_items": 0,
+            "code_blocks": 0, "tables": 0, "images": 0, "links": 0}
+
+
+def _text(element) -> str:
+    return " ".join(element.get_text(" ", strip=True).split())
+
+
+def extract_outline(html: str) -> dict:
+    """Builds the outline of an article body from its HTML.
+
+    Returns {"headings": [{"level", "text"}], "sections": [...], "links": [{"text", "href"}], "counts": {...}}.
+    Paragraphs inside list items or table cells belong to the list or table, and only top-level
+    lists are counted as lists (nested lists add to their parent's items).
+    """
+    soup = BeautifulSoup(html or "", "html.parser")
+    headings = []
+    links = []
+    sections = [_new_section(None, 0)]
+
+    for element in soup.find_all(BLOCK_TAGS):
+        name = element.name
+        section = sections[-1]
+        if name in HEADING_TAGS:
+            text = _text(element)
+            if text:
+                level = int(name[1])
+                headings.append({"level": level, "text": text})
+                sections.append(_new_section(text, level))
+        elif name == "p":
+            if element.find_parent(["li", "td", "th", "pre"]) is None:
+                words = len(_text(element).split())
+                if words:
+                    section["paragraph_words"].append(words)
+        elif name in ("ul", "ol"):
+            if element.find_parent(["li", "td", "th"]) is None:
+                section["lists"] += 1
+                section["list_items"] += len(element.find_all("li"))
+        elif name == "pre":
+            section["code_blocks"] += 1
+        elif name == "table":
+            if element.find_parent("table") is None:
+                section["tables"] += 1
+        elif name == "img":
+            section["images"] += 1
+        elif name == "a" and element.get("href") and not element["href"].startswith("#"):
+            section["links"] += 1
+            links.append({"text": _text(element), "href": element["href"]})
+
+    # Drop an empty introduction (articles that start with a heading)
+    intro = sections[0]
+    if not intro["paragraph_words"] and not any(intro[k] for k in ("lists", "code_blocks", "tables", "images", "links")):
+        sections = sections[1:]
+
+    counts = {f"h{level}": sum(1 for h in headings if h["level"] == level) for level in range(1, 7)}
+    counts.update({
+        "paragraphs": sum(len(s["paragraph_words"]) for s in sections),
+        "lists": sum(s["lists"] for s in sections),
+        "list_items": sum(s["list_items"] for s in sections),
+        "code_blocks": sum(s["code_blocks"] for s in sections),
+        "tables": sum(s["tables"] for s in sections),
+        "images": sum(s["images"] for s in sections),
+        "links": len(links),
+    })
+    return {"headings": headings, "sections": sections, "links": links, "counts": counts}
+
+
+def structure_counts(outline: dict) -> dict:
+    """The outline's counts in the shape of a structure result's "counts" (required keys first)."""
+    counts = outline.get("counts", {})
+    result = {key: counts.get(key, 0) for key in STRUCTURE_COUNT_KEYS}
+    result.update({k: v for k, v in counts.items() if k not in result and not (k[0] == "h" and k[1:].isdigit())})
+    return result
+
+
+def format_outline(outline: dict) -> str:
+    """Renders the outline as compact indented text for an LLM prompt."""
+    counts = outline.get("counts", {})
+    lines = [
+        "Counts: " + ", ".join(f"{key}={counts.get(key, 0)}" for key in
+                               ("h1", "h2", "h3", "h4", "paragraphs", "lists", "list_items", "code_blocks", "tables", "images", "links")),
+        "",
+        "Outline (heading, then the blocks under it):",
+    ]
+    for section in outline.get("sections", []):
+        paragraph_words = section["paragraph_words"]
+        parts = []
+        if paragraph_words:
+            parts.append(f"{len(paragraph_words)} paragraph(s), avg {sum(paragraph_words) // len(paragraph_words)} words, "
+                         f"longest {max(paragraph_words)} words")
+        if section["lists"]:
+            parts.append(f"{section['lists']} list(s) with {section['list_items']} item(s)")
+        for key, label in (("code_blocks", "code block(s)"), ("tables", "table(s)"), ("images", "image(s)"), ("links", "link(s)")):
+            if section[key]:
+                parts.append(f"{section[key]} {label}")
+        indent = "  " * max(0, section["level"] - 1)
+        heading = f"{'#' * section['level']} {section['heading']}" if section["heading"] else "(Introduction)"
+        lines.append(f"{indent}{heading}: {'; '.join(parts) or 'no content'}")
+
+    links = outline.get("links", [])
+    if links:
+        lines.extend(["", "Links:"])
+        lines.extend(f"- {link['text'] or '(no text)'} -> {link['href']}" for link in links[:MAX_PROMPT_LINKS])
+        if len(links) > MAX_PROMPT_LINKS:
+            lines.append(f"- ... and {len(links) - MAX_PROMPT_LINKS} more")
+    return "\n".join(lines)
+
+
+# Example usage (for testing purposes)
+if __name__ == '__main__':
+    sample_html = """
+    <p>Welcome to the setup guide.</p>
+    <h2>Before you begin</h2>
+    <p>You need an account. See <a href="https://help.moengage.com/hc/en-us">the help center</a>.</p>
+    <ul><li>An app ID</li><li>A data center<ul><li>DC-01</li></ul></li></ul>
+    <h3>Install the SDK</h3>
+    <pre>implementation("com.moengage:moe-android-sdk")</pre>
+    <h2>Next steps</h2>
+    <ol><li><p>Create a campaign.</p></li><li>Review the results.</li></ol>
+    """
+    outline = extract_outline(sample_html)
+    print(structure_counts(outline))
+    print(format_outline(outline))
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+On-disk (SQLite) cache for scraped pages.
+
+Entries are keyed by canonical URL (no fragment, no tracking parameters), so the same
+article linked with different `#h_...` anchors is scraped once. Each entry keeps the
+normalized article text, the raw text it was normalized from, its outline, the raw HTML it was extracted from and the
+ETag/Last-Modified validators of pages fetched over plain HTTP. Entries younger than the TTL
+are served as they are; older HTTP entries are revalidated with a conditional GET by the
+scraper, and a 304 refreshes them without fetching the page again. Browser-rendered entries
+are scraped again once stale: the validators of the HTML shell say nothing about the text the
+page's scripts rendered into it. The least recently used entries are evicted
+once the cache passes its entry-count or size limit.
+
+The cache follows the same `cache_options` mode as the LLM response cache: "refresh"
+re-scrapes and stores, "bypass" neither reads nor writes.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+
+from llm_cache import current_cache_mode
+from metrics import REGISTRY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+DEFAULT_PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "doc_analyzer", "page_cache.sqlite3"))
+# Entries younger than this are served without contacting the site; older ones are revalidated
+# (0 makes every entry stale, so each fetch revalidates or re-scrapes)
+DEFAULT_PAGE_TTL_SECONDS = int(os.getenv("PAGE_CACHE_TTL_SECONDS", str(6 * 3600)))
+DEFAULT_PAGE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "2000"))
+DEFAULT_PAGE_MAX_MB = float(os.getenv("PAGE_CACHE_MAX_MB", "500"))
+
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl", "ref", "ref_src", "source", "hsctatracking"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str, base: str | None = None) -> str | None:
+    """Resolves url against base and returns its canonical form, or None if it is not HTTP(S).
+
+    Lowercases the scheme and host, drops default ports, fragments (e.g. `#h_01HCF...` heading anchors)
+    and tracking parameters, and sorts the remaining query parameters.
+    """
+    parsed = urlparse(urljoin(base, url) if base else url)
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+    netloc = parsed.hostname.lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{parsed.port}"
+    query = sorted((key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                   if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES))
+    return urlunparse((scheme, netloc, parsed.path or "/", "", urlencode(query), ""))
+
+
+class PageCache:
+    """SQLite-backed LRU cache of scraped pages with TTL-based revalidation."""
+
+    def __init__(self, path: str = DEFAULT_PAGE_CACHE_PATH, ttl_seconds: int = DEFAULT_PAGE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_PAGE_MAX_ENTRIES, max_mb: float = DEFAULT_PAGE_MAX_MB):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "revalidated": 0, "writes": 0, "evictions": 0}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    outline TEXT,
+                    html TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetch_path TEXT,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access)")
+            # Databases created before the raw text was kept
+            if "raw_text" not in {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}:
+                self._conn.execute("ALTER TABLE pages ADD COLUMN raw_text TEXT")
+            self._conn.commit()
+
+    def get(self, url: str) -> dict | None:
+        """Returns the cached page, or None on a miss or when reads are disabled.
+
+        The result has "text", "raw_text", "outline", "html", "etag", "last_modified", "fetch_path" and "fresh";
+        a page that is not fresh should be revalidated before use (see `mark_revalidated`).
+        """
+        key = canonicalize_url(url)
+        if key is None or current_cache_mode() != "use":
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, raw_text, outline, html, etag, last_modified, fetch_path, fetched_at FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            text, raw_text, outline, html, etag, last_modified, fetch_path, fetched_at = row
+            fresh = self.ttl_seconds > 0 and now - fetched_at <= self.ttl_seconds
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, key))
+            self._conn.commit()
+            self._stats["hits" if fresh else "stale"] += 1
+        return {"text": text, "raw_text": raw_text, "outline": json.loads(outline) if outline else None, "html": html, "etag": etag,
+                "last_modified": last_modified, "fetch_path": fetch_path, "fresh": fresh}
+
+    def put(self, url: str, text: str, outline: dict | None = None, html: str | None = None, etag: str | None = None,
+            last_modified: str | None = None, fetch_path: str | None = None, raw_text: str | None = None):
+        """Stores a scraped page unless writes are disabled, then evicts down to the size limits."""
+        key = canonicalize_url(url)
+        if key is None or current_cache_mode() == "bypass":
+            return
+        outline_json = json.dumps(outline) if outline is not None else None
+        size = sum(len(value.encode("utf-8")) for value in (text, raw_text, outline_json, html) if value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, text, raw_text, outline, html, etag, last_modified, fetch_path, size, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, text, raw_text, outline_json, html, etag, last_modified, fetch_path, size, now, now),
+            )
+            self._stats["writes"] += 1
+            self._evict_locked()
+            self._conn.commit()
+
+    def mark_revalidated(self, url: str, etag: str | None = None, last_modified: str | None = None):
+        """Restarts the TTL of a page the site confirmed unchanged (HTTP 304), updating any new validators."""
+        key = canonicalize_url(url)
+        if key is None or current_cache_mode() == "bypass":
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now, now, etag, last_modified, key),
+            )
+            self._conn.commit()
+            self._stats["revalidated"] += 1
+
+    def _evict_locked(self):
+        """Drops least recently used entries until both limits are met (stale entries stay for revalidation)."""
+        count, total_size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total_size <= self.max_bytes):
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT url, size FROM pages ORDER BY last_access ASC").fetchall():
+            if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or total_size <= self.max_bytes):
+                break
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (key,))
+            count -= 1
+            total_size -= size
+            evicted += 1
+        self._stats["evictions"] += evicted
+        logging.info(f"Page cache evicted {evicted} least recently used entries.")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            count, total_size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        snapshot.update({"entries": count, "size_bytes": total_size, "path": self.path})
+        return snapshot
+
+
+_cache = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache | None:
+    """Returns the process-wide page cache, or None when disabled or the database cannot be opened."""
+    global _cache, _cache_failed
+    if not PAGE_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = PageCache()
+                    logging.info(f"Page cache enabled at {_cache.path}")
+                except (sqlite3.Error, OSError) as e:
+                    logging.error(f"Could not open page cache at {DEFAULT_PAGE_CACHE_PATH}: {e}. Page caching disabled.")
+                    _cache_failed = True
+                    return None
+    return _cache
+
+
+def _collect_cache_metrics() -> list:
+    """Exposes the page cache counters on /metrics once the cache is open."""
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    return [
+        ("page_cache_lookups_total", "counter", "Page cache lookups by result.",
+         [({"result": "hit"}, stats["hits"]), ({"result": "stale"}, stats["stale"]), ({"result": "miss"}, stats["misses"])]),
+        ("page_cache_revalidations_total", "counter", "Stale pages confirmed unchanged by a conditional GET (HTTP 304).",
+         [({}, stats["revalidated"])]),
+        ("page_cache_evictions_total", "counter", "Page cache entries evicted by the LRU/size limits.", [({}, stats["evictions"])]),
+        ("page_cache_entries", "gauge", "Entries in the page cache.", [({}, stats["entries"])]),
+        ("page_cache_size_bytes", "gauge", "Total size of cached pages.", [({}, stats["size_bytes"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_cache_metrics)
+
+
+# Example usage: show canonical keys and the current cache contents
+if __name__ == '__main__':
+    for example in ("https://help.moengage.com/hc/en-us/articles/33436161901332#h_01HCF71DEQY09CG9KXW1AYQ73F",
+                    "HTTPS://Help.MoEngage.com:443/hc/en-us/articles/33436161901332?utm_source=mail"):
+        print(f"{example}\n  -> {canonicalize_url(example)}")
+    cache = get_page_cache()
+    print(cache.stats() if cache is not None else "Page cache disabled.")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Runs the four documentation analyses and assembles the `analysis_results` dict
+expected by `reporter.generate_json_report` / `generate_markdown_report`.
+"""
+import contextvars
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from readability import analyze_readability
+from structure import analyze_structure
+from completeness import analyze_completeness
+from style import analyze_style
+from combined import analyze_combined
+from chunker import chunk_article, merge_analysis_results
+from metrics import track_stage
+from readability_metrics import compute_readability_metrics, DEFAULT_LOCAL_READABILITY_MODE
+from outline import structure_counts
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Report key -> analyzer function, in the order the reports present them
+ANALYZERS = {
+    "Readability": analyze_readability,
+    "Structure": analyze_structure,
+    "Completeness": analyze_completeness,
+    "Style": analyze_style,
+}
+
+# Number of analyses run at once; 1 restores the original serial behaviour
+DEFAULT_ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(len(ANALYZERS))))
+
+# "separate" sends one request per analyzer; "combined" asks for all four sections in one request
+ANALYSIS_MODES = ("separate", "combined")
+DEFAULT_ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "separate").lower()
+
+# Number of chunks of a long article analyzed at once
+DEFAULT_CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "4"))
+
+
+def _run_single(name: str, analyzer, article_content: str) -> dict | None:
+    """Runs one analyzer, turning unexpected exceptions into a logged None result."""
+    start = time.perf_counter()
+    try:
+        with track_stage(f"analyze_{name.lower()}"):
+            return analyzer(article_content)
+    except Exception as e:
+        logging.error(f"{name} analysis raised an unexpected error: {e}")
+        return None
+    finally:
+        logging.info(f"{name} analysis finished in {time.perf_counter() - start:.2f}s.")
+
+
+def _validate_mode(mode: str | None) -> str:
+    mode = (mode or DEFAULT_ANALYSIS_MODE).lower()
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode '{mode}'. Expected one of: {ANALYSIS_MODES}")
+    return mode
+
+
+def _analyze_text(article_content: str, workers: int, mode: str, outline: dict | None = None,
+                  analyzers: dict | None = None) -> dict:
+    """Runs the analyzers (all by default) over one piece of text and returns the analysis_results dict.
+
+    With the page outline, the structure analyzer works from the outline instead of the text.
+    """
+    analysis_results = {}
+    pending = dict(ANALYZERS if analyzers is None else analyzers)
+    if outline and "Structure" in pending:
+        pending["Structure"] = functools.partial(analyze_structure, outline=outline)
+    if mode == "combined":
+        try:
+            with track_stage("analyze_combined"):
+                analysis_results = analyze_combined(article_content)
+        except Exception as e:
+            logging.error(f"Combined analysis raised an unexpected error: {e}")
+        pending = {name: analyzer for name, analyzer in pending.items() if analysis_results.get(name) is None}
+        if pending:
+            logging.warning(f"Falling back to individual analyzers for: {list(pending)}")
+
+    workers = max(1, min(workers, len(pending) or 1))
+    if pending and workers == 1:
+        logging.info(f"Running {len(pending)} analyses serially...")
+        for name, analyzer in pending.items():
+            analysis_results[name] = _run_single(name, analyzer, article_content)
+    elif pending:
+        logging.info(f"Running {len(pending)} analyses concurrently with {workers} workers...")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyzer") as executor:
+            # Copy the caller's context per task so settings such as the LLM cache mode carry over
+            futures = {
+                name: executor.submit(contextvars.copy_context().run, _run_single, name, analyzer, article_content)
+                for name, analyzer in pending.items()
+            }
+            for name, future in futures.items():
+                analysis_results[name] = future.result()
+
+    # Return in the fixed report order regardless of completion order
+    return {name: analysis_results.get(name) for name in ANALYZERS if name in analysis_results or name in pending}
+
+
+def analyze_chunks(chunks: list[str], max_workers: int | None = None, mode: str | None = None,
+                   chunk_workers: int | None = None, analyzers: dict | None = None) -> list[dict]:
+    """Runs the analyzers (all by default) over each chunk in parallel and returns one analysis_results dict per chunk."""
+    mode = _validate_mode(mode)
+    workers = DEFAULT_ANALYSIS_WORKERS if max_workers is None else max_workers
+    chunk_workers = max(1, min(DEFAULT_CHUNK_WORKERS if chunk_workers is None else chunk_workers, len(chunks) or 1))
+    if len(chunks) <= 1 or chunk_workers == 1:
+        return [_analyze_text(chunk, workers, mode, analyzers=analyzers) for chunk in chunks]
+    logging.info(f"Analyzing {len(chunks)} chunks with {chunk_workers} chunk workers...")
+    with ThreadPoolExecutor(max_workers=chunk_workers, thread_name_prefix="chunk") as executor:
+        futures = [executor.submit(contextvars.copy_context().run, _analyze_text, chunk, workers, mode, None, analyzers)
+                   for chunk in chunks]
+        return [future.result() for future in futures]
+
+
+def merge_chunk_results(chunk_results: list[dict]) -> dict:
+    """Folds per-chunk analysis_results dicts into one dict with the single-article schema."""
+    return {name: merge_analysis_results([r.get(name) for r in chunk_results]) for name in ANALYZERS}
+
+
+def attach_readability_metrics(analysis_results: dict, article_content: str) -> dict:
+    """Sets whole-article local metrics on the Readability result (chunk and combined results lack them)."""
+    readability_result = analysis_results.get("Readability")
+    if DEFAULT_LOCAL_READABILITY_MODE != "off" and isinstance(readability_result, dict):
+        readability_result["metrics"] = compute_readability_metrics(article_content)
+    return analysis_results
+
+
+def attach_outline_counts(analysis_results: dict, outline: dict | None) -> dict:
+    """Replaces the Structure result's counts with the exact ones from the page outline."""
+    structure_result = analysis_results.get("Structure")
+    if outline and isinstance(structure_result, dict):
+        structure_result["counts"] = structure_counts(outline)
+    return analysis_results
+
+
+def run_analyses(article_content: str, max_workers: int | None = None, mode: str | None = None,
+                 chunk_token_budget: int | None = None, outline: dict | None = None) -> dict:
+    """Runs all analyzers and returns the analysis_results dict.
+
+    In "separate" mode each analyzer makes its own request (concurrently unless max_workers is 1).
+    In "combined" mode one request covers all four sections, and only the sections that fail
+    validation fall back to their individual analyzer. Articles longer than the chunk token
+    budget are split at headings, analyzed per chunk in parallel and merged.
+
+    With the page `outline` from the scraper, structure counts are exact and the structure analysis
+    runs once on the outline (even for chunked articles) instead of on the article text.
+    """
+    mode = _validate_mode(mode)
+    workers = DEFAULT_ANALYSIS_WORKERS if max_workers is None else max_workers
+    start = time.perf_counter()
+
+    chunks = chunk_article(article_content, chunk_token_budget)
+    if len(chunks) > 1 and outline and mode == "separate":
+        # The outline is compact, so structure is analyzed once for the whole article
+        chunk_analyzers = {name: analyzer for name, analyzer in ANALYZERS.items() if name != "Structure"}
+        analysis_results = merge_chunk_results(analyze_chunks(chunks, max_workers=workers, mode=mode, analyzers=chunk_analyzers))
+        analysis_results.update(_analyze_text(article_content, workers, mode, outline=outline, analyzers={"Structure": analyze_structure}))
+    elif len(chunks) > 1:
+        analysis_results = merge_chunk_results(analyze_chunks(chunks, max_workers=workers, mode=mode))
+    else:
+        analysis_results = _analyze_text(article_content, workers, mode, outline=outline)
+    attach_outline_counts(analysis_results, outline)
+    attach_readability_metrics(analysis_results, article_content)
+
+    logging.info(f"All analyses performed in {time.perf_counter() - start:.2f}s ({mode} mode, {max(1, len(chunks))} chunk(s)).")
+    return analysis_results
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Process-wide rate limiting and retry backoff for LLM requests.
+
+Every request reserves one slot from a requests-per-minute token bucket and its
+estimated prompt tokens from a tokens-per-minute bucket, then holds an adaptive
+concurrency slot while it is in flight. Throttling responses (429 / quota errors)
+halve the concurrency limit and pause all callers until the server's retry hint
+has passed; sustained successes raise the limit again one step at a time.
+Retries use exponential backoff with full jitter.
+"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from metrics import REGISTRY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# 0 disables the corresponding bucket
+DEFAULT_REQUESTS_PER_MINUTE = float(os.getenv("LLM_RPM", "60"))
+DEFAULT_TOKENS_PER_MINUTE = float(os.getenv("LLM_TPM", "1000000"))
+# Upper bound for the adaptive concurrency limit (0 = unlimited, no adaptation)
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+# Simultaneous 429s from one burst should only shrink the limit once
+THROTTLE_COOLDOWN_SECONDS = 2.0
+
+RETRY_HINT_PATTERNS = [
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry (?:in|after)\s*(\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Blocks until `amount` tokens are available, takes them and returns the seconds waited.
+
+        Requests larger than the capacity are allowed once the bucket is full, so a single
+        oversized prompt cannot block forever.
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill_locked()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                wait = (amount - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, amount: float):
+        """Debits (positive) or credits (negative) tokens after the fact, e.g. actual vs estimated usage."""
+        with self._lock:
+            self._refill_locked()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit that shrinks multiplicatively on throttling and grows additively on success."""
+
+    def __init__(self, max_limit: int, min_limit: int = DEFAULT_MIN_CONCURRENCY):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                logging.info(f"LLM concurrency limit raised to {self.limit}.")
+                self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < THROTTLE_COOLDOWN_SECONDS:
+                return
+            self._last_decrease = now
+            self._successes = 0
+            new_limit = max(self.min_limit, self.limit // 2)
+            if new_limit != self.limit:
+                logging.warning(f"LLM requests throttled; concurrency limit lowered from {self.limit} to {new_limit}.")
+                self.limit = new_limit
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for 429 / quota-exhausted errors from the Gemini client (or anything that looks like one)."""
+    if getattr(error, "code", None) == 429:
+        return True
+    name = type(error).__name__
+    if name in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Client errors (4xx other than 408/429) will fail the same way again, so they are not retried."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and 400 <= code < 500 and code not in (408, 429):
+        return False
+    return True
+
+
+def parse_retry_after(value) -> float | None:
+    """Parses a Retry-After value, either delay-seconds or an HTTP-date, into seconds from now (None if invalid)."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None or retry_at.tzinfo is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """Extracts a server retry hint (Retry-After header or Gemini retry_delay) from an error, if any."""
+    if getattr(error, "retry_after", None) is not None:
+        return float(error.retry_after)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+    text = str(error)
+    for pattern in RETRY_HINT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float = DEFAULT_BACKOFF_MAX_SECONDS,
+                  retry_after: float | None = None) -> float:
+    """Exponential backoff with full jitter for retry `attempt` (1-based), never shorter than a server hint."""
+    delay = random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+
+class Reservation:
+    """The concurrency limiter a request was admitted by, so its release and feedback reach the same one."""
+
+    def __init__(self, concurrency: AdaptiveConcurrencyLimiter | None):
+        self.concurrency = concurrency
+
+
+class LLMRateLimiter:
+    """Combines the RPM/TPM buckets, adaptive concurrency and a shared throttling pause."""
+
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.concurrency = AdaptiveConcurrencyLimiter(max_concurrency) if max_concurrency > 0 else None
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "retries": 0, "wait_s": 0.0}
+
+    def _wait_for_pause(self) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self._pause_until - time.monotonic()
+            if remaining <= 0:
+                return waited
+            time.sleep(remaining)
+            waited += remaining
+
+    @contextmanager
+    def reserve(self, estimated_tokens: int = 0):
+        """Holds a rate-limited, concurrency-limited slot for one LLM request; yields its Reservation.
+
+        Pass the reservation to record_success/record_failure: set_max_concurrency may swap the
+        limiter while the request is in flight, and the feedback belongs to the one it acquired.
+        """
+        # Read once: acquire, release and feedback must all use the same limiter
+        concurrency = self.concurrency
+        waited = self._wait_for_pause()
+        if self.requests is not None:
+            waited += self.requests.acquire(1)
+        if self.tokens is not None and estimated_tokens:
+            waited += self.tokens.acquire(estimated_tokens)
+        if concurrency is not None:
+            concurrency.acquire()
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["wait_s"] += waited
+        try:
+            yield Reservation(concurrency)
+        finally:
+            if concurrency is not None:
+                concurrency.release()
+
+    def _concurrency_for(self, reservation: Reservation | None) -> AdaptiveConcurrencyLimiter | None:
+        return reservation.concurrency if reservation is not None else self.concurrency
+
+    def record_success(self, estimated_tokens: int = 0, actual_tokens: int | None = None,
+                       reservation: Reservation | None = None):
+        concurrency = self._concurrency_for(reservation)
+        if concurrency is not None:
+            concurrency.on_success()
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def record_failure(self, error: Exception, attempt: int, base_delay: float,
+                       reservation: Reservation | None = None) -> float:
+        """Registers a failed attempt and returns how long to back off before the next one."""
+        hint = retry_after_seconds(error)
+        delay = backoff_delay(attempt, base_delay, retry_after=hint)
+        with self._lock:
+            self._stats["retries"] += 1
+            if is_rate_limit_error(error):
+                self._stats["throttled"] += 1
+                # Pause every caller, not just this one, so the whole process backs off together
+                self._pause_until = max(self._pause_until, time.monotonic() + delay)
+        concurrency = self._concurrency_for(reservation)
+        if is_rate_limit_error(error) and concurrency is not None:
+            concurrency.on_throttle()
+        return delay
+
+    def set_max_concurrency(self, limit: int | None):
+        self.concurrency = AdaptiveConcurrencyLimiter(limit) if limit and limit > 0 else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_s"] = round(stats["wait_s"], 3)
+        if self.concurrency is not None:
+            stats["concurrency_limit"] = self.concurrency.limit
+            stats["max_concurrency"] = self.concurrency.max_limit
+            stats["in_flight"] = self.concurrency.in_flight
+        stats["paused_for_s"] = round(max(0.0, self._pause_until - time.monotonic()), 3)
+        return stats
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Returns the process-wide LLM rate limiter."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = LLMRateLimiter()
+            logging.info(f"LLM rate limiter: {DEFAULT_REQUESTS_PER_MINUTE:g} RPM, {DEFAULT_TOKENS_PER_MINUTE:g} TPM, "
+                         f"max concurrency {DEFAULT_MAX_CONCURRENCY or 'unlimited'}.")
+        return _limiter
+
+
+def set_rate_limiter(limiter: LLMRateLimiter):
+    """Replaces the process-wide limiter, e.g. with LLMRateLimiter(0, 0, 0) to disable limiting in benchmarks."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
+
+
+def _collect_rate_limiter_metrics() -> list:
+    """Exposes throttling and the adaptive concurrency limit on /metrics."""
+    if _limiter is None:
+        return []
+    stats = _limiter.stats()
+    families = [
+        ("llm_throttled_total", "counter", "LLM requests rejected with 429 / quota errors.", [({}, stats["throttled"])]),
+        ("llm_rate_limit_wait_seconds_total", "counter", "Time spent waiting for rate limit tokens or throttling pauses.", [({}, stats["wait_s"])]),
+    ]
+    if "concurrency_limit" in stats:
+        families.append(("llm_concurrency_limit", "gauge", "Current adaptive limit on LLM requests in flight.", [({}, stats["concurrency_limit"])]))
+    return families
+
+
+REGISTRY.register_collector(_collect_rate_limiter_metrics)
@@ -1,4 +1,6 @@
-from llm_analyzer import analyze_text_with_llm
+from llm_analyzer import analyze_text_with_llm, json_reply_validator
+from readability_metrics import (compute_readability_metrics, is_clearly_readable, local_readability_result,
+                                 DEFAULT_LOCAL_READABILITY_MODE)
 import logging
 import json
 
@@ -40,10 +42,33 @@ Provide your analysis *only* as a JSON object (no surrounding text or markdown f
 Analyze the following text:
 """
 
+def validate_readability_data(analysis_data) -> dict:
+    """Checks a parsed readability result against the expected schema, raising ValueError if it does not match."""
+    if not isinstance(analysis_data, dict):
+        raise ValueError("LLM response is not a JSON object.")
+    required_keys = ["score", "assessment", "issues", "suggestions"]
+    if not all(k in analysis_data for k in required_keys):
+        raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
+    if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
+        raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+    return analysis_data
+
 def analyze_readability(article_content: str) -> dict | None:
-    """Analyzes the readability for a non-technical marketer using the LLM and returns a structured dict."""
+    """Analyzes the readability for a non-technical marketer using the LLM and returns a structured dict.
+
+    Local metrics (Flesch-Kincaid grade, sentence length, jargon density) are attached under "metrics"
+    unless LOCAL_READABILITY=off. With LOCAL_READABILITY=threshold, text the metrics show is clearly
+    readable is scored "Good" locally and the LLM call is skipped.
+    """
     logging.info("Starting readability analysis (with assessment)...")
-    analysis_text = analyze_text_with_llm(READABILITY_PROMPT, article_content)
+    local_mode = DEFAULT_LOCAL_READABILITY_MODE
+    metrics = compute_readability_metrics(article_content) if local_mode != "off" else None
+    if local_mode == "threshold" and is_clearly_readable(metrics):
+        logging.info(f"Local metrics show the text is clearly readable (grade {metrics['flesch_kincaid_grade']}); skipping the LLM call.")
+        return local_readability_result(metrics)
+
+    analysis_text = analyze_text_with_llm(READABILITY_PROMPT, article_content,
+                                          cache_if=json_reply_validator(validate_readability_data))
 
     default_error_structure = {
         "score": "Error",
@@ -62,12 +87,9 @@ def analyze_readability(article_content: str) -> dict | None:
         cleaned_text = analysis_text.strip().strip("`json\n").strip("\n```")
         analysis_data = json.loads(cleaned_text)
 
-        # Basic validation of the new structure
-        required_keys = ["score", "assessment", "issues", "suggestions"]
-        if not all(k in analysis_data for k in required_keys):
-            raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
-        if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
-            raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+        validate_readability_data(analysis_data)
+        if metrics is not None:
+            analysis_data["metrics"] = metrics
 
         logging.info("Readability analysis completed and parsed successfully.")
         return analysis_data
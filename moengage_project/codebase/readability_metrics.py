@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Local readability metrics computed with NumPy over token and sentence arrays.
+
+Works on one article or a whole corpus at once: every word of every article goes
+into flat arrays tagged with its article and sentence ids, syllables are counted on
+a single byte buffer, and per-article figures come from `np.bincount` reductions.
+Reports sentence length, syllables per word, Flesch reading ease, Flesch-Kincaid
+grade, Gunning fog and jargon density, and decides whether an article is clearly
+readable enough to skip the LLM readability review.
+"""
+import logging
+import os
+import re
+import sys
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# "report": compute and include in the report; "threshold": also skip the LLM for clearly Good articles; "off"
+LOCAL_READABILITY_MODES = ("off", "report", "threshold")
+DEFAULT_LOCAL_READABILITY_MODE = os.getenv("LOCAL_READABILITY", "report").lower()
+if DEFAULT_LOCAL_READABILITY_MODE not in LOCAL_READABILITY_MODES:
+    raise ValueError(f"Unknown LOCAL_READABILITY mode '{DEFAULT_LOCAL_READABILITY_MODE}'. Expected one of: {LOCAL_READABILITY_MODES}")
+
+# An article is "clearly Good" only if it meets every one of these
+GOOD_MAX_GRADE = float(os.getenv("READABILITY_GOOD_MAX_GRADE", "8"))
+GOOD_MAX_JARGON_DENSITY = float(os.getenv("READABILITY_GOOD_MAX_JARGON", "0.02"))
+GOOD_MAX_LONG_SENTENCE_RATIO = float(os.getenv("READABILITY_GOOD_MAX_LONG_SENTENCES", "0.1"))
+MIN_WORDS_FOR_THRESHOLD = 50
+
+LONG_SENTENCE_WORDS = 25
+TOP_JARGON_TERMS = 10
+
+# Words start with a letter or digit in any script (so "café" and "naïve" are one word each)
+WORD_RE = re.compile(r"[^\W_][\w'-]*")
+# Sentences end at terminal punctuation followed by whitespace, or at a line break (headings, list items)
+SENTENCE_END_RE = re.compile(r"[.!?]+(?=\s|$)|\n")
+VOWEL_BYTES = np.frombuffer(b"aeiouy", dtype=np.uint8)
+
+# Technical terms a non-technical marketer is unlikely to know (matched case-insensitively)
+JARGON_TERMS = frozenset("""
+api apis sdk sdks endpoint endpoints payload payloads json xml http https url urls uri oauth oauth2 token tokens
+webhook webhooks callback callbacks backend frontend runtime config configs configuration parameter parameters
+param params attribute attributes schema schemas query queries integration integrations instantiate initialize
+initialise initialization deprecated async synchronous asynchronous latency cache caching authentication
+authorization auth repository dependency dependencies gradle maven manifest plugin plugins module modules
+cli javascript typescript kotlin swift java android ios xcode firebase fcm apns tls ssl hash encryption
+""".split())
+# Product names that look like jargon (mixed case) but are familiar to the audience
+NOT_JARGON_TERMS = frozenset(["moengage"])
+
+
+def _sentence_word_counts(text: str, starts: np.ndarray) -> np.ndarray:
+    """Number of words in each non-empty sentence of one text, given the words' start offsets."""
+    ends = np.fromiter((m.end() for m in SENTENCE_END_RE.finditer(text)), dtype=np.int64)
+    sentence_ids = np.searchsorted(ends, starts, side="right")
+    return np.bincount(sentence_ids)[np.unique(sentence_ids)]
+
+
+def count_syllables(words: list[str]) -> np.ndarray:
+    """Vectorized syllable estimate: vowel groups per word, minus a silent final 'e', at least 1."""
+    if not words:
+        return np.zeros(0, dtype=np.int64)
+    lowered = [w.lower() for w in words]
+    # 'replace' keeps one byte per character, so word boundaries stay aligned
+    buffer = np.frombuffer(" ".join(lowered).encode("ascii", "replace"), dtype=np.uint8)
+    is_vowel = np.isin(buffer, VOWEL_BYTES)
+    group_start = is_vowel & ~np.concatenate(([False], is_vowel[:-1]))
+    word_ids = np.cumsum(buffer == ord(" "))
+    counts = np.bincount(word_ids[group_start], minlength=len(words))
+
+    lengths = np.fromiter((len(w) for w in lowered), dtype=np.int64, count=len(lowered))
+    last_index = np.cumsum(lengths + 1) - 2
+    silent_e = (buffer[last_index] == ord("e")) & (buffer[np.maximum(last_index - 1, 0)] != ord("l")) & (counts > 1)
+    return np.maximum(counts - silent_e, 1)
+
+
+def jargon_mask(words: np.ndarray) -> np.ndarray:
+    """Flags known technical terms, acronyms (API, SDK), camelCase identifiers and snake_case names."""
+    lowered = np.char.lower(words)
+    known_term = np.isin(lowered, list(JARGON_TERMS))
+    acronym = np.char.isupper(words) & np.char.isalpha(words) & (np.char.str_len(words) >= 2)
+    # Mixed case other than plain or hyphenated capitalization (OAuth, iPhone, userId but not One-Step)
+    camel = ((np.char.capitalize(words) != words) & (np.char.title(words) != words)
+             & ~np.char.isupper(words) & ~np.char.islower(words))
+    snake = np.char.find(words, "_") >= 0
+    return (known_term | acronym | camel | snake) & ~np.isin(lowered, list(NOT_JARGON_TERMS))
+
+
+def compute_corpus_metrics(texts: list[str]) -> list[dict]:
+    """Computes readability metrics for every text in one vectorized pass over all their words."""
+    all_words = []
+    word_doc = []
+    sentence_lengths = []
+    for doc_id, text in enumerate(texts):
+        matches = list(WORD_RE.finditer(text or ""))
+        if not matches:
+            sentence_lengths.append(np.zeros(0, dtype=np.int64))
+            continue
+        starts = np.fromiter((m.start() for m in matches), dtype=np.int64, count=len(matches))
+        sentence_lengths.append(_sentence_word_counts(text, starts))
+        all_words.extend(m.group() for m in matches)
+        word_doc.append(np.full(len(matches), doc_id, dtype=np.int64))
+
+    n_docs = len(texts)
+    word_doc = np.concatenate(word_doc) if word_doc else np.zeros(0, dtype=np.int64)
+    words = np.array(all_words, dtype=str) if all_words else np.zeros(0, dtype=str)
+    syllables = count_syllables(all_words)
+    jargon = jargon_mask(words) if len(words) else np.zeros(0, dtype=bool)
+    complex_words = (syllables >= 3) & ~jargon
+
+    word_counts = np.bincount(word_doc, minlength=n_docs)
+    syllable_counts = np.bincount(word_doc, weights=syllables, minlength=n_docs)
+    jargon_counts = np.bincount(word_doc, weights=jargon, minlength=n_docs)
+    complex_counts = np.bincount(word_doc, weights=complex_words, minlength=n_docs)
+
+    results = []
+    for doc_id in range(n_docs):
+        n_words = int(word_counts[doc_id])
+        lengths = sentence_lengths[doc_id]
+        n_sentences = int(len(lengths))
+        if n_words == 0 or n_sentences == 0:
+            results.append({"words": 0, "sentences": 0})
+            continue
+        words_per_sentence = n_words / n_sentences
+        syllables_per_word = syllable_counts[doc_id] / n_words
+        doc_jargon = words[(word_doc == doc_id) & jargon]
+        terms, term_counts = np.unique(np.char.lower(doc_jargon), return_counts=True) if len(doc_jargon) else ([], [])
+        top_terms = [str(terms[i]) for i in np.argsort(-np.asarray(term_counts), kind="stable")[:TOP_JARGON_TERMS]]
+        results.append({
+            "words": n_words,
+            "sentences": n_sentences,
+            "avg_sentence_length": round(words_per_sentence, 2),
+            "p90_sentence_length": float(np.percentile(lengths, 90)),
+            "long_sentence_ratio": round(float(np.mean(lengths > LONG_SENTENCE_WORDS)), 3),
+            "avg_syllables_per_word": round(float(syllables_per_word), 3),
+            "flesch_reading_ease": round(float(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word), 1),
+            "flesch_kincaid_grade": round(float(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59), 1),
+            "gunning_fog": round(float(0.4 * (words_per_sentence + 100 * complex_counts[doc_id] / n_words)), 1),
+            "jargon_density": round(float(jargon_counts[doc_id] / n_words), 4),
+            "top_jargon": top_terms,
+        })
+    return results
+
+
+def compute_readability_metrics(text: str) -> dict:
+    """Computes readability metrics for a single article."""
+    return compute_corpus_metrics([text])[0]
+
+
+def is_clearly_readable(metrics: dict) -> bool:
+    """True when the local metrics are comfortably inside every "Good" threshold."""
+    return (
+        metrics.get("words", 0) >= MIN_WORDS_FOR_THRESHOLD
+        and metrics["flesch_kincaid_grade"] <= GOOD_MAX_GRADE
+        and metrics["jargon_density"] <= GOOD_MAX_JARGON_DENSITY
+        and metrics["long_sentence_ratio"] <= GOOD_MAX_LONG_SENTENCE_RATIO
+    )
+
+
+def local_readability_result(metrics: dict) -> dict:
+    """Builds a readability result (same schema as the LLM one) from local metrics alone."""
+    return {
+        "score": "Good",
+        "assessment": (f"Local metrics indicate the article is easy to read (Flesch-Kincaid grade "
+                       f"{metrics['flesch_kincaid_grade']}, {metrics['avg_sentence_length']} words per sentence, "
+                       f"jargon density {metrics['jargon_density']:.1%}); the LLM readability review was skipped."),
+        "issues": [],
+        "suggestions": [],
+        "metrics": metrics,
+    }
+
+
+# Example usage: print metrics for text files (or every .txt file in a folder)
+if __name__ == '__main__':
+    paths = []
+    for arg in sys.argv[1:]:
+        if os.path.isdir(arg):
+            paths.extend(sorted(os.path.join(arg, name) for name in os.listdir(arg) if name.endswith(".txt")))
+        else:
+            paths.append(arg)
+    if not paths:
+        print("Usage: python readability_metrics.py <file.txt|folder> [...]")
+        sys.exit(1)
+    texts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    print(f"{'file':<50}{'words':>7}{'FK grade':>10}{'ease':>7}{'fog':>6}{'jargon':>8}  clearly good")
+    for path, metrics in zip(paths, compute_corpus_metrics(texts)):
+        if not metrics["words"]:
+            print(f"{os.path.basename(path)[:49]:<50}{0:>7}")
+            continue
+        print(f"{os.path.basename(path)[:49]:<50}{metrics['words']:>7}{metrics['flesch_kincaid_grade']:>10}"
+              f"{metrics['flesch_reading_ease']:>7}{metrics['gunning_fog']:>6}{metrics['jargon_density']:>8.1%}  "
+              f"{is_clearly_readable(metrics)}")
@@ -4,6 +4,7 @@ import datetime
 import logging
 import json
 from collections import Counter
+from metrics import timed_stage
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -86,10 +87,11 @@ def generate_report(url: str, analyses: dict, output_format: str = "json") -> st
         logging.warning(f"Unsupported report format: {output_format}. Defaulting to JSON.")
         return generate_json_report(url, analyses)
 
-def generate_json_report(url: str, analyses: dict) -> str:
-    """Formats the analysis results into the specified JSON structure (using new detailed format)."""
-    logging.info(f"Generating JSON report for {url} (using new detailed format)...")
+def build_report_data(url: str, analyses: dict, sections: list[dict] | None = None) -> dict:
+    """Builds the JSON report as a dict ({"url", "timestamp", "overall_score", "analysis"[, "sections"]}).
 
+    `sections` (from incremental analysis) lists each article section with its "fresh"/"reused" status.
+    """
     analysis_data = {}
     key_map = {
         "Readability": "readability",
@@ -118,6 +120,18 @@ def generate_json_report(url: str, analyses: dict) -> str:
         "overall_score": overall_score,
         "analysis": analysis_data
     }
+    if sections:
+        report_data["sections"] = sections
+    return report_data
+
+@timed_stage("report_json")
+def generate_json_report(url: str, analyses: dict, sections: list[dict] | None = None) -> str:
+    """Formats the analysis results into the specified JSON structure (using new detailed format).
+
+    `sections` (from incremental analysis) lists each article section with its "fresh"/"reused" status.
+    """
+    logging.info(f"Generating JSON report for {url} (using new detailed format)...")
+    report_data = build_report_data(url, analyses, sections=sections)
 
     try:
         json_output = json.dumps(report_data, indent=2)
@@ -130,12 +144,13 @@ def generate_json_report(url: str, analyses: dict) -> str:
             "url": url,
             "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
             "overall_score": "Error",
-            "analysis": {key: DEFAULT_ERROR_MAP[key].copy() for key in key_map.values()},
+            "analysis": {key: DEFAULT_ERROR_MAP[key].copy() for key in DEFAULT_ERROR_MAP},
             "error_details": f"Failed to generate JSON report: {str(e)}"
         }
         return json.dumps(error_data, indent=2)
 
-def generate_markdown_report(url: str, analyses: dict) -> str:
+@timed_stage("report_markdown")
+def generate_markdown_report(url: str, analyses: dict, sections: list[dict] | None = None) -> str:
     """Formats the analysis results into a Markdown report (using new detailed structured input)."""
     logging.info(f"Generating Markdown report for {url} (using new detailed format)...")
 
@@ -187,7 +202,13 @@ def generate_markdown_report(url: str, analyses: dict) -> str:
                     report_content += f"  - H2: {counts.get('h2', 'N/A')}\n"
                     report_content += f"  - H3: {counts.get('h3', 'N/A')}\n"
                     report_content += f"  - Paragraphs: {counts.get('paragraphs', 'N/A')}\n"
-                    report_content += f"  - Lists: {counts.get('lists', 'N/A')}\n\n"
+                    report_content += f"  - Lists: {counts.get('lists', 'N/A')}\n"
+                    # Extra counts are present when they came from the page outline
+                    for count_key, label in (("list_items", "List Items"), ("code_blocks", "Code Blocks"),
+                                             ("tables", "Tables"), ("images", "Images"), ("links", "Links")):
+                        if count_key in counts:
+                            report_content += f"  - {label}: {counts[count_key]}\n"
+                    report_content += "\n"
                 analysis = section_data.get("analysis", {})
                 if isinstance(analysis, dict):
                     report_content += f"**Sub-Analysis:**\n"
@@ -197,6 +218,19 @@ def generate_markdown_report(url: str, analyses: dict) -> str:
                 if isinstance(flow_nav, dict):
                      report_content += f"**Flow & Navigation Assessment:** {flow_nav.get('assessment', 'N/A')}\n\n"
 
+            # Handle Readability local metrics
+            elif key == "Readability" and isinstance(section_data.get("metrics"), dict) and section_data["metrics"].get("words"):
+                metrics = section_data["metrics"]
+                report_content += f"**Local Metrics:**\n"
+                report_content += f"  - Words / Sentences: {metrics.get('words')} / {metrics.get('sentences')}\n"
+                report_content += f"  - Avg. Sentence Length: {metrics.get('avg_sentence_length')} words (90th percentile {metrics.get('p90_sentence_length')})\n"
+                report_content += f"  - Syllables per Word: {metrics.get('avg_syllables_per_word')}\n"
+                report_content += f"  - Flesch-Kincaid Grade: {metrics.get('flesch_kincaid_grade')} (Reading Ease {metrics.get('flesch_reading_ease')})\n"
+                report_content += f"  - Jargon Density: {metrics.get('jargon_density', 0):.1%}"
+                if metrics.get("top_jargon"):
+                    report_content += f" ({', '.join(metrics['top_jargon'])})"
+                report_content += "\n\n"
+
             # Handle Style specific fields
             elif key == "Style":
                 analysis = section_data.get("analysis", {})
@@ -231,6 +265,15 @@ def generate_markdown_report(url: str, analyses: dict) -> str:
             report_content += f"*Analysis data for this section is missing or malformed.*\n\n"
         report_content += "---\n\n"
 
+    # Mark which article sections were re-analyzed and which reused stored results
+    if sections:
+        fresh_count = sum(1 for s in sections if s.get("status") == "fresh")
+        report_content += "## Article Sections\n\n"
+        report_content += f"**Re-analyzed:** {fresh_count} of {len(sections)} sections (the rest reused stored results)\n\n"
+        for section in sections:
+            report_content += f"- [{section.get('status', 'fresh')}] {section.get('heading') or '(Introduction)'}\n"
+        report_content += "\n---\n\n"
+
     logging.info(f"Markdown report generated successfully for {url}.")
     return report_content
 
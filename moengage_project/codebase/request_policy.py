@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Allow/deny policy for the requests a scraped page makes.
+
+The scraper only needs the article text, so by default pages load their HTML and
+first-party scripts (needed by client-rendered pages) and nothing else: images, media,
+fonts, stylesheets, analytics and chat widgets are aborted before they hit the network.
+Resource types and domains are configurable through environment variables.
+"""
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+
+from metrics import REGISTRY
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def _env_list(name: str, default: str) -> list[str]:
+    return [item.strip().lower() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+# "text" applies the policy below; "off" lets every request through
+REQUEST_POLICY_MODE = os.getenv("SCRAPER_REQUEST_POLICY", "text").lower()
+# Playwright resource types: document, stylesheet, image, media, font, script, texttrack, xhr, fetch,
+# eventsource, websocket, manifest, other
+BLOCKED_RESOURCE_TYPES = _env_list("SCRAPER_BLOCK_RESOURCE_TYPES", "image,media,font,stylesheet,texttrack,manifest,websocket,eventsource,other")
+# Scripts and XHR/fetch calls from other sites than the page's (analytics, widgets, ads)
+BLOCK_THIRD_PARTY_SCRIPTS = os.getenv("SCRAPER_BLOCK_THIRD_PARTY_SCRIPTS", "1").lower() not in ("0", "false", "no")
+# Domains (and their subdomains) always allowed / always blocked, whatever the resource type
+ALLOWED_DOMAINS = _env_list("SCRAPER_ALLOW_DOMAINS", "")
+DENIED_DOMAINS = _env_list(
+    "SCRAPER_DENY_DOMAINS",
+    "google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,hotjar.com,segment.com,segment.io,"
+    "intercom.io,intercomcdn.com,drift.com,hubspot.com,hs-scripts.com,newrelic.com,nr-data.net,sentry.io,"
+    "fullstory.com,mixpanel.com,amplitude.com,zopim.com,zendesk-chat.com,optimizely.com,clarity.ms",
+)
+SCRIPT_RESOURCE_TYPES = ("script", "xhr", "fetch")
+
+REQUESTS_ROUTED = REGISTRY.counter("scrape_page_requests_total", "Sub-requests made by scraped pages, by decision and resource type.")
+
+
+def _matches_domain(host: str, domains: list[str]) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+def site_of(host: str) -> str:
+    """Approximates the registrable domain as the last two labels (help.moengage.com -> moengage.com)."""
+    labels = host.lower().rstrip(".").split(".")
+    return ".".join(labels[-2:])
+
+
+class RequestPolicy:
+    """Decides per request whether a scraped page may load it."""
+
+    def __init__(self, mode: str = REQUEST_POLICY_MODE, blocked_resource_types=BLOCKED_RESOURCE_TYPES,
+                 block_third_party_scripts: bool = BLOCK_THIRD_PARTY_SCRIPTS, allowed_domains=ALLOWED_DOMAINS,
+                 denied_domains=DENIED_DOMAINS):
+        self.enabled = mode != "off"
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.block_third_party_scripts = block_third_party_scripts
+        self.allowed_domains = list(allowed_domains)
+        self.denied_domains = list(denied_domains)
+
+    def allows(self, resource_type: str, url: str, page_host: str) -> bool:
+        """True if a request of this resource type to url may be made by a page on page_host."""
+        if not self.enabled:
+            return True
+        host = (urlparse(url).hostname or "").lower()
+        if resource_type == "document":
+            # The page itself always loads; frames (chat widgets, embeds) only if not denied
+            return host == page_host or not _matches_domain(host, self.denied_domains)
+        if not host:
+            # data: and blob: URLs never hit the network
+            return resource_type not in self.blocked_resource_types
+        if _matches_domain(host, self.allowed_domains):
+            return True
+        if _matches_domain(host, self.denied_domains):
+            return False
+        if resource_type in self.blocked_resource_types:
+            return False
+        if self.block_third_party_scripts and resource_type in SCRIPT_RESOURCE_TYPES:
+            return site_of(host) == site_of(page_host)
+        return True
+
+    def route_handler(self, page_url: str):
+        """Returns a Playwright route handler applying the policy for a page loaded from page_url."""
+        page_host = (urlparse(page_url).hostname or "").lower()
+
+        def handle(route):
+            request = route.request
+            allowed = self.allows(request.resource_type, request.url, page_host)
+            REQUESTS_ROUTED.inc(decision="allowed" if allowed else "blocked", resource_type=request.resource_type)
+            if allowed:
+                route.continue_()
+            else:
+                route.abort("blockedbyclient")
+
+        return handle
+
+    def apply(self, page, page_url: str):
+        """Installs the policy on a page before it navigates (no-op when the policy is off)."""
+        if self.enabled:
+            page.route("**/*", self.route_handler(page_url))
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_request_policy() -> RequestPolicy:
+    """Returns the process-wide request policy, built from the environment on first use."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = RequestPolicy()
+        return _policy
+
+
+# Example usage: show what the default policy does with a few typical help-center requests
+if __name__ == '__main__':
+    policy = get_request_policy()
+    page = "https://help.moengage.com/hc/en-us/articles/123"
+    for resource_type, url in [
+        ("document", page),
+        ("script", "https://help.moengage.com/hc/theme.js"),
+        ("script", "https://static.moengage.com/widget.js"),
+        ("script", "https://www.googletagmanager.com/gtm.js"),
+        ("script", "https://cdn.example-widgets.com/chat.js"),
+        ("xhr", "https://help.moengage.com/api/v2/help_center/articles.json"),
+        ("image", "https://help.moengage.com/hc/article_attachments/1.png"),
+        ("stylesheet", "https://help.moengage.com/hc/theme.css"),
+        ("font", "https://fonts.gstatic.com/s/roboto.woff2"),
+    ]:
+        print(f"{'allow' if policy.allows(resource_type, url, 'help.moengage.com') else 'block':<6} {resource_type:<11} {url}")
@@ -8,8 +8,9 @@ import re # Import re for link handling
 from urllib.parse import urlparse
 
 # Assuming llm_analyzer is in the same directory or accessible via PYTHONPATH
-from llm_analyzer import analyze_text_with_llm, API_KEY, model as gemini_model
+from llm_analyzer import analyze_text_with_llm, stream_text_with_llm, llm_available, API_KEY
 from scraper import fetch_article_content
+from metrics import timed_stage
 
 # Corrected logging format string
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -84,37 +85,51 @@ def format_suggestions_for_prompt(analysis_data: dict) -> str:
                 formatted += "\n"
     return formatted.strip() if formatted else "No specific suggestions provided."
 
+def build_revision_prompt(original_article: str, analysis_data: dict) -> str | None:
+    """Builds the full revision prompt, or returns None when the report has no actionable suggestions."""
+    suggestions_formatted = format_suggestions_for_prompt(analysis_data)
+    if not suggestions_formatted or suggestions_formatted == "No specific suggestions provided.":
+        return None
+    return REVISION_PROMPT_TEMPLATE.format(
+        suggestions_formatted=suggestions_formatted,
+        original_article=original_article
+    )
+
+def clean_revision_text(revised_text: str) -> str:
+    """Basic cleanup - remove potential markdown code block fences if LLM added them."""
+    cleaned_text = revised_text.strip()
+    if cleaned_text.startswith("```text"):
+         cleaned_text = cleaned_text[len("```text"):].strip()
+    if cleaned_text.startswith("```"):
+         cleaned_text = cleaned_text[3:].strip()
+    if cleaned_text.endswith("```"):
+         cleaned_text = cleaned_text[:-3].strip()
+    return cleaned_text
+
+def is_usable_revision(revised_text: str) -> bool:
+    """True if a reply still has article text once the code fences are removed."""
+    return bool(clean_revision_text(revised_text))
+
+@timed_stage("revision")
 def revise_entire_article(original_article: str, analysis_data: dict) -> str | None:
     """Uses the LLM to revise the entire article based on structured suggestions, instructing it to preserve links."""
-    if not gemini_model:
-        logging.error("Gemini model not initialized. Cannot revise text.")
+    if not llm_available():
+        logging.error("LLM backend not initialized. Cannot revise text.")
         return None
 
-    suggestions_formatted = format_suggestions_for_prompt(analysis_data)
-    if not suggestions_formatted or suggestions_formatted == "No specific suggestions provided.":
+    full_prompt = build_revision_prompt(original_article, analysis_data)
+    if full_prompt is None:
         logging.warning("No actionable suggestions found in the report. Skipping revision.")
         # Return original article if no suggestions
         return original_article
 
-    full_prompt = REVISION_PROMPT_TEMPLATE.format(
-        suggestions_formatted=suggestions_formatted,
-        original_article=original_article
-    )
-
     logging.info("Sending request to LLM for full article revision (with link preservation instruction)...")
     # Use analyze_text_with_llm, passing the combined prompt. The 'text_content' arg is unused here.
-    revised_text = analyze_text_with_llm(prompt=full_prompt, text_content="")
+    revised_text = analyze_text_with_llm(prompt=full_prompt, text_content="", cache_if=is_usable_revision)
 
     if revised_text and not revised_text.startswith("Error:"):
         logging.info("LLM revision completed successfully.")
-        # Basic cleanup - remove potential markdown code block fences if LLM added them
-        cleaned_text = revised_text.strip()
-        if cleaned_text.startswith("```text"):
-             cleaned_text = cleaned_text[len("```text"):].strip()
-        if cleaned_text.startswith("```"):
-             cleaned_text = cleaned_text[3:].strip()
-        if cleaned_text.endswith("```"):
-             cleaned_text = cleaned_text[:-3].strip()
+        cleaned_text = clean_revision_text(revised_text)
         
         # Note: Relying on LLM to preserve links. Further post-processing could be added
         # here to verify/restore links if needed, but it's complex.
@@ -125,10 +140,57 @@ def revise_entire_article(original_article: str, analysis_data: dict) -> str | N
         logging.error(f"LLM revision failed. Error: {revised_text}")
         return None
 
+# Characters held back while streaming so a closing code fence can be stripped at the end
+STREAM_TAIL_HOLDBACK = 16
+
+def stream_revised_article(original_article: str, analysis_data: dict):
+    """Streams the revised article as text chunks while the LLM generates it.
+
+    Applies the same fence cleanup as revise_entire_article: a leading ```/```text fence is
+    dropped once enough text has arrived to recognise it, and a short tail is held back so a
+    closing fence can be removed. Raises RuntimeError if the model fails.
+    """
+    if not llm_available():
+        raise RuntimeError("LLM backend not initialized. Cannot revise text.")
+
+    full_prompt = build_revision_prompt(original_article, analysis_data)
+    if full_prompt is None:
+        logging.warning("No actionable suggestions found in the report. Streaming original article.")
+        yield original_article
+        return
+
+    logging.info("Streaming full article revision from LLM (with link preservation instruction)...")
+    buffer = ""
+    started = False
+    for chunk in stream_text_with_llm(prompt=full_prompt, text_content="", cache_if=is_usable_revision):
+        buffer += chunk
+        if not started:
+            if len(buffer.lstrip()) <= len("```text"):
+                continue
+            buffer = buffer.lstrip()
+            if buffer.startswith("```text"):
+                buffer = buffer[len("```text"):].lstrip()
+            elif buffer.startswith("```"):
+                buffer = buffer[3:].lstrip()
+            started = True
+        if len(buffer) > STREAM_TAIL_HOLDBACK:
+            yield buffer[:-STREAM_TAIL_HOLDBACK]
+            buffer = buffer[-STREAM_TAIL_HOLDBACK:]
+
+    tail = clean_revision_text(buffer) if not started else buffer.rstrip()
+    if tail.endswith("```"):
+        tail = tail[:-3].rstrip()
+    if tail:
+        yield tail
+    logging.info("Streaming revision completed.")
+
 def main_revision(
-    original_article_url: str, json_report_path: str, output_revision_path: str
+    original_article_url: str, json_report_path: str, output_revision_path: str, original_article: str | None = None
 ):
-    """Main function to drive the revision process using the new approach."""
+    """Main function to drive the revision process using the new approach.
+
+    Pass `original_article` when the caller already has the article text, so the page is not fetched again.
+    """
 
     logging.info(f"Starting revision process for URL: {original_article_url}")
     logging.info(f"Using JSON report: {json_report_path}")
@@ -139,9 +201,10 @@ def main_revision(
         logging.error("Failed to load or validate JSON report. Cannot proceed with revision.")
         return # Stop if report is invalid
 
-    logging.info("Fetching original article content...")
-    # Assuming fetch_article_content returns text with links preserved (e.g., markdown)
-    original_article = fetch_article_content(original_article_url)
+    if original_article is None:
+        logging.info("Fetching original article content...")
+        # Assuming fetch_article_content returns text with links preserved (e.g., markdown)
+        original_article = fetch_article_content(original_article_url)
     if not original_article:
         logging.error("Failed to fetch original article content. Cannot proceed with revision.")
         return
@@ -206,8 +269,8 @@ if __name__ == "__main__":
     if not os.path.exists(json_report_input_path):
         print(f"\nERROR: JSON report not found at expected location: {json_report_input_path}")
         print("Please run the main analysis agent (main.py) first to generate the report.")
-    elif API_KEY == "YOUR_API_KEY" or not gemini_model:
-        print("\nERROR: GOOGLE_API_KEY not configured or Gemini model not initialized.")
+    elif API_KEY == "YOUR_API_KEY" or not llm_available():
+        print("\nERROR: GOOGLE_API_KEY not configured or LLM backend not initialized.")
         print("Please set the environment variable and ensure llm_analyzer is configured.")
     else:
         print("\nStarting revision agent...")
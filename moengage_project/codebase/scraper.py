@@ -1,120 +1,338 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import logging
+import os
+import threading
 import time
-import re # Import regex module
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from contextlib import nullcontext
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from browser_pool import get_browser_pool, DEFAULT_USER_AGENT
+from metrics import REGISTRY, timed_stage
+from outline import extract_outline
+from page_cache import get_page_cache
+from request_policy import get_request_policy
+from text_normalizer import normalize_whitespace, normalize_with_offsets
 
 # Corrected logging format string
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def normalize_whitespace(text: str) -> str:
-    """Cleans and normalizes whitespace in the extracted text."""
-    if not text:
-        return ""
-    # Replace multiple spaces/tabs with a single space
-    text = re.sub(r'[ \t]+', ' ', text)
-    # Replace multiple newlines with max two newlines (to preserve paragraph breaks)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    # Strip leading/trailing whitespace from each line and handle paragraph spacing
-    lines = text.split('\n')
-    cleaned_lines = []
-    for i, line in enumerate(lines):
-        stripped_line = line.strip()
-        if stripped_line: # Keep non-empty lines
-            cleaned_lines.append(stripped_line)
-        elif i > 0 and cleaned_lines and cleaned_lines[-1]: # Keep a single blank line for paragraph breaks
-            cleaned_lines.append("") # Add a single blank line
-            
-    # Remove any leading/trailing blank lines potentially added
-    while cleaned_lines and not cleaned_lines[0]:
-        cleaned_lines.pop(0)
-    while cleaned_lines and not cleaned_lines[-1]:
-        cleaned_lines.pop()
-        
-    # Join lines back
-    text = '\n'.join(cleaned_lines)
-    # Final strip of leading/trailing whitespace from the whole text
-    return text.strip()
+# Try a plain HTTP GET + BeautifulSoup before starting a browser (most help-center pages render server-side)
+HTTP_FAST_PATH_ENABLED = os.getenv("SCRAPER_HTTP_FAST_PATH", "1").lower() not in ("0", "false", "no")
+HTTP_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.getenv("SCRAPER_HTTP_POOL_SIZE", "16"))
+# Static HTML with less article text than this is treated as a client-rendered shell
+MIN_STATIC_TEXT_CHARS = int(os.getenv("SCRAPER_MIN_STATIC_CHARS", "200"))
 
-def fetch_article_content(url: str) -> str | None:
-    """Fetches and extracts the main article content from a URL using Playwright."""
-    pw = None
-    browser = None
+# Try multiple selectors to work with different website structures
+CONTENT_SELECTOR = "div.article-body"
+FALLBACK_SELECTORS = [
+    "article",
+    "main",
+    "[role='main']",
+    ".content",
+    ".post-content",
+    ".entry-content",
+    "#content",
+    ".article-content",
+    ".documentation-content",
+    "body"  # Last resort
+]
+
+# Browser path timeouts (milliseconds): page navigation, the wait for the primary selector to render,
+# and a deadline on the whole selector probe (including waiting for any candidate to render enough text)
+NAVIGATION_TIMEOUT_MS = int(os.getenv("SCRAPER_NAVIGATION_TIMEOUT_MS", "30000"))
+# The selector probe waits for the article itself, so navigation need not wait for the full "load" event
+NAVIGATION_WAIT_UNTIL = os.getenv("SCRAPER_WAIT_UNTIL", "domcontentloaded")
+SELECTOR_WAIT_MS = int(os.getenv("SCRAPER_SELECTOR_WAIT_MS", "5000"))
+PROBE_DEADLINE_MS = int(os.getenv("SCRAPER_PROBE_DEADLINE_MS", "8000"))
+# Interval between probe runs while waiting. The probe scores every candidate and builds their text, so
+# Playwright's default of once per animation frame would keep the page's main thread busy while it renders
+PROBE_POLLING_MS = int(os.getenv("SCRAPER_PROBE_POLLING_MS", "250"))
+
+# Scores every candidate selector in one in-page pass and returns the best match's text and HTML.
+# The primary selector wins whenever it has text. Otherwise the score is the text outside links per
+# element (text density) weighted by the log of that text, so a whole page of navigation loses to the
+# article container inside it. For wait_for_function, `until` makes it return null until the primary
+# selector has text ("primary") or some candidate has minChars of text ("enough").
+SELECTOR_PROBE_JS = """
+({selectors, minChars, until}) => {
+    let best = null;
+    for (let i = 0; i < selectors.length; i++) {
+        for (const el of document.querySelectorAll(selectors[i])) {
+            const text = el.textContent || "";
+            const chars = text.replace(/\\s+/g, " ").trim().length;
+            if (!chars) continue;
+            let linkChars = 0;
+            for (const a of el.querySelectorAll("a")) linkChars += (a.textContent || "").trim().length;
+            const ownChars = Math.max(chars - linkChars, 1);
+            const density = ownChars / (el.getElementsByTagName("*").length + 1);
+            const score = i === 0 ? Number.MAX_VALUE : (chars >= minChars ? density * Math.log(ownChars + 1) : chars / 1e9);
+            if (!best || score > best.score) {
+                best = {selector: selectors[i], score, chars, density, text, html: el.innerHTML};
+            }
+        }
+        if (i === 0 && best) return best;
+        if (i === 0 && until === "primary") return null;
+    }
+    if (until === "enough" && (!best || best.chars < minChars)) return null;
+    return best;
+}
+"""
+
+# Statuses for which a browser would not find an article either
+HTTP_NOT_FOUND_STATUSES = (404, 410)
+
+FETCH_PATHS = REGISTRY.counter("scrape_fetch_path_total", "Articles fetched, by the path that served them (cache, revalidated, http, browser).")
+FETCH_FALLBACKS = REGISTRY.counter("scrape_http_fallbacks_total", "HTTP fast-path attempts that fell back to the browser, by reason.")
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Returns the process-wide requests session, whose connection pool is shared by all threads."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"User-Agent": DEFAULT_USER_AGENT, "Accept": "text/html,application/xhtml+xml"})
+            _session = session
+        return _session
+
+
+def extract_article_from_html(html: str | bytes) -> dict | None:
+    """Finds the article body in static HTML (text, or raw bytes to decode) using the scraper's selector list.
+
+    Returns {"text", "raw_text" (before whitespace normalization), "offsets", "outline", "html" (of the
+    matched element), "selector"}, or None when no selector (other than the whole body) matches an
+    element with at least MIN_STATIC_TEXT_CHARS of text.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for selector in [CONTENT_SELECTOR] + FALLBACK_SELECTORS:
+        # The whole <body> of a client-rendered shell is navigation and script text; leave it to the browser
+        if selector == "body":
+            break
+        element = soup.select_one(selector)
+        if element is None:
+            continue
+        # get_text() with no separator matches the browser's textContent
+        raw_text = element.get_text()
+        text, offsets = normalize_with_offsets(raw_text)
+        if len(text) >= MIN_STATIC_TEXT_CHARS:
+            html = str(element)
+            return {"text": text, "raw_text": raw_text, "offsets": offsets, "outline": extract_outline(html),
+                    "html": html, "selector": selector}
+    return None
+
+
+def _looks_like_html(body: bytes) -> bool:
+    """True if a body with no usable Content-Type starts like an HTML document (not XML, SVG or plain text)."""
+    head = body[:512].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    return head.startswith((b"<!doctype html", b"<html"))
+
+
+def _validators(response) -> dict:
+    """The ETag/Last-Modified headers of a response, for conditional requests later on."""
+    return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+
+def _fetch_with_http(url: str, cached: dict | None = None, request_slot=None) -> tuple[dict | None, str | None]:
+    """Fetch path 1: static HTML over the pooled session.
+
+    With a `cached` page (see page_cache.py) the request is conditional on its ETag/Last-Modified.
+    `request_slot(url)`, if given, is a context manager held around the request only (see fetch_article).
+    Returns (article, None) on success, (cached page with any new validators, "not_modified") on
+    HTTP 304, or (None, reason) where reason is "not_found" when the page does not exist and
+    anything else when the browser should try instead.
+    """
+    headers = {}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        pw = sync_playwright().start()
-        browser = pw.chromium.launch(headless=True)
-        page = browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        )
-        
-        logging.info(f"Navigating to {url} using Playwright...")
-        page.goto(url, timeout=30000) # 30 second timeout for navigation
-
-        # Try multiple selectors to work with different website structures
-        content_selector = "div.article-body"
-        fallback_selectors = [
-            "article",
-            "main",
-            "[role='main']",
-            ".content",
-            ".post-content",
-            ".entry-content",
-            "#content",
-            ".article-content",
-            ".documentation-content",
-            "body"  # Last resort
-        ]
-
-        article_body_element = None
-        used_selector = None
-        
-        # Try primary selector first
+        with (request_slot or nullcontext)(url):
+            response = get_http_session().get(url, timeout=HTTP_TIMEOUT_SECONDS, headers=headers)
+    except requests.RequestException as e:
+        logging.info(f"HTTP fast path failed for {url} ({e}); falling back to the browser.")
+        return None, "request_error"
+    if response.status_code == 304 and cached is not None:
+        validators = _validators(response)
+        return dict(cached, etag=validators["etag"] or cached.get("etag"),
+                    last_modified=validators["last_modified"] or cached.get("last_modified")), "not_modified"
+    if response.status_code in HTTP_NOT_FOUND_STATUSES:
+        logging.error(f"Article not found at {url} (HTTP {response.status_code}).")
+        return None, "not_found"
+    if response.status_code != 200:
+        logging.info(f"HTTP fast path got status {response.status_code} for {url}; falling back to the browser.")
+        return None, f"status_{response.status_code}"
+    # Some static servers label pages without an extension as octet-stream (or send no type at all);
+    # accept those only when the body is an HTML document
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if "html" not in content_type and (content_type not in ("", "application/octet-stream")
+                                       or not _looks_like_html(response.content)):
+        logging.info(f"{url} is not HTML ({content_type or 'no Content-Type'}); falling back to the browser.")
+        return None, "not_html"
+
+    # Without a charset in the header requests decodes text/html as ISO-8859-1; hand BeautifulSoup the raw
+    # bytes instead so it uses the page's <meta charset> or sniffs the encoding
+    has_charset = "charset=" in response.headers.get("Content-Type", "").lower()
+    article = extract_article_from_html(response.text if has_charset else response.content)
+    if article is None:
+        logging.info(f"No usable article content in the static HTML of {url}; falling back to the browser.")
+        return None, "no_content"
+    logging.info(f"Extracted content from {url} over HTTP using selector: {article.pop('selector')}")
+    article.update(_validators(response))
+    return article, None
+
+
+def _served(article: dict, fetch_path: str) -> dict:
+    FETCH_PATHS.inc(path=fetch_path)
+    raw_text, offsets = article.get("raw_text"), article.get("offsets")
+    if offsets is None and raw_text is not None:
+        # Cached pages keep the raw text only; the map is rebuilt in one linear pass
+        offsets = normalize_with_offsets(raw_text)[1]
+    return {"text": article["text"], "raw_text": raw_text, "offsets": offsets, "outline": article["outline"],
+            "fetch_path": fetch_path}
+
+
+def _store(cache, url: str, article: dict, fetch_path: str) -> dict:
+    """Saves a freshly scraped article in the page cache and returns it in fetch_article's shape."""
+    if cache is not None:
+        cache.put(url, article["text"], outline=article["outline"], html=article.get("html"), etag=article.get("etag"),
+                  last_modified=article.get("last_modified"), fetch_path=fetch_path, raw_text=article.get("raw_text"))
+    return _served(article, fetch_path)
+
+
+@timed_stage("scrape")
+def fetch_article(url: str, request_slot=None) -> dict | None:
+    """Fetches the main article from a URL: from the page cache, over plain HTTP when possible, and with Playwright otherwise.
+
+    A cached page within its TTL is returned as is. A stale one fetched over HTTP is revalidated with a
+    conditional GET, and if the site answers 304 the cached copy is used without fetching it again;
+    a stale browser-rendered one is scraped again.
+    Returns {"text": normalized article text, "raw_text": the text as extracted, "offsets": an
+    OffsetMap from positions in text to positions in raw_text (see text_normalizer.py), "outline":
+    outline of the article body (see outline.py), "fetch_path": "cache", "revalidated", "http" or
+    "browser"}, or None on failure. The outline is None if it could not be extracted; raw_text and
+    offsets are None for pages cached before raw text was kept.
+    `request_slot(url)`, if given, returns a context manager held around each request to the site
+    (the HTTP GET, or the browser's navigation) but not around cache reads or the in-page probe;
+    the crawler passes its per-host throttle here.
+    """
+    cache = get_page_cache()
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and cached["fresh"]:
+        logging.info(f"Serving {url} from the page cache.")
+        return _served(cached, "cache")
+    revalidate = cached if (cached is not None and cached["fetch_path"] == "http"
+                            and (cached["etag"] or cached["last_modified"])) else None
+
+    # A conditional GET is worth making even with the fast path off: a 304 saves the render
+    if HTTP_FAST_PATH_ENABLED or revalidate is not None:
+        article, reason = _fetch_with_http(url, revalidate, request_slot)
+        if reason == "not_modified":
+            logging.info(f"{url} is unchanged since it was cached (HTTP 304).")
+            cache.mark_revalidated(url, etag=article["etag"], last_modified=article["last_modified"])
+            return _served(article, "revalidated")
+        if reason == "not_found":
+            return None
+        if HTTP_FAST_PATH_ENABLED:
+            if article is not None:
+                return _store(cache, url, article, "http")
+            FETCH_FALLBACKS.inc(reason=reason)
+
+    article = _fetch_with_browser(url, request_slot)
+    if article is not None:
+        return _store(cache, url, article, "browser")
+    return article
+
+
+def probe_article_body(page) -> dict | None:
+    """Finds the article body with in-page probes instead of waiting on each selector in turn.
+
+    Waits up to SELECTOR_WAIT_MS for the primary selector to render text, then for the rest of the
+    PROBE_DEADLINE_MS deadline for any candidate to reach MIN_STATIC_TEXT_CHARS, and finally takes the
+    best-scoring candidate as it is. Each step checks all selectors in one evaluation.
+    Returns {"selector", "score", "chars", "density", "text", "html"}, or None if nothing matched.
+    """
+    deadline = time.monotonic() + PROBE_DEADLINE_MS / 1000
+    arg = {"selectors": [CONTENT_SELECTOR] + FALLBACK_SELECTORS, "minChars": MIN_STATIC_TEXT_CHARS}
+    for until, wait_ms in (("primary", SELECTOR_WAIT_MS), ("enough", PROBE_DEADLINE_MS)):
+        timeout_ms = min(wait_ms, (deadline - time.monotonic()) * 1000)
+        if timeout_ms <= 0:
+            break
         try:
-            page.wait_for_selector(content_selector, timeout=10000)
-            article_body_element = page.locator(content_selector).first
-            used_selector = content_selector
-            logging.info(f"Found content using primary selector: {content_selector}")
+            return page.wait_for_function(SELECTOR_PROBE_JS, arg=dict(arg, until=until),
+                                          polling=PROBE_POLLING_MS, timeout=timeout_ms).json_value()
         except PlaywrightTimeoutError:
-            logging.warning(f"Primary selector {content_selector} not found, trying fallback selectors...")
-            # Try all fallback selectors
-            for selector in fallback_selectors:
-                try:
-                    page.wait_for_selector(selector, timeout=5000)
-                    article_body_element = page.locator(selector).first
-                    used_selector = selector
-                    logging.info(f"Found content using fallback selector: {selector}")
-                    break
-                except PlaywrightTimeoutError:
-                    continue
-            
-            if article_body_element is None:
-                logging.error(f"Could not find main article body using any selector in {url}.")
-                return None
-
-        text_content = article_body_element.text_content()
-        
-        if text_content:
-            logging.info(f"Successfully extracted content from {url} using Playwright")
-            # Normalize whitespace before returning
-            normalized_content = normalize_whitespace(text_content)
-            logging.info("Applied whitespace normalization to extracted content.")
-            return normalized_content
-        else:
-            logging.warning(f"Located article body for {url}, but it contained no text.")
-            return None
+            if until == "primary":
+                logging.warning(f"Primary selector {CONTENT_SELECTOR} not found, scoring fallback selectors...")
+    logging.warning("Selector probe deadline reached; using the best candidate found so far.")
+    return page.evaluate(SELECTOR_PROBE_JS, dict(arg, until="best"))
+
+
+def _render_article(page, url: str, request_slot=None) -> dict | None:
+    """Loads url in a pooled page and probes for the article body (runs on a browser pool thread).
+
+    Returns the probe match, or None. The response's validators are not kept: they describe the HTML
+    shell, not the text the page's scripts render into it.
+    """
+    logging.info(f"Navigating to {url} using Playwright...")
+    # Text only: images, fonts, stylesheets and third-party scripts are blocked (see request_policy.py)
+    get_request_policy().apply(page, url)
+    with (request_slot or nullcontext)(url):
+        page.goto(url, timeout=NAVIGATION_TIMEOUT_MS, wait_until=NAVIGATION_WAIT_UNTIL)
 
+    probe_start = time.perf_counter()
+    match = probe_article_body(page)
+    if match is not None:
+        logging.info(f"Found content using selector {match['selector']} in {time.perf_counter() - probe_start:.2f}s "
+                     f"({match['chars']} chars, text density {match['density']:.1f}).")
+    return match
+
+
+def _fetch_with_browser(url: str, request_slot=None) -> dict | None:
+    """Fetch path 2: renders the page on the browser pool and extracts the article body."""
+    try:
+        match = get_browser_pool().run(lambda page: _render_article(page, url, request_slot))
     except PlaywrightTimeoutError as e:
         logging.error(f"Playwright timeout error accessing {url}: {e}")
         return None
     except Exception as e:
         logging.error(f"Error processing URL {url} with Playwright: {e}")
         return None
-    finally:
-        if browser:
-            browser.close()
-        if pw:
-            pw.stop()
+
+    if match is None:
+        logging.error(f"Could not find main article body using any selector in {url}.")
+        return None
+    text_content = match["text"]
+    if not text_content:
+        logging.warning(f"Located article body for {url}, but it contained no text.")
+        return None
+
+    logging.info(f"Successfully extracted content from {url} using Playwright")
+    # Normalize whitespace before returning
+    normalized_content, offsets = normalize_with_offsets(text_content)
+    logging.info("Applied whitespace normalization to extracted content.")
+    try:
+        outline = extract_outline(match["html"])
+    except Exception as e:
+        logging.warning(f"Could not extract the document outline for {url}: {e}")
+        outline = None
+    return {"text": normalized_content, "raw_text": text_content, "offsets": offsets, "outline": outline, "html": match["html"]}
+
+def fetch_article_content(url: str) -> str | None:
+    """Fetches and extracts the main article content (text only) from a URL."""
+    article = fetch_article(url)
+    return article["text"] if article else None
 
 # Example usage (for testing purposes)
 if __name__ == '__main__':
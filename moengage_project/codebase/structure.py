@@ -1,4 +1,5 @@
-from llm_analyzer import analyze_text_with_llm
+from llm_analyzer import analyze_text_with_llm, json_reply_validator
+from outline import format_outline, structure_counts
 import logging
 import json
 import re # Import re for potential counting
@@ -58,6 +59,44 @@ Provide your analysis *only* as a JSON object (no surrounding text or markdown f
 Analyze the following text:
 """
 
+# Used when the scraper extracted the page outline: counts are exact, so the LLM only assesses them
+STRUCTURE_OUTLINE_PROMPT = """
+Analyze the structure and logical flow of a documentation article from its outline.
+
+The outline below was extracted from the page markup. It lists the exact element counts, every heading
+in order (indented by level), the paragraphs, lists, code blocks, tables and images under each heading,
+and the article's links. Do not recount anything; base your assessment on these facts.
+
+**Assessment Criteria:**
+1.  **Structure Analysis:** Assess the effectiveness of the headings (hierarchy, wording, granularity), paragraph length, and list usage.
+2.  **Logical Flow & Navigability:** Assess if the information progresses logically and if it's easy to scan and find information.
+
+**Output Requirements:**
+Provide your analysis *only* as a JSON object (no surrounding text or markdown formatting) with the following exact structure:
+
+{
+  "score": "<Score>", // Overall score: Good, Fair, or Poor
+  "assessment": "<Brief overall assessment of structure and flow.>",
+  "analysis": {
+    "headings": "<Analysis of heading usage effectiveness.>",
+    "paragraphs_lists": "<Analysis of paragraph length and list usage.>"
+  },
+  "flow_navigation": {
+    "assessment": "<Assessment of logical flow and navigability.>"
+  },
+  "issues": [
+    "<Specific issue 1 related to structure/flow, naming the heading it concerns.>",
+    ...
+  ],
+  "suggestions": [
+    "<Specific suggestion 1 for structure/flow improvement.>",
+    ...
+  ]
+}
+
+Analyze the following outline:
+"""
+
 def count_elements(text: str) -> dict:
     """Basic counting of elements using regex (as a fallback or supplement)."""
     # Note: These counts might be inaccurate for complex HTML/Markdown structures
@@ -72,15 +111,49 @@ def count_elements(text: str) -> dict:
     }
     return counts
 
-def analyze_structure(article_content: str) -> dict | None:
-    """Analyzes the structure and flow using the LLM and returns a structured dict."""
+def validate_structure_data(analysis_data) -> dict:
+    """Checks a parsed structure result against the expected schema, raising ValueError if it does not match."""
+    if not isinstance(analysis_data, dict):
+        raise ValueError("LLM response is not a JSON object.")
+    required_keys = ["score", "assessment", "counts", "analysis", "flow_navigation", "issues", "suggestions"]
+    if not all(k in analysis_data for k in required_keys):
+        raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
+    if not isinstance(analysis_data["counts"], dict) or not all(k in analysis_data["counts"] for k in ["h1", "h2", "h3", "paragraphs", "lists"]):
+        raise ValueError("LLM response missing required keys in 'counts'.")
+    if not isinstance(analysis_data["analysis"], dict) or not all(k in analysis_data["analysis"] for k in ["headings", "paragraphs_lists"]):
+        raise ValueError("LLM response missing required keys in 'analysis'.")
+    if not isinstance(analysis_data["flow_navigation"], dict) or "assessment" not in analysis_data["flow_navigation"]:
+        raise ValueError("LLM response missing required keys in 'flow_navigation'.")
+    if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
+        raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+    return analysis_data
+
+def analyze_structure(article_content: str, outline: dict | None = None) -> dict | None:
+    """Analyzes the structure and flow using the LLM and returns a structured dict.
+
+    With the page `outline` (from the scraper), the counts are taken from it exactly and the LLM
+    gets the compact outline instead of the article text.
+    """
     logging.info("Starting structure and flow analysis (with counts)...")
-    analysis_text = analyze_text_with_llm(STRUCTURE_FLOW_PROMPT, article_content)
+    exact_counts = structure_counts(outline) if outline else None
+
+    def validate(data):
+        # Same check as below: exact counts replace the model's before validation
+        if exact_counts and isinstance(data, dict):
+            data = dict(data, counts=exact_counts)
+        return validate_structure_data(data)
+
+    if outline:
+        analysis_text = analyze_text_with_llm(STRUCTURE_OUTLINE_PROMPT, format_outline(outline),
+                                              cache_if=json_reply_validator(validate))
+    else:
+        analysis_text = analyze_text_with_llm(STRUCTURE_FLOW_PROMPT, article_content,
+                                              cache_if=json_reply_validator(validate))
 
     default_error_structure = {
             "score": "Error",
             "assessment": "LLM analysis failed.",
-            "counts": {"h1": 0, "h2": 0, "h3": 0, "paragraphs": 0, "lists": 0},
+            "counts": exact_counts or {"h1": 0, "h2": 0, "h3": 0, "paragraphs": 0, "lists": 0},
             "analysis": {"headings": "N/A", "paragraphs_lists": "N/A"},
             "flow_navigation": {"assessment": "N/A"},
             "issues": [f"LLM analysis failed: {analysis_text or 'No response'}"],
@@ -96,19 +169,10 @@ def analyze_structure(article_content: str) -> dict | None:
         # Clean the response
         cleaned_text = analysis_text.strip().strip("`json\n").strip("\n```")
         analysis_data = json.loads(cleaned_text)
+        if exact_counts and isinstance(analysis_data, dict):
+            analysis_data["counts"] = exact_counts
 
-        # Basic validation of the new structure
-        required_keys = ["score", "assessment", "counts", "analysis", "flow_navigation", "issues", "suggestions"]
-        if not all(k in analysis_data for k in required_keys):
-             raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
-        if not isinstance(analysis_data["counts"], dict) or not all(k in analysis_data["counts"] for k in ["h1", "h2", "h3", "paragraphs", "lists"]):
-             raise ValueError("LLM response missing required keys in 'counts'.")
-        if not isinstance(analysis_data["analysis"], dict) or not all(k in analysis_data["analysis"] for k in ["headings", "paragraphs_lists"]):
-             raise ValueError("LLM response missing required keys in 'analysis'.")
-        if not isinstance(analysis_data["flow_navigation"], dict) or "assessment" not in analysis_data["flow_navigation"]:
-             raise ValueError("LLM response missing required keys in 'flow_navigation'.")
-        if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
-             raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+        validate_structure_data(analysis_data)
 
         logging.info("Structure analysis completed and parsed successfully.")
         return analysis_data
@@ -1,6 +1,6 @@
 import logging
 import json
-from llm_analyzer import analyze_text_with_llm
+from llm_analyzer import analyze_text_with_llm, json_reply_validator
 
 # Configure logging - Corrected format string
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -45,10 +45,24 @@ Provide your analysis *only* as a JSON object (no surrounding text or markdown f
 Analyze the following text:
 """
 
+def validate_style_data(analysis_data) -> dict:
+    """Checks a parsed style result against the expected schema, raising ValueError if it does not match."""
+    if not isinstance(analysis_data, dict):
+        raise ValueError("LLM response is not a JSON object.")
+    required_keys = ["score", "assessment", "analysis", "issues", "suggestions"]
+    if not all(k in analysis_data for k in required_keys):
+        raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
+    if not isinstance(analysis_data["analysis"], dict) or not all(k in analysis_data["analysis"] for k in ["voice_tone", "clarity_conciseness", "action_oriented_language"]):
+        raise ValueError("LLM response missing required keys in 'analysis'.")
+    if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
+        raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+    return analysis_data
+
 def analyze_style(article_content: str) -> dict | None:
     """Analyzes the article content against simplified style guidelines using the LLM and returns a structured dict."""
     logging.info("Starting style guidelines analysis (with sub-assessments)...")
-    analysis_text = analyze_text_with_llm(STYLE_GUIDELINES_PROMPT, article_content)
+    analysis_text = analyze_text_with_llm(STYLE_GUIDELINES_PROMPT, article_content,
+                                          cache_if=json_reply_validator(validate_style_data))
 
     default_error_structure = {
         "score": "Error",
@@ -72,14 +86,7 @@ def analyze_style(article_content: str) -> dict | None:
         cleaned_text = analysis_text.strip().strip("`json\n").strip("\n```")
         analysis_data = json.loads(cleaned_text)
 
-        # Basic validation of the new structure
-        required_keys = ["score", "assessment", "analysis", "issues", "suggestions"]
-        if not all(k in analysis_data for k in required_keys):
-            raise ValueError(f"LLM response missing required keys. Expected: {required_keys}")
-        if not isinstance(analysis_data["analysis"], dict) or not all(k in analysis_data["analysis"] for k in ["voice_tone", "clarity_conciseness", "action_oriented_language"]):
-            raise ValueError("LLM response missing required keys in 'analysis'.")
-        if not isinstance(analysis_data["issues"], list) or not isinstance(analysis_data["suggestions"], list):
-            raise ValueError("LLM response 'issues' or 'suggestions' is not a list.")
+        validate_style_data(analysis_data)
 
         logging.info("Style analysis completed and parsed successfully.")
         return analysis_data
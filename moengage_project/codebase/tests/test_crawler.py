@@ -0,0 +1,112 @@
+"""Crawler discovery and fetching against a small help center served over http.server."""
+import functools
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import page_cache
+from crawler import HelpCenterCrawler, HostThrottle
+from llm_cache import cache_options
+from page_cache import PageCache
+from scraper import _fetch_with_http
+
+ARTICLE_BODY = "\n<p>To send your first campaign, open the dashboard and click Create Campaign.</p>" * 5
+
+
+def page(body: str) -> str:
+    return f"<!DOCTYPE html><html><head><title>Help</title></head><body>{body}</body></html>"
+
+
+# Paths have no extension, so http.server sends them as application/octet-stream like many static hosts
+SITE = {
+    "robots.txt": "User-agent: *\nDisallow: /hc/en-us/articles/999\n",
+    "hc/en-us/categories/1": page(
+        '<a href="/hc/en-us/sections/10">Getting started</a>'
+        '<a href="../sections/11">Campaigns</a>'
+        '<a href="https://elsewhere.example/hc/en-us/articles/555-External">External</a>'
+    ),
+    "hc/en-us/sections/10": page(
+        '<a href="/hc/en-us/articles/101-Alpha">Alpha</a>'
+        '<a href="/hc/en-us/articles/101-Alpha#h_01HCF71DEQ">Alpha, second heading</a>'
+        '<a href="/hc/en-us/articles/102-Beta?utm_source=section">Beta</a>'
+        '<a href="/hc/en-us/articles/999-Private">Private</a>'
+        '<a href="/hc/en-us/categories/1">Back to the category</a>'
+    ),
+    "hc/en-us/sections/11": page('<a href="/hc/en-us/articles/103-Gamma">Gamma</a>'),
+    "hc/en-us/articles/101-Alpha": page(f"<nav>Home</nav><article><h1>Alpha</h1>{ARTICLE_BODY}</article>"),
+    "hc/en-us/articles/102-Beta": page(f"<article><h1>Beta</h1>{ARTICLE_BODY}</article>"),
+    "hc/en-us/articles/103-Gamma": page(f"<article><h1>Gamma</h1>{ARTICLE_BODY}</article>"),
+    "hc/en-us/articles/999-Private": page(f"<article><h1>Private</h1>{ARTICLE_BODY}</article>"),
+    "hc/en-us/articles/feed": '<?xml version="1.0"?><feed>' + "x" * 300 + "</feed>",
+}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def site(tmp_path_factory):
+    root = tmp_path_factory.mktemp("site")
+    for path, content in SITE.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(content, encoding="utf-8")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crawler():
+    return HelpCenterCrawler(throttle=HostThrottle(max_per_host=2, delay_s=0))
+
+
+def test_discover_walks_category_and_sections(site, crawler):
+    urls = crawler.discover(f"{site}/hc/en-us/categories/1")
+
+    # Canonical and deduplicated, same host only, and without what robots.txt disallows
+    assert sorted(urls) == [
+        f"{site}/hc/en-us/articles/101-Alpha",
+        f"{site}/hc/en-us/articles/102-Beta",
+        f"{site}/hc/en-us/articles/103-Gamma",
+    ]
+
+
+def test_fetch_returns_article_text(site, crawler):
+    with cache_options(bypass=True):
+        article = crawler.fetch(f"{site}/hc/en-us/articles/101-Alpha")
+
+    assert article["fetch_path"] == "http"
+    assert article["text"].startswith("Alpha\nTo send your first campaign")
+    assert "Home" not in article["text"]
+    assert article["outline"] is not None
+
+
+def test_fetch_skips_pages_disallowed_by_robots(site, crawler):
+    with cache_options(bypass=True):
+        assert crawler.fetch(f"{site}/hc/en-us/articles/999-Private") is None
+
+
+def test_page_cache_hits_skip_the_throttle(site, tmp_path, monkeypatch):
+    monkeypatch.setattr(page_cache, "_cache", PageCache(path=str(tmp_path / "pages.sqlite3")))
+    crawler = HelpCenterCrawler(throttle=HostThrottle(max_per_host=1, delay_s=2.0))
+    url = f"{site}/hc/en-us/articles/102-Beta"
+    crawler.fetch(url)  # robots.txt and the article take the host's first two turns
+
+    start = time.monotonic()
+    article = crawler.fetch(url)
+
+    assert article["fetch_path"] == "cache"
+    assert time.monotonic() - start < 1.0
+
+
+def test_untyped_body_must_be_html(site):
+    article, reason = _fetch_with_http(f"{site}/hc/en-us/articles/feed")
+    assert article is None
+    assert reason == "not_html"
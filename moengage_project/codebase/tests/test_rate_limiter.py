@@ -0,0 +1,21 @@
+"""LLM rate limiter: a request's release and feedback reach the concurrency limiter it acquired."""
+from llm_backends import LLMBackendError
+from rate_limiter import LLMRateLimiter
+
+
+def test_swapping_the_limit_mid_request_releases_the_original_limiter():
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrency=4)
+    original = limiter.concurrency
+
+    with limiter.reserve() as reservation:
+        assert original.in_flight == 1
+        limiter.set_max_concurrency(2)
+        replacement = limiter.concurrency
+    limiter.record_failure(LLMBackendError("429 Resource exhausted", code=429), attempt=1, base_delay=0,
+                           reservation=reservation)
+
+    assert original.in_flight == 0
+    assert replacement.in_flight == 0
+    # The throttle feedback lowered the limiter the request ran under, not the new one
+    assert original.limit < 4
+    assert replacement.limit == 2
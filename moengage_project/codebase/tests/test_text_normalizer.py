@@ -0,0 +1,91 @@
+"""Equivalence of text_normalizer with the regex/split/join normalize_whitespace it replaced."""
+import random
+import re
+
+import pytest
+
+from text_normalizer import normalize_whitespace, normalize_with_offsets
+
+# Whitespace the old implementation treated differently: [ \t] was collapsed, "\n" split lines and
+# str.strip() removed everything else (CR, NBSP, vertical tab, form feed, U+001C-001F, NEL, ...)
+ALPHABET = [" ", "  ", "\t", "\n", "\n\n", "\n\n\n", "\r", "\r\n", "\xa0", "\x0b", "\x0c", "\x1c", "\x1f",
+            "\x85", " ", "　", "a", "b", "Z", "é", "1", ".", "-", "ß", "İ"]
+FUZZ_CASES = 5000
+
+
+def legacy_normalize_whitespace(text: str) -> str:
+    """normalize_whitespace as it was in scraper.py before text_normalizer.py replaced it."""
+    if not text:
+        return ""
+    # Replace multiple spaces/tabs with a single space
+    text = re.sub(r'[ \t]+', ' ', text)
+    # Replace multiple newlines with max two newlines (to preserve paragraph breaks)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    # Strip leading/trailing whitespace from each line and handle paragraph spacing
+    lines = text.split('\n')
+    cleaned_lines = []
+    for i, line in enumerate(lines):
+        stripped_line = line.strip()
+        if stripped_line: # Keep non-empty lines
+            cleaned_lines.append(stripped_line)
+        elif i > 0 and cleaned_lines and cleaned_lines[-1]: # Keep a single blank line for paragraph breaks
+            cleaned_lines.append("") # Add a single blank line
+
+    # Remove any leading/trailing blank lines potentially added
+    while cleaned_lines and not cleaned_lines[0]:
+        cleaned_lines.pop(0)
+    while cleaned_lines and not cleaned_lines[-1]:
+        cleaned_lines.pop()
+
+    # Join lines back
+    text = '\n'.join(cleaned_lines)
+    # Final strip of leading/trailing whitespace from the whole text
+    return text.strip()
+
+
+def random_texts(seed: int, count: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "\n\n\n",
+    "plain",
+    "  Getting   started \t\n\n\n\n  Install the\tSDK.  \n   \nThen   run it.\n",
+    "a\n \nb\n\n\n\nc",
+    "\xa0lead\xa0 and \x85trail\x85",
+    "x\r\ny\r\n\r\nz",
+])
+def test_matches_legacy_on_examples(text):
+    assert normalize_whitespace(text) == legacy_normalize_whitespace(text)
+    assert normalize_with_offsets(text)[0] == legacy_normalize_whitespace(text)
+
+
+def test_matches_legacy_on_random_text():
+    for text in random_texts(seed=19, count=FUZZ_CASES):
+        expected = legacy_normalize_whitespace(text)
+        assert normalize_whitespace(text) == expected, repr(text)
+        assert normalize_with_offsets(text)[0] == expected, repr(text)
+
+
+def test_offsets_point_at_matching_characters():
+    for text in random_texts(seed=20, count=FUZZ_CASES):
+        normalized, offsets = normalize_with_offsets(text)
+        for position, char in enumerate(normalized):
+            raw = text[offsets.to_raw(position)]
+            if char == " ":
+                # A collapsed run of spaces/tabs maps to its first character
+                assert raw in " \t", (repr(text), position)
+            else:
+                assert raw == char, (repr(text), position)
+
+
+def test_locate_returns_raw_span():
+    raw = "  Getting   started \t\n\n\n\n  Install the\tSDK.  \n   \nThen   run it.\n"
+    normalized, offsets = normalize_with_offsets(raw)
+    start, end = offsets.locate(normalized, "Install the SDK.")
+    assert raw[start:end] == "Install the\tSDK."
+    assert offsets.locate(normalized, "not in the text") is None
@@ -0,0 +1,68 @@
+"""Warm-up recovery: a worker whose LLM setup failed at boot becomes ready once the provider is back."""
+import sys
+import time
+import types
+
+import pytest
+
+import llm_analyzer
+import warmup
+from llm_backends import GeminiBackend
+
+
+@pytest.fixture
+def flaky_genai(monkeypatch):
+    """A google.generativeai stand-in whose client setup fails the first time only."""
+    calls = {"configure": 0}
+
+    def configure(api_key):
+        calls["configure"] += 1
+        if calls["configure"] == 1:
+            raise ConnectionError("provider unreachable")
+
+    genai = types.SimpleNamespace(configure=configure, GenerativeModel=lambda name: object(),
+                                  get_model=lambda name: {"name": name})
+    google = types.ModuleType("google")
+    google.generativeai = genai
+    monkeypatch.setitem(sys.modules, "google", google)
+    monkeypatch.setitem(sys.modules, "google.generativeai", genai)
+    return calls
+
+
+@pytest.fixture
+def cold_worker(monkeypatch):
+    monkeypatch.setattr(warmup, "_state", {"status": "cold", "started_at": None, "finished_at": None,
+                                           "failures": 0, "steps": {}})
+    monkeypatch.setattr(warmup, "WARMUP_RETRY_SECONDS", 0.2)
+    previous = llm_analyzer._backend
+    yield
+    llm_analyzer._backend = previous
+
+
+def wait_for_status(expected: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state, _ = warmup.readiness()
+        if state["status"] == expected:
+            return state
+        time.sleep(0.02)
+    raise AssertionError(f"warm-up stayed {warmup.readiness()[0]['status']}, expected {expected}")
+
+
+def test_failed_llm_setup_is_retried_after_backoff(flaky_genai, cold_worker):
+    llm_analyzer.set_llm_backend(GeminiBackend("gemini-test", api_key="test-key"))
+
+    assert warmup.start_warm_up(browsers=False)
+    state = wait_for_status("failed")
+    assert state["failures"] == 1
+    assert "provider unreachable" in state["steps"]["llm"]["error"]
+
+    # Not before the backoff has passed
+    assert not warmup.start_warm_up(browsers=False)
+    time.sleep(0.25)
+    assert warmup.start_warm_up(browsers=False)
+
+    state = wait_for_status("warm")
+    assert state["failures"] == 0
+    assert warmup.readiness()[1]
+    assert flaky_genai["configure"] == 2
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Single-pass whitespace normalizer for scraped article text, with an offset map back to the source.
+
+Produces exactly what the original regex/split/join `normalize_whitespace` did: each line is
+stripped, runs of spaces and tabs inside it become one space, lines that end up empty collapse
+into a single blank line between paragraphs, and blank lines at either end are dropped. One regex
+scan finds the non-blank lines (blank ones are never visited in Python) and one substitution
+collapses the space runs, so the cost is linear in the size of the page.
+
+`normalize_with_offsets` also returns an `OffsetMap` from positions in the normalized text to
+positions in the raw extracted text, so a quoted issue or a revision diff can be pointed at the
+exact place in the source without searching it again.
+"""
+import bisect
+import logging
+import re
+from array import array
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# One line's text from its first to its last non-whitespace character (never crosses a newline)
+LINE_CONTENT_RE = re.compile(r"\S(?:[^\n]*\S)?")
+# Inside a line, only runs of two or more spaces/tabs, or a lone tab, change
+COLLAPSIBLE_RE = re.compile(r"[ \t]{2,}|\t")
+
+
+class OffsetMap:
+    """Maps positions in normalized text back to positions in the raw text it came from.
+
+    Stored as runs: normalized positions from norm_starts[i] onwards map one-to-one to raw positions
+    from raw_starts[i]. A collapsed whitespace run maps to the start of that run, and the newlines
+    between lines map to newlines in the raw text.
+    """
+
+    def __init__(self, normalized_length: int = 0):
+        self.norm_starts = array("q")
+        self.raw_starts = array("q")
+        self.normalized_length = normalized_length
+
+    def add_run(self, norm_start: int, raw_start: int):
+        self.norm_starts.append(norm_start)
+        self.raw_starts.append(raw_start)
+
+    def to_raw(self, position: int) -> int:
+        """Raw-text position of the character at `position` in the normalized text."""
+        if not self.norm_starts:
+            raise IndexError("offset map is empty")
+        if not 0 <= position <= self.normalized_length:
+            raise IndexError(f"position {position} outside normalized text of length {self.normalized_length}")
+        i = bisect.bisect_right(self.norm_starts, position) - 1
+        return self.raw_starts[i] + (position - self.norm_starts[i])
+
+    def span_to_raw(self, start: int, end: int) -> tuple[int, int]:
+        """Raw-text span covering normalized text[start:end] (end exclusive)."""
+        if end <= start:
+            raw = self.to_raw(start)
+            return raw, raw
+        return self.to_raw(start), self.to_raw(end - 1) + 1
+
+    def locate(self, normalized_text: str, snippet: str, start: int = 0) -> tuple[int, int] | None:
+        """Finds a snippet (e.g. a sentence quoted in an analyzer issue) and returns its raw-text span."""
+        position = normalized_text.find(snippet, start)
+        if position < 0:
+            return None
+        return self.span_to_raw(position, position + len(snippet))
+
+
+def _line_breaks(text: str, previous_end: int, start: int) -> str:
+    """Separator between two content lines: one newline, or a blank line if any line between them was empty."""
+    return "\n" if text.count("\n", previous_end, start) == 1 else "\n\n"
+
+
+def _normalize(text: str) -> str:
+    # Content lines are found by one regex scan (blank lines are skipped by it), joined with their
+    # separators, and space/tab runs collapsed in one more pass; line ends are already trimmed
+    pieces = []
+    previous_end = None
+    for content in LINE_CONTENT_RE.finditer(text):
+        if previous_end is not None:
+            pieces.append(_line_breaks(text, previous_end, content.start()))
+        pieces.append(content.group())
+        previous_end = content.end()
+    return COLLAPSIBLE_RE.sub(" ", "".join(pieces))
+
+
+def _normalize_with_offsets(text: str, offsets: OffsetMap) -> str:
+    pieces = []
+    length = 0  # length of the normalized output so far
+    expected_raw = -1  # raw position that would continue the current offset run
+
+    def emit(piece: str, raw_position: int, contiguous: bool = True):
+        # Appends a piece and starts a new offset run whenever it does not continue the last one
+        nonlocal length, expected_raw
+        if raw_position != expected_raw or not contiguous:
+            offsets.add_run(length, raw_position)
+        pieces.append(piece)
+        length += len(piece)
+        expected_raw = raw_position + len(piece) if contiguous else -1
+
+    previous_end = None
+    for content in LINE_CONTENT_RE.finditer(text):
+        position, content_end = content.span()
+        if previous_end is not None:
+            # Separator newlines point at the newline after the previous line and the one before this line
+            separator = _line_breaks(text, previous_end, position)
+            emit("\n", text.index("\n", previous_end), contiguous=False)
+            if len(separator) == 2:
+                emit("\n", text.rindex("\n", previous_end, position), contiguous=False)
+        for run in COLLAPSIBLE_RE.finditer(text, position, content_end):
+            if run.start() > position:
+                emit(text[position:run.start()], position)
+            emit(" ", run.start(), contiguous=False)
+            position = run.end()
+        if content_end > position:
+            emit(text[position:content_end], position)
+        previous_end = content_end
+
+    offsets.normalized_length = length
+    return "".join(pieces)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Cleans and normalizes whitespace in the extracted text."""
+    if not text:
+        return ""
+    return _normalize(text)
+
+
+def normalize_with_offsets(text: str) -> tuple[str, OffsetMap]:
+    """Normalizes like `normalize_whitespace` and also returns the map back to positions in `text`."""
+    offsets = OffsetMap()
+    if not text:
+        return "", offsets
+    return _normalize_with_offsets(text, offsets), offsets
+
+
+# Example usage (for testing purposes)
+if __name__ == '__main__':
+    raw = "  Getting   started \t\n\n\n\n  Install the\tSDK.  \n   \nThen   run it.\n"
+    normalized, offsets = normalize_with_offsets(raw)
+    print(repr(normalized))
+    span = offsets.locate(normalized, "Install the SDK.")
+    print(span, repr(raw[span[0]:span[1]]))
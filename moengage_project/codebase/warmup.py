@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Warm-up of a server worker: brings up the LLM client, caches, HTTP session and browsers at boot.
+
+Without it the first request on each worker pays for the Gemini client setup, the Playwright
+driver start and the Chromium launch. `start_warm_up` runs the steps on a background thread
+(call it from gunicorn's post_fork hook, see gunicorn.conf.py, or when the dev server starts)
+and `readiness` reports the worker as cold, warming, warm or failed for the /health/ready check.
+A failed warm-up is started again by the next `start_warm_up` call once a backoff has passed
+(the readiness probe makes that call), so a worker recovers from e.g. a provider outage at boot.
+
+The LLM step sets up the client and makes one cheap call to the provider (the backend's
+`check`, which also retries a failed client setup), so a worker only reports ready once the
+provider answers.
+
+Browsers are warmed by launching one in each of the browser pool's owner threads (see browser_pool.py).
+"""
+import logging
+import os
+import threading
+import time
+
+from browser_pool import get_browser_pool
+from llm_analyzer import llm_ready
+from llm_cache import get_llm_cache
+from page_cache import get_page_cache
+from scraper import get_http_session, HTTP_TIMEOUT_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1").lower() not in ("0", "false", "no")
+# Launch pooled browsers at boot; without Chromium (HTTP fast path only) set to 0
+WARMUP_BROWSERS = os.getenv("WARMUP_BROWSERS", "1").lower() not in ("0", "false", "no")
+# Optional page fetched over the pooled session so the first article request reuses an open connection
+WARMUP_URL = os.getenv("WARMUP_URL", "")
+BROWSER_WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_BROWSER_TIMEOUT_SECONDS", "60"))
+# Steps the worker cannot serve requests without; the others only make the first requests faster
+REQUIRED_STEPS = ("llm",)
+# Wait before retrying a failed warm-up, doubled after each further failure up to the maximum
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "15"))
+WARMUP_MAX_RETRY_SECONDS = float(os.getenv("WARMUP_MAX_RETRY_SECONDS", "300"))
+
+WARMUP_STATES = ("cold", "warming", "warm", "failed")
+
+_state = {"status": "cold", "started_at": None, "finished_at": None, "failures": 0, "steps": {}}
+_state_lock = threading.Lock()
+
+
+def _run_step(name: str, fn) -> bool:
+    """Runs one warm-up step, recording its duration and any error; returns True on success."""
+    start = time.perf_counter()
+    try:
+        ok = fn() is not False
+        error = None if ok else "not available"
+    except Exception as e:
+        ok, error = False, str(e)
+    step = {"ok": ok, "seconds": round(time.perf_counter() - start, 3)}
+    if error:
+        step["error"] = error
+        logging.warning(f"Warm-up step {name} failed after {step['seconds']}s: {error}")
+    else:
+        logging.info(f"Warm-up step {name} done in {step['seconds']}s.")
+    with _state_lock:
+        _state["steps"][name] = step
+    return ok
+
+
+def _warm_http():
+    session = get_http_session()
+    if WARMUP_URL:
+        session.head(WARMUP_URL, timeout=HTTP_TIMEOUT_SECONDS, allow_redirects=True)
+
+
+def warm_up(browsers: bool = WARMUP_BROWSERS) -> bool:
+    """Runs every warm-up step in the calling thread; returns True if the worker is ready to serve."""
+    with _state_lock:
+        _state.update(status="warming", started_at=time.time(), finished_at=None, steps={})
+    logging.info("Warming up worker...")
+
+    _run_step("llm", llm_ready)
+    _run_step("caches", lambda: (get_llm_cache(), get_page_cache()))
+    _run_step("http", _warm_http)
+    if browsers:
+        _run_step("browser", lambda: get_browser_pool().warm_up(BROWSER_WARMUP_TIMEOUT_SECONDS))
+
+    with _state_lock:
+        ready = all(_state["steps"].get(name, {}).get("ok") for name in REQUIRED_STEPS)
+        _state.update(status="warm" if ready else "failed", finished_at=time.time(),
+                      failures=0 if ready else _state["failures"] + 1)
+        elapsed = _state["finished_at"] - _state["started_at"]
+    logging.info(f"Worker warm-up finished in {elapsed:.1f}s: {'warm' if ready else 'failed'}.")
+    return ready
+
+
+def _retry_at_locked() -> float | None:
+    """When a failed warm-up may be retried, or None if the worker is not in the failed state."""
+    if _state["status"] != "failed":
+        return None
+    backoff = WARMUP_RETRY_SECONDS * 2 ** (_state["failures"] - 1)
+    return _state["finished_at"] + min(backoff, WARMUP_MAX_RETRY_SECONDS)
+
+
+def start_warm_up(browsers: bool = WARMUP_BROWSERS) -> bool:
+    """Starts the warm-up on a background thread if it has not started yet, or retries a failed one
+    whose backoff has passed; returns True if this call started it."""
+    with _state_lock:
+        retry_at = _retry_at_locked()
+        if _state["status"] != "cold" and (retry_at is None or time.time() < retry_at):
+            return False
+        if retry_at is not None:
+            logging.info(f"Retrying the worker warm-up (failed {_state['failures']} time(s)).")
+        _state["status"] = "warming"
+    threading.Thread(target=warm_up, kwargs={"browsers": browsers},
+                     name="warmup", daemon=True).start()
+    return True
+
+
+def readiness() -> tuple[dict, bool]:
+    """Returns (warm-up state, whether the worker should receive traffic)."""
+    with _state_lock:
+        state = {"status": _state["status"], "started_at": _state["started_at"], "finished_at": _state["finished_at"],
+                 "failures": _state["failures"], "retry_at": _retry_at_locked(),
+                 "steps": {name: dict(step) for name, step in _state["steps"].items()}}
+    # With warm-up disabled, workers take traffic cold (the first request pays for the setup)
+    return state, state["status"] == "warm" or not WARMUP_ENABLED
+
+
+# Example usage: warm up in this process and print the readiness report
+if __name__ == '__main__':
+    warm_up()
+    print(readiness())